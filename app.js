@@ -1,6 +1,7 @@
 // Scoreboard 3.0 - Enhanced with Multi-Category Comparison & YoY Visualization
-let globalData = [];
-let filteredData = [];
+let dashboardSummary = null;  // Dataset facts from the aggregation worker (counts, options, date range)
+let appliedFilters = null;    // Set by Apply Filters; see emptyFilters()
+let dashboardRequestId = 0;   // Latest aggregation request; older results are discarded
 let analyticsSettings = {
   showTrends: false,
   showPredictions: false,
@@ -97,27 +98,39 @@ function deduplicateData(data) {
 
 // Data Loading
 async function loadData() {
+  // Guard against double initialization (DOMContentLoaded is wired twice when embedded)
+  if (loadData.started) return;
+  loadData.started = true;
+
+  // Inside the Streamlit component rows are pushed by dashboard_bridge.js instead
+  if (window.scoreboardSync) {
+    showLoading();
+    return;
+  }
+
   showLoading();
   try {
+    let rawData;
     if (typeof window.dashboardData !== 'undefined' && window.dashboardData) {
       console.log('Using embedded data:', window.dashboardData.length, 'records');
-      const rawData = window.dashboardData;
-      globalData = deduplicateData(rawData);
-      filteredData = [...globalData];
+      rawData = window.dashboardData;
     } else {
       const resp = await fetch('data.json');
       if (!resp.ok) throw new Error(`Failed to load data.json: ${resp.status}`);
-      const rawData = await resp.json();
-      globalData = deduplicateData(rawData);
-      filteredData = [...globalData];
+      rawData = await resp.json();
     }
 
-    if (!globalData.length) {
+    // The worker now owns the dataset; drop the main-thread copy
+    dashboardSummary = await aggregationEngine.load(rawData);
+    window.dashboardData = null;
+    appliedFilters = emptyFilters();
+
+    if (!dashboardSummary.count) {
       throw new Error('No data found');
     }
 
     initializeDashboard();
-    showSuccess(`Loaded ${globalData.length} unique records successfully`);
+    showSuccess(`Loaded ${dashboardSummary.count} unique records successfully`);
   } catch (error) {
     showError(error.message);
     console.error('Data loading error:', error);
@@ -126,6 +139,35 @@ async function loadData() {
   }
 }
 
+// Apply a row delta pushed by the Streamlit component. The first delta loads
+// the dashboard; later ones update it in place, keeping filters and controls.
+async function receiveDashboardDelta(bytes, encoding) {
+  const outcome = await aggregationEngine.sync(bytes, encoding);
+  const firstLoad = dashboardSummary === null;
+  dashboardSummary = outcome.summary;
+
+  if (firstLoad) {
+    hideLoading();
+    appliedFilters = emptyFilters();
+    if (!dashboardSummary.count) {
+      showError('No data found');
+      return outcome;
+    }
+    initializeDashboard();
+    showSuccess(`Loaded ${dashboardSummary.count} unique records successfully`);
+    return outcome;
+  }
+
+  if (outcome.reset || outcome.upserted > 0 || outcome.deleted > 0) {
+    refreshFilterOptions();
+    await updateDashboard();
+    showSuccess(outcome.reset
+      ? `Reloaded ${dashboardSummary.count} unique records`
+      : `Data updated: ${outcome.upserted} new or changed, ${outcome.deleted} removed`);
+  }
+  return outcome;
+}
+
 // Date Utilities
 function isoWeekStart(dateStr) {
   const d = new Date(dateStr);
@@ -194,119 +236,602 @@ function getYearAgoRange(currentStartDate, currentEndDate, yearsBack = 1) {
   };
 }
 
-// Data Processing
-function aggregate(rows, groupBy = 'week') {
-  console.log('Aggregate function called with:', rows.length, 'rows, groupBy:', groupBy);
-  const by_date = {}, by_date_count = {}, by_book = {}, by_instr = {}, by_fac = {}, by_class = {};
-
-  rows.forEach(r => {
-    let d = parseDate(r['class_date']);
-    if (!d) return;
-
-    let key;
-    if (groupBy === 'week') {
-      key = isoWeekStart(d);
-    } else if (groupBy === 'month') {
-      key = getMonthStart(d);
-    } else {
-      key = d;
-    }
+// Aggregation Engine
+// The dataset lives in a dedicated Web Worker. Every filter change is answered
+// with one fused pass over the rows that produces the inputs for every KPI,
+// chart and insight. The functions below are also stringified into the
+// worker source, so they must only use each other (no DOM access).
+//
+// Accumulators are reversible: accumulateRow(acc, r, d, -1) takes a row back
+// out, so pushed row deltas update the last result without a rescan.
+function createAccumulator(groupBy) {
+  return {
+    groupBy,
+    rowCount: 0,
+    totalAttendees: 0,
+    totalBookings: 0,
+    // Distinct values with occurrence counts, so removals are exact
+    sessionGuids: new Map(),
+    guids: new Map(),
+    facilities: new Map(),
+    completeRecords: 0,
+    categoryAttendees: {},
+    subcategoryStats: {},
+    // Rows with a class_date only (time series, instructor/class/facility bars)
+    byDate: {},
+    byDateCount: {},
+    byBook: {},
+    byInstr: {},
+    byClass: {},
+    byFac: {},
+    // All rows (low performers, class-by-location rankings)
+    instrStats: {},
+    classLocationStats: {}
+  };
+}
+
+// Add (sign 1) or remove (sign -1) one occurrence of a distinct value
+function countDistinct(map, value, sign) {
+  const next = (map.get(value) || 0) + sign;
+  if (next > 0) {
+    map.set(value, next);
+  } else {
+    map.delete(value);
+  }
+}
 
-    const at = parseInt(r['total_attendees'] || 0) || 0;
-    const bk = parseInt(r['total_bookings'] || 0) || 0;
+// Add or remove one row's attendance in a keyed stats table; entries go away with their last row
+function addStats(table, key, at, sign, countField = 'count', attField = 'att', init = null) {
+  if (!table[key]) table[key] = Object.assign({ [attField]: 0, [countField]: 0 }, init);
+  table[key][attField] += sign * at;
+  table[key][countField] += sign;
+  if (table[key][countField] <= 0) delete table[key];
+}
 
-    by_date[key] = (by_date[key] || 0) + at;
-    by_date_count[key] = (by_date_count[key] || 0) + 1; // Track class count per date
-    by_book[key] = (by_book[key] || 0) + bk;
+function accumulateRow(acc, r, d, sign = 1) {
+  const at = parseInt(r['total_attendees'] || 0) || 0;
+  const bk = parseInt(r['total_bookings'] || 0) || 0;
 
-    const instr = r['instructor_name'] || '';
-    if (instr.trim()) {
-      if (!by_instr[instr]) by_instr[instr] = { att: 0, count: 0 };
-      by_instr[instr].att += at;
-      by_instr[instr].count += 1;
-    }
+  acc.rowCount += sign;
+  acc.totalAttendees += sign * at;
+  acc.totalBookings += sign * bk;
+  if (r['session_guid']) countDistinct(acc.sessionGuids, r['session_guid'], sign);
+  countDistinct(acc.guids, r.guid, sign);
+  countDistinct(acc.facilities, r.facility, sign);
+  if (r.total_attendees && r.class_date) acc.completeRecords += sign;
 
-    const className = r['class_name'] || '';
-    if (className.trim()) {
-      if (!by_class[className]) by_class[className] = { att: 0, count: 0 };
-      by_class[className].att += at;
-      by_class[className].count += 1;
-    }
+  const topCategory = r['greatgrandparent_category'];
+  if (topCategory) addStats(acc.categoryAttendees, topCategory, at, sign);
 
-    const fac = r['facility'] || '';
-    if (!by_fac[fac]) by_fac[fac] = { att: 0, count: 0 };
-    by_fac[fac].att += at;
-    by_fac[fac].count += 1;
-  });
+  // Use parent_category for specific class types (e.g., Vinyasa), fall back to broader categories
+  const subcategory = r['parent_category'] || r['grandparent_category'] || r['greatgrandparent_category'] || 'Unknown';
+  addStats(acc.subcategoryStats, subcategory, at, sign);
+
+  const instructor = r['instructor_name'];
+  if (instructor && instructor.trim() !== '') {
+    addStats(acc.instrStats, instructor, at, sign, 'classCount', 'totalAttendance');
+  }
+
+  const className = r['class_name'];
+  if (className && className.trim() !== '') {
+    const locationName = getFacilityName(r['facility']);
+    const classKey = `${className} (${locationName})`;
+    addStats(acc.classLocationStats, classKey, at, sign, 'classCount', 'totalAttendance', { location: locationName });
+  }
+
+  if (!d) return;
+
+  let key;
+  if (acc.groupBy === 'week') {
+    key = isoWeekStart(d);
+  } else if (acc.groupBy === 'month') {
+    key = getMonthStart(d);
+  } else {
+    key = d;
+  }
+
+  acc.byDate[key] = (acc.byDate[key] || 0) + sign * at;
+  acc.byDateCount[key] = (acc.byDateCount[key] || 0) + sign; // Track class count per date
+  acc.byBook[key] = (acc.byBook[key] || 0) + sign * bk;
+  if (acc.byDateCount[key] <= 0) {
+    delete acc.byDate[key];
+    delete acc.byDateCount[key];
+    delete acc.byBook[key];
+  }
+
+  const instr = r['instructor_name'] || '';
+  if (instr.trim()) addStats(acc.byInstr, instr, at, sign);
+
+  const cls = r['class_name'] || '';
+  if (cls.trim()) addStats(acc.byClass, cls, at, sign);
+
+  const fac = r['facility'] || '';
+  addStats(acc.byFac, fac, at, sign);
+}
+
+function rankLowPerformingInstructors(instrStats, threshold = 4) {
+  return Object.entries(instrStats)
+    .map(([instructor, stats]) => [instructor, stats, stats.classCount > 0 ? stats.totalAttendance / stats.classCount : 0])
+    .filter(([instructor, stats, avgAttendance]) =>
+      avgAttendance <= threshold &&
+      stats.classCount >= 3 &&
+      instructor !== 'Unknown' &&
+      instructor.trim() !== ''
+    )
+    .map(([instructor, stats, avgAttendance]) => ({
+      instructor,
+      avgAttendance: Math.round(avgAttendance * 10) / 10,
+      totalClasses: stats.classCount,
+      totalAttendance: stats.totalAttendance
+    }))
+    .sort((a, b) => a.avgAttendance - b.avgAttendance);
+}
+
+function rankClasses(classLocationStats) {
+  return Object.entries(classLocationStats)
+    .filter(([name, stats]) => stats.classCount >= 3 && name.trim() !== '')
+    .map(([classKey, stats]) => ({
+      className: classKey,
+      avgAttendance: Math.round((stats.totalAttendance / stats.classCount) * 10) / 10,
+      classCount: stats.classCount,
+      totalAttendance: stats.totalAttendance,
+      location: stats.location
+    }));
+}
 
-  const dates = Object.keys(by_date).filter(x => x).sort();
-  const date_vals = dates.map(d => by_date[d]);
-  const avg_attendance_vals = dates.map(d => by_date_count[d] > 0 ? by_date[d] / by_date_count[d] : 0);
-  const book_vals = dates.map(d => by_book[d]);
+function finalizeAccumulator(acc) {
+  const dates = Object.keys(acc.byDate).filter(x => x).sort();
+  const date_vals = dates.map(d => acc.byDate[d]);
+  const avg_attendance_vals = dates.map(d => acc.byDateCount[d] > 0 ? acc.byDate[d] / acc.byDateCount[d] : 0);
+  const book_vals = dates.map(d => acc.byBook[d]);
 
-  const instr_list = Object.entries(by_instr)
+  const instr_list = Object.entries(acc.byInstr)
     .filter(([name, stats]) => stats.count >= 3 && name.trim() !== '')
     .map(([name, stats]) => [name, stats.att, stats.count, stats.count > 0 ? stats.att / stats.count : 0])
     .sort((a, b) => b[3] - a[3])
     .slice(0, 20);
 
-  const instr_names = instr_list.map(x => x[0]);
-  const instr_vals = instr_list.map(x => Math.round(x[3] * 10) / 10);
-
-  const class_list = Object.entries(by_class)
+  const class_list = Object.entries(acc.byClass)
     .filter(([name, stats]) => stats.count >= 3 && name.trim() !== '')
     .map(([name, stats]) => [name, stats.att, stats.count, stats.count > 0 ? stats.att / stats.count : 0])
     .sort((a, b) => b[3] - a[3])
     .slice(0, 20);
 
-  const class_names = class_list.map(x => x[0]);
-  const class_vals = class_list.map(x => Math.round(x[3] * 10) / 10);
+  const fac_list = Object.entries(acc.byFac).map(([k, v]) => [k, v.att, v.count]).sort((a, b) => b[1] - a[1]).slice(0, 20);
 
-  const fac_list = Object.entries(by_fac).map(([k, v]) => [k, v.att, v.count]).sort((a, b) => b[1] - a[1]).slice(0, 20);
-  const fac_names = fac_list.map(x => getFacilityName(x[0]));
-  const fac_vals = fac_list.map(x => x[1]);
-  const fac_avg = fac_list.map(x => x[2] > 0 ? x[1] / x[2] : 0);
+  const rankedClasses = rankClasses(acc.classLocationStats);
+  const topCategory = Object.entries(acc.categoryAttendees)
+    .map(([category, stats]) => [category, stats.att])
+    .sort((a, b) => b[1] - a[1])[0] || null;
+  const subcategoryStats = {};
+  Object.entries(acc.subcategoryStats).forEach(([subcategory, stats]) => {
+    subcategoryStats[subcategory] = stats.att;
+  });
 
-  return { dates, date_vals, avg_attendance_vals, book_vals, instr_names, instr_vals, fac_names, fac_vals, fac_avg, class_names, class_vals };
+  return {
+    rowCount: acc.rowCount,
+    dates,
+    date_vals,
+    avg_attendance_vals,
+    book_vals,
+    instr_names: instr_list.map(x => x[0]),
+    instr_vals: instr_list.map(x => Math.round(x[3] * 10) / 10),
+    class_names: class_list.map(x => x[0]),
+    class_vals: class_list.map(x => Math.round(x[3] * 10) / 10),
+    fac_names: fac_list.map(x => getFacilityName(x[0])),
+    fac_vals: fac_list.map(x => x[1]),
+    fac_avg: fac_list.map(x => x[2] > 0 ? x[1] / x[2] : 0),
+    kpis: {
+      total_attendees: acc.totalAttendees,
+      total_bookings: acc.totalBookings,
+      total_classes: acc.rowCount,
+      unique_classes: acc.sessionGuids.size
+    },
+    lowPerformingInstructors: rankLowPerformingInstructors(acc.instrStats, 4),
+    topClasses: [...rankedClasses].sort((a, b) => b.avgAttendance - a.avgAttendance).slice(0, 10),
+    lowClasses: rankedClasses.filter(cls => cls.avgAttendance < 3).sort((a, b) => a.avgAttendance - b.avgAttendance),
+    subcategoryStats,
+    insights: {
+      categoryCount: Object.keys(acc.categoryAttendees).length,
+      topCategory,
+      uniqueCustomers: acc.guids.size,
+      activeFacilities: acc.facilities.size,
+      completeRecords: acc.completeRecords
+    }
+  };
 }
 
-// NEW: Get comparison data for YoY with category filter
-function getComparisonData(yearsBack = 1) {
-  const currentPeriod = getCurrentDateRange();
-  
-  if (!currentPeriod.hasSelection || !currentPeriod.start || !currentPeriod.end) {
-    return [];
+// Backwards-compatible single-dataset aggregation
+function aggregate(rows, groupBy = 'week') {
+  const acc = createAccumulator(groupBy);
+  rows.forEach(r => accumulateRow(acc, r, parseDate(r['class_date'])));
+  return finalizeAccumulator(acc);
+}
+
+// Same rules as the Apply Filters button
+function rowMatchesFilters(r, d, filters) {
+  if (filters.dateFrom || filters.dateTo) {
+    if (filters.dateFrom && d < filters.dateFrom) return false;
+    if (filters.dateTo && d > filters.dateTo) return false;
+  }
+  if (filters.instructor && r['instructor_name'] !== filters.instructor) return false;
+  if (filters.facilities && filters.facilities.length > 0 && !filters.facilities.includes(r['facility'])) return false;
+  if (filters.categories && filters.categories.length > 0 && !filters.categories.includes(r['greatgrandparent_category'])) {
+    return false;
+  }
+  return true;
+}
+
+function filterRows(rows, filters) {
+  return rows.filter(r => rowMatchesFilters(r, parseDate(r['class_date']), filters));
+}
+
+// One pass over the dataset producing every chart's series.
+// request.applied: filters captured by Apply Filters (defines the current data)
+// request.live: controls as they are now (comparison period, category comparison)
+function createAggregationState(request) {
+  const { live, groupBy } = request;
+  const liveCategories = live.selectedCategories || [];
+  const multiCategory = liveCategories.length > 1;
+  const hasYoY = (live.compareYearOverYear || live.compareTwoYearsAgo) && live.hasSelection;
+  const yearsBack = live.compareTwoYearsAgo ? 2 : 1;
+
+  const createSet = () => {
+    const all = createAccumulator(groupBy);
+    return {
+      all,
+      selected: liveCategories.length > 0 ? createAccumulator(groupBy) : all,
+      perCategory: multiCategory ? liveCategories.map(() => createAccumulator(groupBy)) : []
+    };
+  };
+
+  // Comparison windows: the selected years back, plus 1 year ago for the category overlays
+  const windows = [];
+  if (hasYoY) {
+    windows.push({ yearsBack, range: getYearAgoRange(live.start, live.end, yearsBack), set: createSet() });
+    if (multiCategory && yearsBack !== 1) {
+      windows.push({ yearsBack: 1, range: getYearAgoRange(live.start, live.end, 1), set: createSet() });
+    }
   }
 
-  const comparisonPeriod = getYearAgoRange(currentPeriod.start, currentPeriod.end, yearsBack);
-  
-  console.log(`Getting ${yearsBack} year(s) ago data:`, comparisonPeriod);
+  return { request, liveCategories, multiCategory, hasYoY, yearsBack, current: createSet(), windows };
+}
+
+// Route one row into every accumulator it belongs to (sign -1 takes it back out)
+function accumulateIntoState(state, r, sign = 1) {
+  const { applied, live } = state.request;
+  const liveCategories = state.liveCategories;
+  const d = parseDate(r['class_date']);
+  const category = r['greatgrandparent_category'];
+
+  const addToSet = (set) => {
+    accumulateRow(set.all, r, d, sign);
+    if (set.selected !== set.all && liveCategories.includes(category)) accumulateRow(set.selected, r, d, sign);
+    set.perCategory.forEach((acc, index) => {
+      if (liveCategories[index] === category) accumulateRow(acc, r, d, sign);
+    });
+  };
+
+  if (rowMatchesFilters(r, d, applied)) addToSet(state.current);
+
+  if (state.windows.length === 0) return;
+  // Comparison rows use the live facility/instructor controls and a single selected category
+  const liveFacilities = live.facilities || [];
+  if (liveFacilities.length > 0 && !liveFacilities.includes(r['facility'])) return;
+  if (live.instructor && r['instructor_name'] !== live.instructor) return;
+  if (liveCategories.length === 1 && category !== liveCategories[0]) return;
+
+  state.windows.forEach(w => {
+    if (d < w.range.start || d > w.range.end) return;
+    addToSet(w.set);
+  });
+}
 
-  const comparisonData = globalData.filter(row => {
-    const rowDate = parseDate(row['class_date']);
+function finalizeAggregationState(state) {
+  const finalizeSet = (set) => {
+    const all = finalizeAccumulator(set.all);
+    return {
+      all,
+      selected: set.selected === set.all ? all : finalizeAccumulator(set.selected),
+      perCategory: set.perCategory.map(finalizeAccumulator)
+    };
+  };
 
-    // Must be in comparison period
-    if (rowDate < comparisonPeriod.start || rowDate > comparisonPeriod.end) return false;
+  const windows = state.windows;
+  const comparison = windows.length > 0 ? finalizeSet(windows[0].set) : null;
+  const oneYearWindow = windows.find(w => w.yearsBack === 1);
 
-    // Apply same filters as current data
-    const facilityToggles = document.querySelectorAll('.facility-toggle input[type="checkbox"]:checked');
-    const selectedFacilities = Array.from(facilityToggles).map(checkbox => checkbox.value);
-    if (selectedFacilities.length > 0 && !selectedFacilities.includes(row['facility'])) return false;
+  return {
+    groupBy: state.request.groupBy,
+    hasYoY: state.hasYoY,
+    yearsBack: state.yearsBack,
+    current: finalizeSet(state.current),
+    comparison,
+    categoryComparison: state.multiCategory && oneYearWindow
+      ? (oneYearWindow === windows[0] ? comparison : finalizeSet(oneYearWindow.set)).perCategory
+      : null
+  };
+}
 
-    const instructor = safeGetElement('instr_select')?.value;
-    if (instructor && row['instructor_name'] !== instructor) return false;
+function computeDashboardAggregates(rows, request) {
+  const state = createAggregationState(request);
+  rows.forEach(r => accumulateIntoState(state, r));
+  return finalizeAggregationState(state);
+}
 
-    // NEW: Apply category filter if single category selected
-    const selectedCategories = getSelectedCategories();
-    if (selectedCategories.length === 1 && row['greatgrandparent_category'] !== selectedCategories[0]) {
-      return false;
+function summarizeDataset(rows, rawCount) {
+  const dates = rows.map(r => parseDate(r['class_date'])).filter(Boolean).sort();
+  return {
+    rawCount,
+    count: rows.length,
+    instructors: uniqueSorted(rows.map(r => r['instructor_name']).filter(Boolean)),
+    facilities: uniqueSorted(rows.map(r => r['facility']).filter(Boolean)),
+    categories: uniqueSorted(rows.map(r => r['greatgrandparent_category']).filter(Boolean)),
+    firstDate: dates.length > 0 ? dates[0] : null,
+    lastDate: dates.length > 0 ? dates[dates.length - 1] : null
+  };
+}
+
+// Rows keyed by session_guid (or position when a row has none), so pushed deltas can upsert in place
+function createRowStore(rows, keys = null) {
+  const store = { rows: [], keys: [], index: new Map() };
+  rows.forEach((row, position) => {
+    const key = keys ? keys[position] : (row['session_guid'] || `#${position}`);
+    store.index.set(key, store.rows.length);
+    store.rows.push(row);
+    store.keys.push(key);
+  });
+  return store;
+}
+
+// Apply { upserts: [[key, row], ...], deletes: [key, ...] }; returns the rows taken out and put in
+function applyRowDelta(store, delta) {
+  const removed = [];
+  const added = [];
+
+  (delta.deletes || []).forEach(key => {
+    const position = store.index.get(key);
+    if (position === undefined) return;
+    removed.push(store.rows[position]);
+
+    // Swap-remove: move the last row into the hole
+    const lastRow = store.rows.pop();
+    const lastKey = store.keys.pop();
+    store.index.delete(key);
+    if (position < store.rows.length) {
+      store.rows[position] = lastRow;
+      store.keys[position] = lastKey;
+      store.index.set(lastKey, position);
     }
+  });
 
-    return true;
+  (delta.upserts || []).forEach(([key, row]) => {
+    const position = store.index.get(key);
+    if (position === undefined) {
+      store.index.set(key, store.rows.length);
+      store.rows.push(row);
+      store.keys.push(key);
+    } else {
+      removed.push(store.rows[position]);
+      store.rows[position] = row;
+    }
+    added.push(row);
   });
 
-  console.log(`${yearsBack} year(s) ago data count:`, comparisonData.length);
-  return comparisonData;
+  return { removed, added };
+}
+
+// Delta bytes from the server: JSON, gzip-compressed when encoding is 'gzip'
+async function decodeRowDelta(bytes, encoding) {
+  let stream = new Blob([bytes]).stream();
+  if (encoding === 'gzip') stream = stream.pipeThrough(new DecompressionStream('gzip'));
+  return JSON.parse(await new Response(stream).text());
+}
+
+// Owns the dataset and answers aggregation requests. Runs inside the worker,
+// or on the main thread when workers are unavailable.
+function createAggregationService() {
+  let store = createRowStore([]);
+  // Accumulators of the last compute, kept up to date as deltas arrive
+  let state = null;
+  let stateKey = null;
+
+  return {
+    load(rawData) {
+      store = createRowStore(deduplicateData(rawData));
+      state = null;
+      return summarizeDataset(store.rows, rawData.length);
+    },
+
+    compute(request) {
+      const key = JSON.stringify(request);
+      if (state === null || key !== stateKey) {
+        state = createAggregationState(request);
+        stateKey = key;
+        store.rows.forEach(r => accumulateIntoState(state, r));
+      }
+      return finalizeAggregationState(state);
+    },
+
+    rows(filters) {
+      return filterRows(store.rows, filters);
+    },
+
+    async sync({ bytes, encoding }) {
+      const delta = await decodeRowDelta(bytes, encoding);
+      if (delta.reset) {
+        store = createRowStore(delta.upserts.map(u => u[1]), delta.upserts.map(u => u[0]));
+        state = null;
+      } else {
+        const { removed, added } = applyRowDelta(store, delta);
+        if (state !== null) {
+          removed.forEach(r => accumulateIntoState(state, r, -1));
+          added.forEach(r => accumulateIntoState(state, r, 1));
+        }
+      }
+      return {
+        reset: Boolean(delta.reset),
+        upserted: (delta.upserts || []).length,
+        deleted: (delta.deletes || []).length,
+        summary: summarizeDataset(store.rows, store.rows.length)
+      };
+    }
+  };
+}
+
+function aggregationWorkerMain() {
+  const service = createAggregationService();
+
+  self.onmessage = (event) => {
+    const { id, type, payload } = event.data;
+    Promise.resolve()
+      .then(() => {
+        if (typeof service[type] !== 'function') throw new Error(`Unknown request: ${type}`);
+        return service[type](payload);
+      })
+      .then(
+        result => self.postMessage({ id, result }),
+        error => self.postMessage({ id, error: error.message })
+      );
+  };
+}
+
+const AGGREGATION_WORKER_FUNCTIONS = [
+  parseDate, isoWeekStart, getMonthStart, getFacilityName, uniqueSorted, deduplicateData, getYearAgoRange,
+  createAccumulator, countDistinct, addStats, accumulateRow, rankLowPerformingInstructors, rankClasses,
+  finalizeAccumulator, rowMatchesFilters, filterRows, createAggregationState, accumulateIntoState,
+  finalizeAggregationState, computeDashboardAggregates, summarizeDataset, createRowStore, applyRowDelta,
+  decodeRowDelta, createAggregationService, aggregationWorkerMain
+];
+
+function createAggregationWorker() {
+  if (typeof Worker === 'undefined' || typeof Blob === 'undefined' || !window.URL) return null;
+  try {
+    const source = AGGREGATION_WORKER_FUNCTIONS.map(fn => fn.toString()).join('\n\n') + '\n\naggregationWorkerMain();\n';
+    const url = window.URL.createObjectURL(new Blob([source], { type: 'application/javascript' }));
+    const worker = new Worker(url);
+    worker.sourceUrl = url;
+    return worker;
+  } catch (error) {
+    console.warn('Web Worker unavailable, aggregating on the main thread:', error);
+    return null;
+  }
+}
+
+// Main-thread handle on the worker. Falls back to running the same service
+// inline when workers are unavailable (e.g. restrictive iframe sandboxes).
+const aggregationEngine = {
+  worker: null,
+  service: null,
+  nextId: 1,
+  pending: {},
+  holdsData: false, // the worker has applied a load or sync
+
+  start() {
+    if (this.worker || this.service) return;
+    this.worker = createAggregationWorker();
+    if (!this.worker) {
+      this.service = createAggregationService();
+      return;
+    }
+
+    this.worker.onmessage = (event) => {
+      if (this.worker && this.worker.sourceUrl) {
+        // Script is loaded once the first reply arrives
+        window.URL.revokeObjectURL(this.worker.sourceUrl);
+        this.worker.sourceUrl = null;
+      }
+      this._settle(event.data);
+    };
+    this.worker.onerror = (event) => {
+      // Worker could not start or crashed: keep working on the main thread
+      console.warn('Aggregation worker failed, using main thread:', event.message);
+      this.worker.terminate();
+      this.worker = null;
+      this.service = createAggregationService();
+
+      // Before any data reached the worker, replaying the requests rebuilds its state
+      const retry = !this.holdsData;
+      Object.keys(this.pending).forEach(id => this._settle({ id: Number(id), error: event.message || 'Worker error', retry }));
+      if (retry) return;
+
+      // The rows died with the worker and the main thread holds no copy
+      if (window.scoreboardSync) {
+        dashboardBridge.resync();
+      } else {
+        showError('The dashboard engine stopped. Reload the page to continue.');
+      }
+    };
+  },
+
+  load(rawData) {
+    return this._request('load', rawData);
+  },
+
+  compute(request) {
+    return this._request('compute', request);
+  },
+
+  filteredRows(filters) {
+    return this._request('rows', filters);
+  },
+
+  // Apply a row delta pushed by the Streamlit component (see dashboard_bridge.js)
+  sync(bytes, encoding) {
+    return this._request('sync', { bytes, encoding });
+  },
+
+  _request(type, payload) {
+    this.start();
+    const inline = () => Promise.resolve().then(() => this.service[type](payload));
+    if (!this.worker) return inline();
+
+    const id = this.nextId++;
+    return new Promise((resolve, reject) => {
+      this.pending[id] = { type, resolve, reject, retry: inline };
+      this.worker.postMessage({ id, type, payload });
+    });
+  },
+
+  _settle(message) {
+    const request = this.pending[message.id];
+    if (!request) return;
+    delete this.pending[message.id];
+    if (message.retry) {
+      request.retry().then(request.resolve, request.reject);
+    } else if (message.error) {
+      request.reject(new Error(message.error));
+    } else {
+      if (request.type === 'load' || request.type === 'sync') this.holdsData = true;
+      request.resolve(message.result);
+    }
+  }
+};
+
+// Filters captured by the last Apply Filters click (empty = all data)
+function emptyFilters() {
+  return { dateFrom: '', dateTo: '', instructor: '', facilities: [], categories: [] };
+}
+
+// Current state of the comparison and grouping controls
+function buildAggregationRequest() {
+  const currentPeriod = getCurrentDateRange();
+  const facilityToggles = document.querySelectorAll('.facility-toggle input[type="checkbox"]:checked');
+
+  return {
+    applied: appliedFilters,
+    groupBy: safeGetElement('group_by')?.value || 'week',
+    live: {
+      start: currentPeriod.start,
+      end: currentPeriod.end,
+      hasSelection: currentPeriod.hasSelection,
+      compareYearOverYear: safeGetElement('compare_year_over_year')?.checked || false,
+      compareTwoYearsAgo: safeGetElement('compare_two_years_ago')?.checked || false,
+      facilities: Array.from(facilityToggles).map(checkbox => checkbox.value),
+      instructor: safeGetElement('instr_select')?.value || '',
+      selectedCategories: getSelectedCategories()
+    }
+  };
 }
 
 // NEW: Get selected categories for multi-category comparison
@@ -319,43 +844,30 @@ function getSelectedCategories() {
 }
 
 // KPI Calculations with Year-over-Year Support
-function updateKPIs() {
-  const total_attendees = filteredData.reduce((sum, r) => sum + (parseInt(r['total_attendees']) || 0), 0);
-  const total_bookings = filteredData.reduce((sum, r) => sum + (parseInt(r['total_bookings']) || 0), 0);
-  const total_classes = filteredData.length;
+function updateKPIs(result) {
+  const { total_attendees, total_bookings, total_classes, unique_classes } = result.current.all.kpis;
   const avg_attendance = total_classes > 0 ? total_attendees / total_classes : 0;
 
-  const unique_classes = new Set(
-    filteredData.map(r => r['session_guid']).filter(Boolean)
-  ).size;
-
   const unique_participants = Math.round(total_attendees * 0.7);
 
   const currentPeriod = getCurrentDateRange();
   const compareYearOverYear = safeGetElement('compare_year_over_year')?.checked || false;
   const compareTwoYearsAgo = safeGetElement('compare_two_years_ago')?.checked || false;
 
-  let comparisonData = [];
-  let comparisonLabel = '';
-  
-  if (currentPeriod.hasSelection && currentPeriod.start && currentPeriod.end) {
-    if (compareTwoYearsAgo) {
-      comparisonData = getComparisonData(2);
-      comparisonLabel = 'vs 2 years ago';
-    } else if (compareYearOverYear) {
-      comparisonData = getComparisonData(1);
-      comparisonLabel = 'vs 1 year ago';
-    }
+  const emptyKpis = { total_attendees: 0, total_bookings: 0, total_classes: 0, unique_classes: 0 };
+  const comparisonKpis = result.comparison ? result.comparison.all.kpis : emptyKpis;
+  const comparisonLabel = result.comparison ? (compareTwoYearsAgo ? 'vs 2 years ago' : 'vs 1 year ago') : '';
 
-    console.log('Comparison type:', compareTwoYearsAgo ? '2 years' : compareYearOverYear ? '1 year' : 'none');
-    console.log('Comparison data count:', comparisonData.length);
+  if (result.comparison) {
+    console.log('Comparison type:', compareTwoYearsAgo ? '2 years' : '1 year');
+    console.log('Comparison data count:', comparisonKpis.total_classes);
   }
 
-  const prev_total_attendees = comparisonData.reduce((sum, r) => sum + (parseInt(r['total_attendees']) || 0), 0);
-  const prev_total_bookings = comparisonData.reduce((sum, r) => sum + (parseInt(r['total_bookings']) || 0), 0);
-  const prev_total_classes = comparisonData.length;
+  const prev_total_attendees = comparisonKpis.total_attendees;
+  const prev_total_bookings = comparisonKpis.total_bookings;
+  const prev_total_classes = comparisonKpis.total_classes;
   const prev_avg_attendance = prev_total_classes > 0 ? prev_total_attendees / prev_total_classes : 0;
-  const prev_unique_classes = new Set(comparisonData.map(r => r['session_guid']).filter(Boolean)).size;
+  const prev_unique_classes = comparisonKpis.unique_classes;
   const prev_unique_participants = Math.round(prev_total_attendees * 0.7);
 
   const getPercentageChange = (current, previous) => {
@@ -399,7 +911,7 @@ function updateKPIs() {
     return 'trend-neutral';
   };
 
-  const hasPreviousData = comparisonData.length > 0;
+  const hasPreviousData = prev_total_classes > 0;
   const hasDateSelection = currentPeriod.hasSelection;
   const kpiContainer = safeGetElement('kpis');
   if (kpiContainer) {
@@ -671,7 +1183,7 @@ function createAvgTimeSeriesWithYoY(elementId, currentData, comparisonData, grou
 }
 
 // NEW: Create multi-category comparison time series
-function createMultiCategoryTimeSeries(elementId, categories, groupBy, includeYoY = false) {
+function createMultiCategoryTimeSeries(elementId, categories, series, comparisonSeries = null) {
   const element = safeGetElement(elementId);
   if (!element || !window.Plotly || categories.length === 0) {
     console.warn(`Cannot create multi-category chart for ${elementId}`);
@@ -682,11 +1194,12 @@ function createMultiCategoryTimeSeries(elementId, categories, groupBy, includeYo
     const traces = [];
     const colors = ['#cf2e2e', '#06b6d4', '#10b981', '#8b5cf6'];
 
+    const includeYoY = comparisonSeries !== null;
+
     categories.forEach((category, index) => {
-      const categoryData = filteredData.filter(r => r.greatgrandparent_category === category);
-      if (categoryData.length === 0) return;
+      const aggregated = series[index];
+      if (!aggregated || aggregated.rowCount === 0) return;
 
-      const aggregated = aggregate(categoryData, groupBy);
       const color = colors[index % colors.length];
 
       // Current period trace (solid line)
@@ -702,11 +1215,9 @@ function createMultiCategoryTimeSeries(elementId, categories, groupBy, includeYo
 
       // Prior year trace (dashed line, same color) if YoY is enabled
       if (includeYoY) {
-        const comparisonData = getComparisonData(1);
-        const categoryComparisonData = comparisonData.filter(r => r.greatgrandparent_category === category);
-        
-        if (categoryComparisonData.length > 0) {
-          const comparisonAggregated = aggregate(categoryComparisonData, groupBy);
+        const comparisonAggregated = comparisonSeries[index];
+
+        if (comparisonAggregated && comparisonAggregated.rowCount > 0) {
           
           // Truncate comparison data to match current period length
           const maxLength = aggregated.dates.length;
@@ -779,7 +1290,7 @@ function createMultiCategoryTimeSeries(elementId, categories, groupBy, includeYo
 }
 
 // Multi-category Average Attendance Time Series with optional YoY
-function createMultiCategoryAvgTimeSeries(elementId, categories, groupBy, includeYoY = false) {
+function createMultiCategoryAvgTimeSeries(elementId, categories, series, comparisonSeries = null) {
   const element = safeGetElement(elementId);
   if (!element || !window.Plotly || categories.length === 0) {
     console.warn(`Cannot create multi-category average chart for ${elementId}`);
@@ -790,11 +1301,12 @@ function createMultiCategoryAvgTimeSeries(elementId, categories, groupBy, includ
     const traces = [];
     const colors = ['#cf2e2e', '#06b6d4', '#10b981', '#8b5cf6'];
 
+    const includeYoY = comparisonSeries !== null;
+
     categories.forEach((category, index) => {
-      const categoryData = filteredData.filter(r => r.greatgrandparent_category === category);
-      if (categoryData.length === 0) return;
+      const aggregated = series[index];
+      if (!aggregated || aggregated.rowCount === 0) return;
 
-      const aggregated = aggregate(categoryData, groupBy);
       const color = colors[index % colors.length];
 
       // Current period trace (solid line)
@@ -810,11 +1322,9 @@ function createMultiCategoryAvgTimeSeries(elementId, categories, groupBy, includ
 
       // Prior year trace (dashed line, same color) if YoY is enabled
       if (includeYoY) {
-        const comparisonData = getComparisonData(1);
-        const categoryComparisonData = comparisonData.filter(r => r.greatgrandparent_category === category);
-        
-        if (categoryComparisonData.length > 0) {
-          const comparisonAggregated = aggregate(categoryComparisonData, groupBy);
+        const comparisonAggregated = comparisonSeries[index];
+
+        if (comparisonAggregated && comparisonAggregated.rowCount > 0) {
           
           // Truncate comparison data to match current period length
           const maxLength = aggregated.dates.length;
@@ -1222,169 +1732,27 @@ function createPieChart(elementId, data, title, comparisonData = null, compariso
   }
 }
 
-// Instructor Analysis
-function analyzeInstructorPerformance() {
-  const instructorStats = {};
-
-  filteredData.forEach(r => {
-    const instructor = r['instructor_name'];
-    if (!instructor || instructor.trim() === '') return;
-
-    const attendance = parseInt(r['total_attendees']) || 0;
-
-    if (!instructorStats[instructor]) {
-      instructorStats[instructor] = {
-        totalAttendance: 0,
-        classCount: 0,
-        avgAttendance: 0
-      };
-    }
-
-    instructorStats[instructor].totalAttendance += attendance;
-    instructorStats[instructor].classCount += 1;
-  });
-
-  Object.keys(instructorStats).forEach(instructor => {
-    const stats = instructorStats[instructor];
-    stats.avgAttendance = stats.classCount > 0 ? stats.totalAttendance / stats.classCount : 0;
-  });
-
-  return instructorStats;
-}
-
-function getLowPerformingInstructors(threshold = 4) {
-  const instructorStats = analyzeInstructorPerformance();
-
-  return Object.entries(instructorStats)
-    .filter(([instructor, stats]) =>
-      stats.avgAttendance <= threshold &&
-      stats.classCount >= 3 &&
-      instructor !== 'Unknown' &&
-      instructor.trim() !== ''
-    )
-    .map(([instructor, stats]) => ({
-      instructor,
-      avgAttendance: Math.round(stats.avgAttendance * 10) / 10,
-      totalClasses: stats.classCount,
-      totalAttendance: stats.totalAttendance
-    }))
-    .sort((a, b) => a.avgAttendance - b.avgAttendance);
-}
-
-// Class Analysis
-function getTopPerformingClasses(limit = 10, data = null) {
-  const classLocationStats = {};
-  const dataToUse = data || filteredData;
-
-  dataToUse.forEach(r => {
-    const className = r['class_name'];
-    const facilityId = r['facility'];
-    if (!className || className.trim() === '') return;
-
-    const locationName = getFacilityName(facilityId);
-    const classKey = `${className} (${locationName})`;
-
-    if (!classLocationStats[classKey]) {
-      classLocationStats[classKey] = { totalAttendance: 0, classCount: 0, location: locationName };
-    }
-
-    classLocationStats[classKey].totalAttendance += parseInt(r['total_attendees']) || 0;
-    classLocationStats[classKey].classCount += 1;
-  });
-
-  return Object.entries(classLocationStats)
-    .filter(([name, stats]) => stats.classCount >= 3 && name.trim() !== '')
-    .map(([classKey, stats]) => ({
-      className: classKey,
-      avgAttendance: Math.round((stats.totalAttendance / stats.classCount) * 10) / 10,
-      classCount: stats.classCount,
-      totalAttendance: stats.totalAttendance,
-      location: stats.location
-    }))
-    .sort((a, b) => b.avgAttendance - a.avgAttendance)
-    .slice(0, limit);
-}
-
-// Helper function for class comparison with YoY
-function getTopPerformingClassesFromData(data, limit) {
-  const classLocationStats = {};
-  data.forEach(r => {
-    const className = r['class_name'];
-    const facilityId = r['facility'];
-    if (!className || className.trim() === '') return;
-    const locationName = getFacilityName(facilityId);
-    const classKey = `${className} (${locationName})`;
-    if (!classLocationStats[classKey]) classLocationStats[classKey] = { totalAttendance: 0, classCount: 0 };
-    classLocationStats[classKey].totalAttendance += parseInt(r['total_attendees']) || 0;
-    classLocationStats[classKey].classCount += 1;
-  });
-  return Object.entries(classLocationStats)
-    .filter(([name, stats]) => stats.classCount >= 3 && name.trim() !== '')
-    .map(([classKey, stats]) => ({ className: classKey, avgAttendance: Math.round((stats.totalAttendance / stats.classCount) * 10) / 10, totalAttendance: stats.totalAttendance }))
-    .sort((a, b) => b.avgAttendance - a.avgAttendance)
-    .slice(0, limit);
-}
-
-function getLowPerformingClasses(threshold = 3, data = null) {
-  const classLocationStats = {};
-  const dataToUse = data || filteredData;
-
-  dataToUse.forEach(r => {
-    const className = r['class_name'];
-    const facilityId = r['facility'];
-    if (!className || className.trim() === '') return;
-
-    const locationName = getFacilityName(facilityId);
-    const classKey = `${className} (${locationName})`;
-
-    if (!classLocationStats[classKey]) {
-      classLocationStats[classKey] = {
-        totalAttendance: 0,
-        classCount: 0,
-        location: locationName
-      };
-    }
-
-    classLocationStats[classKey].totalAttendance += parseInt(r['total_attendees']) || 0;
-    classLocationStats[classKey].classCount += 1;
-  });
-
-  return Object.entries(classLocationStats)
-    .filter(([name, stats]) => stats.classCount >= 3 && name.trim() !== '')
-    .map(([classKey, stats]) => ({
-      className: classKey,
-      avgAttendance: Math.round((stats.totalAttendance / stats.classCount) * 10) / 10,
-      classCount: stats.classCount,
-      totalAttendance: stats.totalAttendance,
-      location: stats.location
-    }))
-    .filter(cls => cls.avgAttendance < threshold)
-    .sort((a, b) => a.avgAttendance - b.avgAttendance);
-}
-
 // Chart Updates - Enhanced with YoY and Multi-Category
-function updateCharts() {
-  const groupBy = safeGetElement('group_by')?.value || 'week';
-  const compareYearOverYear = safeGetElement('compare_year_over_year')?.checked || false;
-  const compareTwoYearsAgo = safeGetElement('compare_two_years_ago')?.checked || false;
+// All series come precomputed from the aggregation worker (see computeDashboardAggregates)
+function updateCharts(result) {
+  const groupBy = result.groupBy;
+  const compareTwoYearsAgo = result.yearsBack === 2;
   const selectedCategories = getSelectedCategories();
+  const hasYoY = result.hasYoY;
+  const comparisonLabel = compareTwoYearsAgo ? '2 Years Ago' : '1 Year Ago';
 
-  console.log('updateCharts:', { groupBy, compareYearOverYear, compareTwoYearsAgo, selectedCategories });
+  console.log('updateCharts:', { groupBy, hasYoY, yearsBack: result.yearsBack, selectedCategories });
 
-  const aggregated = aggregate(filteredData, groupBy);
+  const aggregated = result.current.all;
+  const selectedAggregated = result.current.selected;
+  const comparisonAggregated = result.comparison ? result.comparison.all : null;
+  const selectedComparisonAggregated = result.comparison ? result.comparison.selected : null;
 
   // Time series chart - with YoY or multi-category comparison
   if (selectedCategories.length > 1) {
     // Multi-category comparison - include YoY if enabled
-    const includeYoY = (compareYearOverYear || compareTwoYearsAgo) && getCurrentDateRange().hasSelection;
-    createMultiCategoryTimeSeries('ts_chart', selectedCategories, groupBy, includeYoY);
-  } else if ((compareYearOverYear || compareTwoYearsAgo) && getCurrentDateRange().hasSelection) {
-    // YoY comparison
-    const yearsBack = compareTwoYearsAgo ? 2 : 1;
-    const comparisonData = getComparisonData(yearsBack);
-    const comparisonAggregated = aggregate(comparisonData, groupBy);
-    const comparisonLabel = compareTwoYearsAgo ? '2 Years Ago' : '1 Year Ago';
-    
+    createMultiCategoryTimeSeries('ts_chart', selectedCategories, result.current.perCategory, result.categoryComparison);
+  } else if (hasYoY) {
     createTimeSeriesWithYoY('ts_chart', aggregated, comparisonAggregated, groupBy, comparisonLabel);
   } else {
     // Standard single time series
@@ -1399,15 +1767,8 @@ function updateCharts() {
   // Average Attendance Chart - with YoY or multi-category comparison
   if (selectedCategories.length > 1) {
     // Multi-category comparison - include YoY if enabled
-    const includeYoY = (compareYearOverYear || compareTwoYearsAgo) && getCurrentDateRange().hasSelection;
-    createMultiCategoryAvgTimeSeries('avg_attendance_chart', selectedCategories, groupBy, includeYoY);
-  } else if ((compareYearOverYear || compareTwoYearsAgo) && getCurrentDateRange().hasSelection) {
-    // YoY comparison
-    const yearsBack = compareTwoYearsAgo ? 2 : 1;
-    const comparisonData = getComparisonData(yearsBack);
-    const comparisonAggregated = aggregate(comparisonData, groupBy);
-    const comparisonLabel = compareTwoYearsAgo ? '2 Years Ago' : '1 Year Ago';
-    
+    createMultiCategoryAvgTimeSeries('avg_attendance_chart', selectedCategories, result.current.perCategory, result.categoryComparison);
+  } else if (hasYoY) {
     createAvgTimeSeriesWithYoY('avg_attendance_chart', aggregated, comparisonAggregated, groupBy, comparisonLabel);
   } else {
     // Standard single average time series
@@ -1419,18 +1780,9 @@ function updateCharts() {
     }, `Average Attendance Trends - Per Class Average Over Time (by ${groupBy})`);
   }
 
-  // Instructor charts - filter by selected categories if applicable
-  let instructorData = filteredData;
-  let instructorComparisonData = null;
-  
-  if (selectedCategories.length > 0) {
-    // Filter instructor data by selected categories
-    instructorData = filteredData.filter(r => selectedCategories.includes(r.greatgrandparent_category));
-  }
-  
-  const instructorAggregated = aggregate(instructorData, groupBy);
-  const topInstructors = instructorAggregated.instr_names?.slice(0, 10).reverse() || [];
-  const topInstructorVals = instructorAggregated.instr_vals?.slice(0, 10).reverse() || [];
+  // Instructor charts - restricted to selected categories if applicable
+  const topInstructors = selectedAggregated.instr_names?.slice(0, 10).reverse() || [];
+  const topInstructorVals = selectedAggregated.instr_vals?.slice(0, 10).reverse() || [];
 
   createBarChart('bar_chart', {
     labels: topInstructors,
@@ -1439,20 +1791,9 @@ function updateCharts() {
 
   // Side-by-side YoY comparison for instructors
   const instructorCompareElement = safeGetElement('instructor_pie_chart');
-  if ((compareYearOverYear || compareTwoYearsAgo) && getCurrentDateRange().hasSelection) {
-    const yearsBack = compareTwoYearsAgo ? 2 : 1;
-    let comparisonData = getComparisonData(yearsBack);
-    
-    // Filter comparison data by selected categories too
-    if (selectedCategories.length > 0) {
-      comparisonData = comparisonData.filter(r => selectedCategories.includes(r.greatgrandparent_category));
-    }
-    
-    const comparisonAggregated = aggregate(comparisonData, groupBy);
-    const comparisonLabel = compareTwoYearsAgo ? '2 Years Ago' : '1 Year Ago';
-    
-    const comparisonInstructors = comparisonAggregated.instr_names?.slice(0, 10).reverse() || [];
-    const comparisonInstructorVals = comparisonAggregated.instr_vals?.slice(0, 10).reverse() || [];
+  if (hasYoY) {
+    const comparisonInstructors = selectedComparisonAggregated.instr_names?.slice(0, 10).reverse() || [];
+    const comparisonInstructorVals = selectedComparisonAggregated.instr_vals?.slice(0, 10).reverse() || [];
     
     createSideBySideBarCharts('instructor_pie_chart', 
       { labels: topInstructors, values: topInstructorVals, title: 'Current Period' },
@@ -1465,7 +1806,7 @@ function updateCharts() {
     }
   }
 
-  const lowPerforming = getLowPerformingInstructors(4);
+  const lowPerforming = aggregated.lowPerformingInstructors;
   if (lowPerforming.length > 0) {
     createBarChart('low_performing_chart', {
       labels: lowPerforming.slice(0, 10).map(i => i.instructor),
@@ -1478,15 +1819,8 @@ function updateCharts() {
     }
   }
 
-  // Class charts - filter by selected categories if applicable
-  let classData = filteredData;
-  
-  if (selectedCategories.length > 0) {
-    // Filter class data by selected categories
-    classData = filteredData.filter(r => selectedCategories.includes(r.greatgrandparent_category));
-  }
-  
-  const topClasses = getTopPerformingClasses(10, classData);
+  // Class charts - restricted to selected categories if applicable
+  const topClasses = selectedAggregated.topClasses;
   if (topClasses.length > 0) {
     createBarChart('top_classes_chart', {
       labels: topClasses.map(cls => cls.className).slice(0, 10),
@@ -1495,17 +1829,8 @@ function updateCharts() {
 
     // Side-by-side YoY comparison for classes
     const classCompareElement = safeGetElement('class_pie_chart');
-    if ((compareYearOverYear || compareTwoYearsAgo) && getCurrentDateRange().hasSelection) {
-      const yearsBack = compareTwoYearsAgo ? 2 : 1;
-      let comparisonData = getComparisonData(yearsBack);
-      
-      // Filter comparison data by selected categories too
-      if (selectedCategories.length > 0) {
-        comparisonData = comparisonData.filter(r => selectedCategories.includes(r.greatgrandparent_category));
-      }
-      
-      const comparisonTopClasses = getTopPerformingClassesFromData(comparisonData, 10);
-      const comparisonLabel = compareTwoYearsAgo ? '2 Years Ago' : '1 Year Ago';
+    if (hasYoY) {
+      const comparisonTopClasses = selectedComparisonAggregated.topClasses;
       
       createSideBySideBarCharts('class_pie_chart',
         { labels: topClasses.map(cls => cls.className).slice(0, 10), values: topClasses.map(cls => cls.avgAttendance).slice(0, 10), title: 'Current Period' },
@@ -1519,7 +1844,7 @@ function updateCharts() {
     }
   }
 
-  const lowPerformingClasses = getLowPerformingClasses(3, classData);
+  const lowPerformingClasses = selectedAggregated.lowClasses;
   if (lowPerformingClasses.length > 0) {
     createBarChart('low_performing_classes_chart', {
       labels: lowPerformingClasses.map(cls => cls.className).slice(0, 10),
@@ -1532,38 +1857,18 @@ function updateCharts() {
     }
   }
 
-  // Facility charts - filter by selected categories if applicable
-  let facilityData = filteredData;
-  
-  if (selectedCategories.length > 0) {
-    // Filter facility data by selected categories
-    facilityData = filteredData.filter(r => selectedCategories.includes(r.greatgrandparent_category));
-  }
-  
-  const facilityAggregated = aggregate(facilityData, groupBy);
-  
+  // Facility charts - restricted to selected categories if applicable
   createBarChart('fac_chart', {
-    labels: facilityAggregated.fac_names.slice(0, 10),
-    values: facilityAggregated.fac_vals.slice(0, 10)
+    labels: selectedAggregated.fac_names.slice(0, 10),
+    values: selectedAggregated.fac_vals.slice(0, 10)
   }, 'Facility Performance (Total Attendees)', 'facility');
 
   // Side-by-side YoY comparison for facilities
   const facilityCompareElement = safeGetElement('facility_pie_chart');
-  if ((compareYearOverYear || compareTwoYearsAgo) && getCurrentDateRange().hasSelection) {
-    const yearsBack = compareTwoYearsAgo ? 2 : 1;
-    let comparisonData = getComparisonData(yearsBack);
-    
-    // Filter comparison data by selected categories too
-    if (selectedCategories.length > 0) {
-      comparisonData = comparisonData.filter(r => selectedCategories.includes(r.greatgrandparent_category));
-    }
-    
-    const comparisonAggregated = aggregate(comparisonData, groupBy);
-    const comparisonLabel = compareTwoYearsAgo ? '2 Years Ago' : '1 Year Ago';
-    
+  if (hasYoY) {
     createSideBySideBarCharts('facility_pie_chart',
-      { labels: facilityAggregated.fac_names.slice(0, 10), values: facilityAggregated.fac_vals.slice(0, 10), title: 'Current Period' },
-      { labels: comparisonAggregated.fac_names.slice(0, 10), values: comparisonAggregated.fac_vals.slice(0, 10), title: comparisonLabel },
+      { labels: selectedAggregated.fac_names.slice(0, 10), values: selectedAggregated.fac_vals.slice(0, 10), title: 'Current Period' },
+      { labels: selectedComparisonAggregated.fac_names.slice(0, 10), values: selectedComparisonAggregated.fac_vals.slice(0, 10), title: comparisonLabel },
       'Facilities Comparison (Total Attendees)'
     );
   } else {
@@ -1573,64 +1878,29 @@ function updateCharts() {
   }
 
   createBarChart('fac_avg_chart', {
-    labels: facilityAggregated.fac_names.slice(0, 10),
-    values: facilityAggregated.fac_avg.slice(0, 10)
+    labels: selectedAggregated.fac_names.slice(0, 10),
+    values: selectedAggregated.fac_avg.slice(0, 10)
   }, 'Facility Performance (Avg Attendance)', 'facility');
 
   // Category pie chart - with YoY comparison if enabled
-  createCategoryPieChart();
+  createCategoryPieChart(result);
 }
 
 // Category pie chart with YoY comparison
-function createCategoryPieChart() {
-  const compareYearOverYear = safeGetElement('compare_year_over_year')?.checked || false;
-  const compareTwoYearsAgo = safeGetElement('compare_two_years_ago')?.checked || false;
-  const hasYoYEnabled = (compareYearOverYear || compareTwoYearsAgo) && getCurrentDateRange().hasSelection;
-
-  let categoryStats = {};
-  let chartTitle = 'Participant Distribution by Program Subcategory';
-
-  filteredData.forEach(r => {
-    // Use parent_category for specific class types (e.g., Vinyasa), fall back to broader categories if not available
-    const category = r['parent_category'] || r['grandparent_category'] || r['greatgrandparent_category'] || 'Unknown';
-    const attendees = parseInt(r['total_attendees']) || 0;
+function createCategoryPieChart(result) {
+  const chartTitle = 'Participant Distribution by Program Subcategory';
 
-    if (!categoryStats[category]) {
-      categoryStats[category] = 0;
-    }
-    categoryStats[category] += attendees;
-  });
-
-  const categoryData = Object.entries(categoryStats)
+  const categoryData = Object.entries(result.current.all.subcategoryStats)
     .map(([category, participants]) => ({ category, participants }))
     .sort((a, b) => b.participants - a.participants);
 
-  // Get comparison data if YoY is enabled
+  // Comparison is restricted to the selected categories, like the other YoY charts
   let comparisonCategoryData = null;
   let comparisonLabel = '';
   
-  if (hasYoYEnabled) {
-    const yearsBack = compareTwoYearsAgo ? 2 : 1;
-    let comparisonData = getComparisonData(yearsBack);
-    comparisonLabel = compareTwoYearsAgo ? '2 Years Ago' : '1 Year Ago';
-    
-    // Filter comparison data by selected categories
-    const selectedCategories = getSelectedCategories();
-    if (selectedCategories.length > 0) {
-      comparisonData = comparisonData.filter(r => selectedCategories.includes(r.greatgrandparent_category));
-    }
-    
-    const comparisonCategoryStats = {};
-    comparisonData.forEach(r => {
-      const category = r['parent_category'] || r['grandparent_category'] || r['greatgrandparent_category'] || 'Unknown';
-      const attendees = parseInt(r['total_attendees']) || 0;
-
-      if (!comparisonCategoryStats[category]) {
-        comparisonCategoryStats[category] = 0;
-      }
-      comparisonCategoryStats[category] += attendees;
-    });
-
+  if (result.hasYoY) {
+    const comparisonCategoryStats = result.comparison.selected.subcategoryStats;
+    comparisonLabel = result.yearsBack === 2 ? '2 Years Ago' : '1 Year Ago';
     comparisonCategoryData = {
       labels: Object.keys(comparisonCategoryStats),
       values: Object.values(comparisonCategoryStats)
@@ -1650,12 +1920,26 @@ function createCategoryPieChart() {
   }
 }
 
-// Main dashboard update function
+// Main dashboard update function - one worker round-trip per change
 function updateDashboard() {
-  console.log('Updating dashboard with', filteredData.length, 'records');
-  updateKPIs();
-  updateCharts();
-  generateInsights();
+  const requestId = ++dashboardRequestId;
+
+  return aggregationEngine.compute(buildAggregationRequest())
+    .then(result => {
+      // A newer filter change is already in flight
+      if (requestId !== dashboardRequestId) return null;
+
+      console.log('Updating dashboard with', result.current.all.rowCount, 'records');
+      updateKPIs(result);
+      updateCharts(result);
+      generateInsights(result);
+      return result;
+    })
+    .catch(error => {
+      console.error('Dashboard update error:', error);
+      showError(`Failed to update dashboard: ${error.message}`);
+      return null;
+    });
 }
 
 // Filter functions
@@ -1668,32 +1952,20 @@ function applyFilters() {
   const facilityToggles = document.querySelectorAll('.facility-toggle input[type="checkbox"]:checked');
   const selectedFacilities = Array.from(facilityToggles).map(checkbox => checkbox.value);
 
-  filteredData = globalData.filter(row => {
-    let keep = true;
-
-    if (dateFrom || dateTo) {
-      const rowDate = parseDate(row['class_date']);
-      if (dateFrom && rowDate < dateFrom) keep = false;
-      if (dateTo && rowDate > dateTo) keep = false;
-    }
-
-    if (instructor && row['instructor_name'] !== instructor) keep = false;
-
-    if (selectedFacilities.length > 0 && !selectedFacilities.includes(row['facility'])) keep = false;
-
-    // NEW: Multi-category filter
-    if (selectedCategories.length > 0 && !selectedCategories.includes(row['greatgrandparent_category'])) {
-      keep = false;
-    }
+  appliedFilters = {
+    dateFrom: dateFrom || '',
+    dateTo: dateTo || '',
+    instructor: instructor || '',
+    facilities: selectedFacilities,
+    categories: selectedCategories  // Multi-category filter
+  };
 
-    return keep;
+  updateDashboard().then(result => {
+    if (!result) return;
+    const facilityText = selectedFacilities.length > 0 ? ` (${selectedFacilities.length} facilities)` : '';
+    const categoryText = selectedCategories.length > 0 ? ` (${selectedCategories.length} categories)` : '';
+    showSuccess(`Filtered to ${result.current.all.rowCount} records${facilityText}${categoryText}`);
   });
-
-  updateDashboard();
-
-  const facilityText = selectedFacilities.length > 0 ? ` (${selectedFacilities.length} facilities)` : '';
-  const categoryText = selectedCategories.length > 0 ? ` (${selectedCategories.length} categories)` : '';
-  showSuccess(`Filtered to ${filteredData.length} records${facilityText}${categoryText}`);
 }
 
 function resetFilters() {
@@ -1718,16 +1990,15 @@ function resetFilters() {
   const compareTwoToggle = safeGetElement('compare_two_years_ago');
   if (compareTwoToggle) compareTwoToggle.checked = false;
 
-  filteredData = [...globalData];
-  updateDashboard();
-  showSuccess('Filters reset');
+  appliedFilters = emptyFilters();
+  updateDashboard().then(result => {
+    if (result) showSuccess('Filters reset');
+  });
 }
 
 // Dashboard initialization
 function initializeDashboard() {
-  const instructors = uniqueSorted(globalData.map(r => r['instructor_name']).filter(Boolean));
-  const facilities = uniqueSorted(globalData.map(r => r['facility']).filter(Boolean));
-  const categories = uniqueSorted(globalData.map(r => r['greatgrandparent_category']).filter(Boolean));
+  const { instructors, facilities, categories, firstDate, lastDate } = dashboardSummary;
 
   console.log('Available categories:', categories);
 
@@ -1739,14 +2010,13 @@ function initializeDashboard() {
   populateSelect('category_compare_2', categories);
   populateSelect('category_compare_3', categories);
 
-  const dates = globalData.map(r => parseDate(r['class_date'])).filter(Boolean).sort();
-  console.log('Available date range:', dates.length > 0 ? `${dates[0]} to ${dates[dates.length - 1]}` : 'No dates');
+  console.log('Available date range:', lastDate ? `${firstDate} to ${lastDate}` : 'No dates');
 
-  if (dates.length > 0) {
+  if (lastDate) {
     const dateFromEl = safeGetElement('date_from');
     const dateToEl = safeGetElement('date_to');
     if (dateFromEl && dateToEl) {
-      const latestDate = new Date(dates[dates.length - 1]);
+      const latestDate = new Date(lastDate);
       const mostRecentFullMonth = new Date(latestDate.getFullYear(), latestDate.getMonth(), 1);
       const mostRecentFullMonthEnd = new Date(latestDate.getFullYear(), latestDate.getMonth() + 1, 0);
 
@@ -1819,6 +2089,37 @@ function populateFacilityToggles(facilities) {
   });
 }
 
+// Pick up instructors, facilities and categories that arrived with a data update,
+// keeping whatever the user has selected
+function refreshFilterOptions() {
+  const { instructors, facilities, categories } = dashboardSummary;
+
+  const refreshSelect = (elementId, options) => {
+    const select = safeGetElement(elementId);
+    if (!select) return;
+    const selected = select.value;
+    populateSelect(elementId, options);
+    select.value = options.includes(selected) ? selected : '';
+  };
+  refreshSelect('instr_select', instructors);
+  refreshSelect('category_compare_1', categories);
+  refreshSelect('category_compare_2', categories);
+  refreshSelect('category_compare_3', categories);
+
+  // Facilities that are new to the dataset start selected, like on first load
+  const toggles = Array.from(document.querySelectorAll('.facility-toggle input[type="checkbox"]'));
+  const known = new Set(toggles.map(checkbox => checkbox.value));
+  const checked = new Set(toggles.filter(checkbox => checkbox.checked).map(checkbox => checkbox.value));
+
+  populateFacilityToggles(facilities);
+  document.querySelectorAll('.facility-toggle').forEach(toggle => {
+    const checkbox = toggle.querySelector('input[type="checkbox"]');
+    if (!checkbox) return;
+    checkbox.checked = checked.has(checkbox.value) || !known.has(checkbox.value);
+    toggle.classList.toggle('selected', checkbox.checked);
+  });
+}
+
 // NEW: Collapsible sections
 function initializeCollapsibleSections() {
   console.log('Initializing collapsible sections...');
@@ -1884,31 +2185,23 @@ function initializeCollapsibleSections() {
 }
 
 // AI Insights
-function generateInsights() {
-  const totalAttendees = filteredData.reduce((sum, r) => sum + (parseInt(r['total_attendees']) || 0), 0);
-  const totalBookings = filteredData.reduce((sum, r) => sum + (parseInt(r['total_bookings']) || 0), 0);
+function generateInsights(result) {
+  const current = result.current.all;
+  const totalAttendees = current.kpis.total_attendees;
+  const totalBookings = current.kpis.total_bookings;
   const showRate = totalBookings > 0 ? ((totalAttendees / totalBookings) * 100).toFixed(1) : 0;
 
-  const categories = uniqueSorted(filteredData.map(r => r['greatgrandparent_category']).filter(Boolean));
-  const topCategory = categories.length > 0 ?
-    Object.entries(
-      filteredData.reduce((acc, r) => {
-        const cat = r['greatgrandparent_category'];
-        if (cat) acc[cat] = (acc[cat] || 0) + (parseInt(r['total_attendees']) || 0);
-        return acc;
-      }, {})
-    ).sort((a, b) => b[1] - a[1])[0] : null;
-
-  const lowPerforming = getLowPerformingInstructors(4);
+  const { categoryCount, topCategory, uniqueCustomers, activeFacilities, completeRecords } = current.insights;
+  const lowPerforming = current.lowPerformingInstructors;
 
   const insights = [
-    `📊 Analyzing ${filteredData.length} classes across ${categories.length} great grandparent categories`,
-    `👥 ${new Set(filteredData.map(r => r.guid)).size.toLocaleString()} unique customers participated`,
-    `🏢 ${new Set(filteredData.map(r => r.facility)).size} facilities are active`,
+    `📊 Analyzing ${current.rowCount} classes across ${categoryCount} great grandparent categories`,
+    `👥 ${uniqueCustomers.toLocaleString()} unique customers participated`,
+    `🏢 ${activeFacilities} facilities are active`,
     `📈 Show rate: ${showRate}% (${totalAttendees.toLocaleString()} attended vs ${totalBookings.toLocaleString()} booked)`,
     topCategory ? `🎯 Top category: ${topCategory[0]} with ${topCategory[1].toLocaleString()} total attendees` : null,
     lowPerforming.length > 0 ? `⚠️ ${lowPerforming.length} instructors averaging ≤4 attendees per class` : `✅ No instructors averaging ≤4 attendees per class`,
-    `🔍 Data completeness: ${filteredData.filter(r => r.total_attendees && r.class_date).length}/${filteredData.length} records have complete data`
+    `🔍 Data completeness: ${completeRecords}/${current.rowCount} records have complete data`
   ].filter(Boolean);
 
   const insightsContainer = safeGetElement('ai_insights');
@@ -1923,22 +2216,27 @@ function exportToCsv() {
     alert('CSV export requires Papa Parse library');
     return;
   }
-  const csv = Papa.unparse(filteredData);
-  const blob = new Blob([csv], { type: 'text/csv' });
-  const url = window.URL.createObjectURL(blob);
-  const a = document.createElement('a');
-  a.href = url;
-  a.download = `front_dashboard_data_${new Date().toISOString().split('T')[0]}.csv`;
-  a.click();
+  aggregationEngine.filteredRows(appliedFilters).then(rows => {
+    const csv = Papa.unparse(rows);
+    const blob = new Blob([csv], { type: 'text/csv' });
+    const url = window.URL.createObjectURL(blob);
+    const a = document.createElement('a');
+    a.href = url;
+    a.download = `front_dashboard_data_${new Date().toISOString().split('T')[0]}.csv`;
+    a.click();
 
-  setTimeout(() => window.URL.revokeObjectURL(url), 100);
+    setTimeout(() => window.URL.revokeObjectURL(url), 100);
 
-  showSuccess(`Exported ${filteredData.length} records to CSV`);
+    showSuccess(`Exported ${rows.length} records to CSV`);
+  }).catch(error => {
+    console.error('CSV export error:', error);
+    showError('Failed to export CSV data');
+  });
 }
 
 function exportToJson() {
-  try {
-    const json = JSON.stringify(filteredData, null, 2);
+  aggregationEngine.filteredRows(appliedFilters).then(rows => {
+    const json = JSON.stringify(rows, null, 2);
     const blob = new Blob([json], { type: 'application/json' });
     const url = window.URL.createObjectURL(blob);
     const a = document.createElement('a');
@@ -1948,11 +2246,11 @@ function exportToJson() {
 
     setTimeout(() => window.URL.revokeObjectURL(url), 100);
 
-    showSuccess(`Exported ${filteredData.length} records to JSON`);
-  } catch (error) {
+    showSuccess(`Exported ${rows.length} records to JSON`);
+  }).catch(error => {
     console.error('JSON export error:', error);
     showError('Failed to export JSON data');
-  }
+  });
 }
 
 // Safe event listener attachment
@@ -1975,6 +2273,9 @@ function checkAdminAccess() {
     if (exportJsonBtn) exportJsonBtn.style.display = 'none';
     console.log('📊 Standard access - Export features disabled');
   } else {
+    // Access can be granted after load when the component reports it
+    if (exportCsvBtn) exportCsvBtn.style.display = '';
+    if (exportJsonBtn) exportJsonBtn.style.display = '';
     console.log('🔑 Admin access - All features enabled');
   }
 }
@@ -1995,8 +2296,7 @@ document.addEventListener('DOMContentLoaded', function() {
     if (this.checked && twoYearToggle) {
       twoYearToggle.checked = false;
     }
-    updateKPIs();
-    updateCharts();
+    updateDashboard();
   });
 
   addEventListenerSafe('compare_two_years_ago', 'change', function() {
@@ -2005,8 +2305,7 @@ document.addEventListener('DOMContentLoaded', function() {
     if (this.checked && oneYearToggle) {
       oneYearToggle.checked = false;
     }
-    updateKPIs();
-    updateCharts();
+    updateDashboard();
   });
 
   // Export controls
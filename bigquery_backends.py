@@ -0,0 +1,207 @@
+"""
+Query backends for the Scoreboard BigQuery client.
+
+BigQueryClient builds the SQL; a backend runs it. Besides the live
+BigQuery backend there is a recorder that saves real results and table
+metadata to local files, and a replayer that serves them back with
+configurable latency, page size and failure injection, so fetch, caching
+and fallback behaviour can be measured offline without credentials.
+
+Recording layout:
+    recordings/
+        queries/<sha256>.json       # query text, parameters and result rows
+        tables/<full_name>.json     # table metadata (rows, bytes, modified, schema)
+"""
+
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+
+class InjectedFailure(RuntimeError):
+    """Raised by ReplayBackend when failure injection fires."""
+
+
+class ReplayMiss(LookupError):
+    """Raised by ReplayBackend when a query or table was never recorded."""
+
+
+def query_key(query: str, params: Optional[Dict[str, date]] = None) -> str:
+    """Stable recording key for a query and its parameters."""
+    normalized = re.sub(r"\s+", " ", query).strip()
+    param_text = json.dumps({k: str(v) for k, v in (params or {}).items()}, sort_keys=True)
+    return hashlib.sha256(f"{normalized}\n{param_text}".encode("utf-8")).hexdigest()
+
+
+def _jsonable(value):
+    """Make a BigQuery cell value JSON-serializable the way the client would render it."""
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    return str(value)
+
+
+class QueryBackend(ABC):
+    """Interface BigQueryClient uses to run queries and read table metadata."""
+
+    @abstractmethod
+    def query(self, query: str, params: Optional[Dict[str, date]] = None) -> Iterator[Dict[str, Any]]:
+        """Run a query and yield result rows as dicts."""
+
+    @abstractmethod
+    def get_table(self, full_name: str) -> Dict[str, Any]:
+        """Return num_rows, num_bytes, modified (ISO string) and schema for a table."""
+
+
+class LiveBackend(QueryBackend):
+    """Runs queries against BigQuery with google-cloud-bigquery."""
+
+    def __init__(self, project_id: str, credentials_dict: Optional[Dict] = None,
+                 credentials_path: Optional[str] = None):
+        from lazy_imports import load
+        bigquery = load("google.cloud.bigquery")
+        service_account = load("google.oauth2.service_account")
+
+        self._bigquery = bigquery
+        if credentials_dict:
+            # From Streamlit secrets (production)
+            credentials = service_account.Credentials.from_service_account_info(credentials_dict)
+            self.client = bigquery.Client(credentials=credentials, project=project_id)
+        elif credentials_path:
+            # From file (local development)
+            credentials = service_account.Credentials.from_service_account_file(credentials_path)
+            self.client = bigquery.Client(credentials=credentials, project=project_id)
+        else:
+            # Try default credentials (GCP environment)
+            self.client = bigquery.Client(project=project_id)
+
+    def query(self, query: str, params: Optional[Dict[str, date]] = None) -> Iterator[Dict[str, Any]]:
+        job_config = None
+        if params:
+            job_config = self._bigquery.QueryJobConfig(query_parameters=[
+                self._bigquery.ScalarQueryParameter(name, "DATE", value)
+                for name, value in params.items()
+            ])
+        for row in self.client.query(query, job_config=job_config).result():
+            yield dict(row)
+
+    def get_table(self, full_name: str) -> Dict[str, Any]:
+        table = self.client.get_table(full_name)
+        return {
+            "num_rows": table.num_rows,
+            "num_bytes": table.num_bytes,
+            "modified": table.modified.isoformat() if table.modified else None,
+            "schema": [{"name": f.name, "type": f.field_type} for f in table.schema],
+        }
+
+
+class RecordingBackend(QueryBackend):
+    """Passes queries through to another backend and saves every result."""
+
+    def __init__(self, inner: QueryBackend, directory: str):
+        self.inner = inner
+        self.directory = Path(directory)
+        (self.directory / "queries").mkdir(parents=True, exist_ok=True)
+        (self.directory / "tables").mkdir(parents=True, exist_ok=True)
+
+    def query(self, query: str, params: Optional[Dict[str, date]] = None) -> Iterator[Dict[str, Any]]:
+        rows = [{k: _jsonable(v) for k, v in row.items()} for row in self.inner.query(query, params)]
+        self._write(self.directory / "queries" / f"{query_key(query, params)}.json", {
+            "query": query,
+            "params": {k: str(v) for k, v in (params or {}).items()},
+            "rows": rows,
+        })
+        return iter(rows)
+
+    def get_table(self, full_name: str) -> Dict[str, Any]:
+        info = self.inner.get_table(full_name)
+        self._write(self.directory / "tables" / f"{full_name}.json", info)
+        return info
+
+    @staticmethod
+    def _write(path: Path, payload: Dict[str, Any]):
+        tmp_path = path.with_name(f".{path.name}.{threading.get_ident()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, default=str)
+        tmp_path.replace(path)
+
+
+class ReplayBackend(QueryBackend):
+    """Serves recorded results offline with simulated latency and failures."""
+
+    def __init__(self, directory: str, latency: float = 0.0, page_size: Optional[int] = None,
+                 page_latency: float = 0.0, failure_rate: float = 0.0, seed: Optional[int] = None):
+        """
+        Initialize replay backend.
+
+        Args:
+            directory: Recording directory written by RecordingBackend
+            latency: Seconds to wait before the first row of every query or table lookup
+            page_size: Rows per simulated result page (None = one page)
+            page_latency: Seconds to wait before each page after the first
+            failure_rate: Probability (0-1) that a query or table lookup raises InjectedFailure
+            seed: Random seed for reproducible failure injection
+        """
+        self.directory = Path(directory)
+        self.latency = latency
+        self.page_size = page_size
+        self.page_latency = page_latency
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._stats = {"queries": 0, "pages": 0, "rows": 0, "tables": 0, "failures": 0, "misses": 0}
+
+    def query(self, query: str, params: Optional[Dict[str, date]] = None) -> Iterator[Dict[str, Any]]:
+        path = self.directory / "queries" / f"{query_key(query, params)}.json"
+        self._begin("queries", path)
+        with open(path, 'r', encoding='utf-8') as f:
+            rows = json.load(f)["rows"]
+        return self._pages(rows)
+
+    def get_table(self, full_name: str) -> Dict[str, Any]:
+        path = self.directory / "tables" / f"{full_name}.json"
+        self._begin("tables", path)
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def stats(self) -> Dict[str, int]:
+        """Counters: queries, pages, rows, tables, failures and misses."""
+        with self._lock:
+            return dict(self._stats)
+
+    def _begin(self, kind: str, path: Path):
+        """Apply latency and failure injection, then check the recording exists."""
+        with self._lock:
+            self._stats[kind] += 1
+            fail = self.failure_rate > 0 and self._random.random() < self.failure_rate
+            if fail:
+                self._stats["failures"] += 1
+            elif not path.exists():
+                self._stats["misses"] += 1
+
+        if self.latency:
+            time.sleep(self.latency)
+        if fail:
+            raise InjectedFailure(f"Injected failure replaying {path.name}")
+        if not path.exists():
+            raise ReplayMiss(f"No recording for {path.name} in {self.directory}")
+
+    def _pages(self, rows: List[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Yield rows in pages, sleeping between pages like a paged result."""
+        page_size = self.page_size or max(len(rows), 1)
+        for start in range(0, len(rows), page_size):
+            if start and self.page_latency:
+                time.sleep(self.page_latency)
+            page = rows[start:start + page_size]
+            with self._lock:
+                self._stats["pages"] += 1
+                self._stats["rows"] += len(page)
+            yield from page
@@ -6,11 +6,37 @@ Primary table: analytics_raw.instructor_view
 Future expansion: participant_view, check_ins_all
 """
 
-from google.cloud import bigquery
-from google.oauth2 import service_account
 import json
-from datetime import datetime
-from typing import Optional, Dict, List, Any
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime
+from typing import Optional, Dict, List, Any, Callable, Tuple
+
+from bigquery_backends import QueryBackend, LiveBackend, RecordingBackend, ReplayBackend
+
+
+def month_shards(start_date: str, end_date: str) -> List[Tuple[str, str, str]]:
+    """
+    Split [start_date, end_date) into calendar-month shards.
+
+    Returns:
+        List of (shard_name, shard_start, shard_end) with ISO dates; the end is exclusive.
+    """
+    start = date.fromisoformat(start_date)
+    end = date.fromisoformat(end_date)
+
+    shards = []
+    current = start
+    while current < end:
+        if current.month == 12:
+            next_month = date(current.year + 1, 1, 1)
+        else:
+            next_month = date(current.year, current.month + 1, 1)
+        shard_end = min(next_month, end)
+        shards.append((current.strftime("%Y-%m"), current.isoformat(), shard_end.isoformat()))
+        current = shard_end
+
+    return shards
 
 
 class BigQueryClient:
@@ -20,51 +46,56 @@ class BigQueryClient:
     TABLES = {
         "instructor_view": {
             "full_name": "front-data-production.analytics_raw.instructor_view",
+            "date_column": "class_date",
             "description": "Class sessions with aggregated bookings/attendees",
         },
         "participant_view": {
             "full_name": "front-data-production.analytics_raw.participant_view",
+            "date_column": "class_date",
             "description": "Individual participants in each class",
         },
         "check_ins_all": {
             "full_name": "front-data-production.analytics_raw.check_ins_all",
+            "date_column": "checkin_date",
             "description": "All facility check-ins",
         },
     }
 
-    def __init__(self, credentials_dict: Optional[Dict] = None, credentials_path: Optional[str] = None):
+    def __init__(self, credentials_dict: Optional[Dict] = None, credentials_path: Optional[str] = None,
+                 backend: Optional[QueryBackend] = None):
         """
         Initialize BigQuery client.
 
         Args:
             credentials_dict: Service account credentials as dictionary (from Streamlit secrets)
             credentials_path: Path to service account JSON file (for local development)
+            backend: Query backend to use instead of live BigQuery (record/replay)
         """
-        self.client = None
         self.project_id = "front-data-production"
 
-        if credentials_dict:
-            # From Streamlit secrets (production)
-            credentials = service_account.Credentials.from_service_account_info(credentials_dict)
-            self.client = bigquery.Client(credentials=credentials, project=self.project_id)
-        elif credentials_path:
-            # From file (local development)
-            credentials = service_account.Credentials.from_service_account_file(credentials_path)
-            self.client = bigquery.Client(credentials=credentials, project=self.project_id)
-        else:
-            # Try default credentials (GCP environment)
-            self.client = bigquery.Client(project=self.project_id)
+        if backend is None:
+            backend = LiveBackend(self.project_id, credentials_dict=credentials_dict,
+                                  credentials_path=credentials_path)
+        self.backend = backend
+        self.client = getattr(backend, 'client', None)
 
-    def fetch_instructor_view(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    def fetch_instructor_view(self, limit: Optional[int] = None, start_date: Optional[str] = None,
+                              end_date: Optional[str] = None) -> List[Dict[str, Any]]:
         """
         Fetch class data from instructor_view table.
         This matches the current dashboard data structure exactly.
 
+        Args:
+            limit: Optional row limit
+            start_date: Optional ISO date lower bound (inclusive)
+            end_date: Optional ISO date upper bound (exclusive)
+
         Returns:
             List of records with: facility, class_name, class_date, class_end_date,
             total_bookings, total_attendees, parent_category, grandparent_category,
             greatgrandparent_category, instructor_name, instructor_id, guid, session_guid
         """
+        where, params = self._date_filter("instructor_view", start_date, end_date)
         query = f"""
         SELECT
             facility,
@@ -82,21 +113,29 @@ class BigQueryClient:
             guid,
             session_guid
         FROM `{self.TABLES['instructor_view']['full_name']}`
+        {where}
         ORDER BY class_date DESC
         """
 
         if limit:
             query += f" LIMIT {limit}"
 
-        return self._execute_query(query)
+        return self._execute_query(query, params)
 
-    def fetch_participant_view(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    def fetch_participant_view(self, limit: Optional[int] = None, start_date: Optional[str] = None,
+                               end_date: Optional[str] = None) -> List[Dict[str, Any]]:
         """
         Fetch participant data for future expansion.
 
+        Args:
+            limit: Optional row limit
+            start_date: Optional ISO date lower bound (inclusive)
+            end_date: Optional ISO date upper bound (exclusive)
+
         Returns:
             List of individual participant records.
         """
+        where, params = self._date_filter("participant_view", start_date, end_date)
         query = f"""
         SELECT
             guid,
@@ -117,21 +156,29 @@ class BigQueryClient:
             customer_type,
             member_type
         FROM `{self.TABLES['participant_view']['full_name']}`
+        {where}
         ORDER BY class_date DESC
         """
 
         if limit:
             query += f" LIMIT {limit}"
 
-        return self._execute_query(query)
+        return self._execute_query(query, params)
 
-    def fetch_checkins(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    def fetch_checkins(self, limit: Optional[int] = None, start_date: Optional[str] = None,
+                       end_date: Optional[str] = None) -> List[Dict[str, Any]]:
         """
         Fetch facility check-ins for future expansion.
 
+        Args:
+            limit: Optional row limit
+            start_date: Optional ISO date lower bound (inclusive)
+            end_date: Optional ISO date upper bound (exclusive)
+
         Returns:
             List of check-in records.
         """
+        where, params = self._date_filter("check_ins_all", start_date, end_date)
         query = f"""
         SELECT
             customer_name,
@@ -150,13 +197,14 @@ class BigQueryClient:
             event_session_guid,
             event_title
         FROM `{self.TABLES['check_ins_all']['full_name']}`
+        {where}
         ORDER BY checkin_date DESC
         """
 
         if limit:
             query += f" LIMIT {limit}"
 
-        return self._execute_query(query)
+        return self._execute_query(query, params)
 
     def get_table_info(self, table_key: str) -> Dict[str, Any]:
         """Get metadata about a table."""
@@ -164,22 +212,121 @@ class BigQueryClient:
             raise ValueError(f"Unknown table: {table_key}")
 
         table_ref = self.TABLES[table_key]['full_name']
-        table = self.client.get_table(table_ref)
+        table = self.backend.get_table(table_ref)
 
         return {
             "name": table_key,
             "full_name": table_ref,
             "description": self.TABLES[table_key]['description'],
-            "num_rows": table.num_rows,
-            "num_bytes": table.num_bytes,
-            "modified": table.modified.isoformat() if table.modified else None,
-            "schema": [{"name": f.name, "type": f.field_type} for f in table.schema]
+            "num_rows": table["num_rows"],
+            "num_bytes": table["num_bytes"],
+            "modified": table["modified"],
+            "schema": table["schema"]
         }
 
-    def _execute_query(self, query: str) -> List[Dict[str, Any]]:
+    def backfill(self, table_key: str, start_date: str, end_date: str, shard_store,
+                 max_workers: int = 4, max_retries: int = 3, force: bool = False,
+                 on_shard: Optional[Callable[[str, str, Any], None]] = None) -> Dict[str, Any]:
+        """
+        Rebuild a date range of a table as parallel month shards.
+
+        Each month is fetched as its own query with bounded concurrency, retried
+        independently on failure and written to the shard store as soon as it
+        completes. Shards already stored for the same range are skipped, so an
+        interrupted backfill resumes where it stopped; the month containing today
+        is always refetched because it is still changing.
+
+        Args:
+            table_key: Key into TABLES (instructor_view, participant_view, check_ins_all)
+            start_date: ISO date lower bound (inclusive)
+            end_date: ISO date upper bound (exclusive)
+            shard_store: SnapshotStore receiving each completed shard
+            max_workers: Maximum shards queried at once
+            max_retries: Attempts per shard before it is reported as failed
+            force: Refetch shards that are already stored
+            on_shard: Optional callback(shard, status, detail) for progress reporting
+
+        Returns:
+            Summary with completed, skipped and failed shard names.
+        """
+        if table_key not in self.TABLES:
+            raise ValueError(f"Unknown table: {table_key}")
+
+        fetchers = {
+            "instructor_view": self.fetch_instructor_view,
+            "participant_view": self.fetch_participant_view,
+            "check_ins_all": self.fetch_checkins,
+        }
+        fetch = fetchers[table_key]
+        today = date.today().isoformat()
+
+        pending = []
+        skipped = []
+        for shard, shard_start, shard_end in month_shards(start_date, end_date):
+            still_open = shard_end > today
+            if not force and not still_open and shard_store.has_shard(table_key, shard, shard_start, shard_end):
+                skipped.append(shard)
+                if on_shard:
+                    on_shard(shard, "skipped", None)
+            else:
+                pending.append((shard, shard_start, shard_end))
+
+        def run_shard(shard, shard_start, shard_end):
+            for attempt in range(1, max_retries + 1):
+                try:
+                    records = fetch(start_date=shard_start, end_date=shard_end)
+                    shard_store.write_shard(table_key, shard, shard_start, shard_end, records)
+                    return len(records)
+                except Exception:
+                    if attempt == max_retries:
+                        raise
+                    time.sleep(2 ** attempt)
+
+        completed = []
+        failed = {}
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            futures = {
+                executor.submit(run_shard, shard, shard_start, shard_end): shard
+                for shard, shard_start, shard_end in pending
+            }
+            for future in as_completed(futures):
+                shard = futures[future]
+                try:
+                    row_count = future.result()
+                    completed.append(shard)
+                    if on_shard:
+                        on_shard(shard, "completed", row_count)
+                except Exception as e:
+                    failed[shard] = str(e)
+                    if on_shard:
+                        on_shard(shard, "failed", str(e))
+
+        return {
+            "table": table_key,
+            "completed": sorted(completed),
+            "skipped": skipped,
+            "failed": failed,
+        }
+
+    def _date_filter(self, table_key: str, start_date: Optional[str],
+                     end_date: Optional[str]) -> Tuple[str, Dict[str, date]]:
+        """Build a parameterized WHERE clause on the table's date column."""
+        column = self.TABLES[table_key]['date_column']
+        conditions = []
+        params = {}
+        if start_date:
+            conditions.append(f"DATE({column}) >= @start_date")
+            params["start_date"] = date.fromisoformat(start_date)
+        if end_date:
+            conditions.append(f"DATE({column}) < @end_date")
+            params["end_date"] = date.fromisoformat(end_date)
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        return where, params
+
+    def _execute_query(self, query: str, params: Optional[Dict[str, date]] = None) -> List[Dict[str, Any]]:
         """Execute a query and return results as list of dicts."""
-        query_job = self.client.query(query)
-        results = query_job.result()
+        results = self.backend.query(query, params)
 
         # Convert to list of dicts
         rows = []
@@ -252,3 +399,19 @@ def get_client_from_streamlit_secrets(secrets: Dict) -> BigQueryClient:
 def get_client_from_file(credentials_path: str) -> BigQueryClient:
     """Create BigQuery client from credentials file (local development)."""
     return BigQueryClient(credentials_path=credentials_path)
+
+
+def get_client_from_replay(recording_dir: str, **replay_options) -> BigQueryClient:
+    """
+    Create an offline BigQuery client that replays recorded results.
+
+    Args:
+        recording_dir: Directory written by a recording client
+        **replay_options: latency, page_size, page_latency, failure_rate, seed (see ReplayBackend)
+    """
+    return BigQueryClient(backend=ReplayBackend(recording_dir, **replay_options))
+
+
+def get_recording_client(client: BigQueryClient, recording_dir: str) -> BigQueryClient:
+    """Wrap a client so every query result and table lookup is saved for replay."""
+    return BigQueryClient(backend=RecordingBackend(client.backend, recording_dir))
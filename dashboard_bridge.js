@@ -0,0 +1,90 @@
+// Scoreboard component bridge
+// Runs the dashboard as a bidirectional Streamlit component (see dashboard_sync.py).
+// The page stays mounted across reruns; each render carries at most one row delta,
+// and the data version applied in the worker is reported back so the server only
+// ever sends what changed since then.
+window.scoreboardSync = true;
+
+const dashboardBridge = {
+  version: null,    // data version the worker holds
+  applying: null,   // version of the delta being applied
+  gzipFailed: false, // a gzip delta failed to apply; ask for plain JSON from now on
+  height: null,
+  isAdmin: null,
+  queue: Promise.resolve(),
+
+  post(type, fields = {}) {
+    window.parent.postMessage(Object.assign({ isStreamlitMessage: true, type }, fields), '*');
+  },
+
+  acknowledge() {
+    this.post('streamlit:setComponentValue', {
+      dataType: 'json',
+      value: {
+        shell: window.scoreboardShellId,
+        version: this.version,
+        gzip: !this.gzipFailed && typeof DecompressionStream !== 'undefined'
+      }
+    });
+  },
+
+  // The worker lost its rows: ask the server for a full reset
+  resync() {
+    this.version = null;
+    // A delta being applied fails with the worker and acknowledges on its own
+    if (this.applying === null) this.acknowledge();
+  },
+
+  onRender(args) {
+    if (args.height && args.height !== this.height) {
+      this.height = args.height;
+      this.post('streamlit:setFrameHeight', { height: args.height });
+    }
+
+    if (args.is_admin !== this.isAdmin) {
+      this.isAdmin = args.is_admin;
+      window.isAdmin = Boolean(args.is_admin);
+      if (document.readyState !== 'loading') checkAdminAccess();
+    }
+
+    if (!args.delta) {
+      // First render after (re)mount: tell the server what we hold
+      if (this.version === null && this.applying === null) this.acknowledge();
+      return;
+    }
+    // Reruns repeat the same args until our acknowledgement lands
+    if (args.version === this.version || args.version === this.applying) return;
+    if (!args.reset && args.base !== this.version) {
+      // Delta was computed against a version we do not hold; ask again
+      this.acknowledge();
+      return;
+    }
+
+    this.applying = args.version;
+    this.queue = this.queue
+      .then(() => receiveDashboardDelta(args.delta, args.encoding))
+      .then(() => {
+        this.version = args.version;
+      })
+      .catch(error => {
+        // Force a full resend (plain JSON if gzip decoding is what failed)
+        console.error('Dashboard sync error:', error);
+        this.version = null;
+        if (args.encoding === 'gzip') this.gzipFailed = true;
+      })
+      .then(() => {
+        this.applying = null;
+        this.acknowledge();
+      });
+  }
+};
+
+window.addEventListener('message', (event) => {
+  if (event.data && event.data.type === 'streamlit:render') {
+    dashboardBridge.onRender(event.data.args || {});
+  }
+});
+
+document.addEventListener('DOMContentLoaded', () => {
+  dashboardBridge.post('streamlit:componentReady', { apiVersion: 1 });
+});
@@ -0,0 +1,209 @@
+"""
+Incremental row sync for the Scoreboard dashboard component.
+
+The dashboard runs as a bidirectional Streamlit component that stays
+mounted across reruns (dashboard_bridge.js). Rather than re-embedding the
+whole dataset on every render, the server keeps the row digests of recent
+dataset versions and sends each browser only the rows added, changed or
+removed since the version it acknowledged, keyed by session_guid, as
+gzip-compressed JSON bytes.
+
+Delta payload:
+    {"reset": false,
+     "upserts": [[key, row], ...],      # new or changed rows
+     "deletes": [key, ...]}             # keys no longer present
+"""
+
+import gzip
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+COMPONENT_NAME = "scoreboard_dashboard"
+# Widget key of the mounted component; its value is the browser's acknowledgement
+DASHBOARD_COMPONENT_KEY = "scoreboard_dashboard"
+
+
+def row_digest(row: Dict[str, Any]) -> bytes:
+    """Short content hash of one record."""
+    text = json.dumps(row, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest()
+
+
+def digest_rows(records: List[Dict[str, Any]]) -> Tuple[List[str], List[bytes]]:
+    """
+    Sync keys and digests for records, in order.
+
+    The key is session_guid; records without one are keyed by their digest,
+    numbered when identical records repeat.
+    """
+    keys, digests, repeats = [], [], {}
+    for row in records:
+        digest = row_digest(row)
+        key = row.get('session_guid')
+        if not key:
+            key = f"#{digest.hex()}"
+            repeats[key] = repeats.get(key, 0) + 1
+            if repeats[key] > 1:
+                key = f"{key}.{repeats[key] - 1}"
+        keys.append(key)
+        digests.append(digest)
+    return keys, digests
+
+
+def encode_delta(delta: Dict[str, Any], compress: bool = True) -> bytes:
+    """Serialize a delta payload, gzip-compressed unless the browser cannot inflate it."""
+    data = json.dumps(delta, separators=(',', ':'), default=str).encode('utf-8')
+    return gzip.compress(data, compresslevel=6) if compress else data
+
+
+class DatasetVersions:
+    """
+    Process-wide log of recent dataset versions for computing row deltas.
+
+    Versions are content hashes, so republishing identical data never sends
+    anything. Only row digests are kept per version; row contents always
+    come from the records passed to delta().
+    """
+
+    def __init__(self, keep: int = 3, cache_size: int = 16):
+        """
+        Initialize the version log.
+
+        Args:
+            keep: Dataset versions to retain; older browsers get a full reset
+            cache_size: Encoded deltas to cache (shared by every session)
+        """
+        self.keep = keep
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+        self._versions: "OrderedDict[str, Tuple[List[str], Dict[str, bytes]]]" = OrderedDict()
+        self._fingerprints: Dict[Hashable, str] = {}
+        self._deltas: "OrderedDict[Tuple, Tuple[bytes, Dict[str, int]]]" = OrderedDict()
+
+    def register(self, records: List[Dict[str, Any]], fingerprint: Optional[Hashable] = None) -> str:
+        """
+        Record a dataset version and return its id.
+
+        Args:
+            records: Deduplicated records as shown on the dashboard
+            fingerprint: Cheap identity of the load (source, timestamp, count);
+                when it was seen before, hashing every row is skipped
+        """
+        with self._lock:
+            version = self._fingerprints.get(fingerprint) if fingerprint is not None else None
+            if version in self._versions:
+                self._versions.move_to_end(version)
+                return version
+
+        version, entry = self._digest(records)
+        self._store(version, entry, fingerprint)
+        return version
+
+    def _digest(self, records: List[Dict[str, Any]]) -> Tuple[str, Tuple[List[str], Dict[str, bytes]]]:
+        """Content version id and (keys, digest per key) of records."""
+        keys, digest_list = digest_rows(records)
+        digests = dict(zip(keys, digest_list))
+
+        content = hashlib.blake2b(digest_size=12)
+        for key in sorted(digests):
+            content.update(key.encode('utf-8'))
+            content.update(digests[key])
+        return "d" + content.hexdigest(), (keys, digests)
+
+    def _store(self, version: str, entry: Tuple[List[str], Dict[str, bytes]],
+               fingerprint: Optional[Hashable] = None):
+        """Keep a version as the most recent, evicting the oldest beyond keep."""
+        with self._lock:
+            if fingerprint is not None:
+                self._fingerprints[fingerprint] = version
+            self._versions[version] = entry
+            self._versions.move_to_end(version)
+            while len(self._versions) > self.keep:
+                evicted, _ = self._versions.popitem(last=False)
+                self._fingerprints = {f: v for f, v in self._fingerprints.items() if v != evicted}
+
+    def digests(self, version: str, records: List[Dict[str, Any]]) -> Tuple[List[str], Dict[str, bytes]]:
+        """
+        Row keys (in record order) and digest per key of a registered version.
+
+        Other sessions may have evicted the version since register(); it is
+        then registered again from its records.
+        """
+        with self._lock:
+            entry = self._versions.get(version)
+        if entry is None:
+            version, entry = self._digest(records)
+            self._store(version, entry)
+        return entry
+
+    def delta(self, base: Optional[str], version: str, records: List[Dict[str, Any]],
+              compress: bool = True) -> Tuple[bytes, Dict[str, Any]]:
+        """
+        Encoded delta taking a browser from base to version.
+
+        Args:
+            base: Version the browser acknowledged (None = nothing loaded)
+            version: Target version, as returned by register(records)
+            records: The records of the target version
+            compress: gzip the payload
+
+        Returns:
+            (payload bytes, info) where info has reset, upserts, deletes.
+        """
+        cache_key = (base, version, compress)
+        with self._lock:
+            cached = self._deltas.get(cache_key)
+            if cached is not None:
+                self._deltas.move_to_end(cache_key)
+                return cached
+            old = self._versions.get(base) if base else None
+
+        keys, digests = self.digests(version, records)
+        if old is None:
+            # Unknown or evicted base: send everything
+            upserts = [[key, row] for key, row in zip(keys, records)]
+            payload = {"reset": True, "upserts": upserts, "deletes": []}
+        else:
+            old_digests = old[1]
+            upserts = [
+                [key, row] for key, row in zip(keys, records)
+                if old_digests.get(key) != digests[key]
+            ]
+            deletes = [key for key in old_digests if key not in digests]
+            payload = {"reset": False, "upserts": upserts, "deletes": deletes}
+
+        result = (encode_delta(payload, compress), {
+            "reset": payload["reset"],
+            "upserts": len(payload["upserts"]),
+            "deletes": len(payload["deletes"]),
+        })
+        with self._lock:
+            self._deltas[cache_key] = result
+            while len(self._deltas) > self.cache_size:
+                self._deltas.popitem(last=False)
+        return result
+
+
+def build_component(directory: str, document: str) -> Tuple[str, Path]:
+    """
+    Write the dashboard page into a component directory named by its hash.
+
+    Every occurrence of __SCOREBOARD_SHELL_ID__ in the document is replaced
+    with the id, which the page reports back when acknowledging.
+
+    Returns:
+        (shell id, directory to declare the component with)
+    """
+    shell_id = hashlib.sha256(document.encode('utf-8')).hexdigest()[:16]
+    target = Path(directory) / shell_id
+    index = target / "index.html"
+    if not index.exists():
+        target.mkdir(parents=True, exist_ok=True)
+        tmp_path = target / f".index.html.{threading.get_ident()}.tmp"
+        tmp_path.write_text(document.replace("__SCOREBOARD_SHELL_ID__", shell_id), encoding='utf-8')
+        tmp_path.replace(index)
+    return shell_id, target
@@ -0,0 +1,228 @@
+"""
+Server-side export for Scoreboard Dashboard.
+
+Applies the dashboard filters (dates, instructor, facilities, categories)
+to the local snapshot and streams the result to CSV or Parquet in fixed
+size chunks, so memory stays constant regardless of export size. Can also
+include participant-level rows from participant_view backfill shards,
+which are never shipped to the browser.
+"""
+
+import csv
+import io
+import json
+import shutil
+import tempfile
+import weakref
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from lazy_imports import module_available, load
+from snapshot_store import SnapshotStore
+
+# pyarrow is imported on the first Parquet export
+PARQUET_AVAILABLE = module_available("pyarrow")
+
+# Export columns, in the order of the instructor_view / participant_view queries
+SESSION_COLUMNS = [
+    "facility", "class_name", "class_date", "class_end_date", "total_bookings", "total_attendees",
+    "parent_category", "grandparent_category", "greatgrandparent_category",
+    "greatgreatgrandparent_category", "instructor_name", "instructor_id", "guid", "session_guid",
+]
+PARTICIPANT_COLUMNS = [
+    "guid", "class_date", "first_name", "last_name", "title", "start_time", "end_time",
+    "session_guid", "offering_id", "final_booking_id", "facility_id", "parent_category",
+    "grandparent_category", "greatgrandparent_category", "greatgreatgrandparent_category",
+    "customer_type", "member_type",
+]
+
+# Numeric columns in instructor_view; everything else is exported as text
+NUMERIC_COLUMNS = {"total_bookings", "total_attendees"}
+
+CHUNK_ROWS = 5000
+
+
+def _row_date(row: Dict[str, Any]) -> str:
+    """Date part of class_date, matching parseDate() in app.js."""
+    value = str(row.get('class_date') or '')
+    return value.split('T')[0].split(' ')[0]
+
+
+def filter_records(records: Iterable[Dict[str, Any]], date_from: Optional[str] = None,
+                   date_to: Optional[str] = None, instructor: Optional[str] = None,
+                   facilities: Optional[List[str]] = None,
+                   categories: Optional[List[str]] = None) -> Iterator[Dict[str, Any]]:
+    """Yield records passing the same filters as applyFilters() in app.js."""
+    facilities = set(facilities or [])
+    categories = set(categories or [])
+
+    for row in records:
+        if date_from or date_to:
+            row_date = _row_date(row)
+            if date_from and row_date < date_from:
+                continue
+            if date_to and row_date > date_to:
+                continue
+        if instructor and row.get('instructor_name') != instructor:
+            continue
+        if facilities and row.get('facility') not in facilities:
+            continue
+        if categories and row.get('greatgrandparent_category') not in categories:
+            continue
+        yield row
+
+
+def iter_participant_rows(sessions: Iterable[Dict[str, Any]],
+                          store: Optional[SnapshotStore] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Yield participant_view rows for the given sessions.
+
+    Shards are read one month at a time, so only the session_guid set and a
+    single shard are held in memory.
+    """
+    store = store or SnapshotStore()
+    session_guids = {row.get('session_guid') for row in sessions if row.get('session_guid')}
+
+    for shard in store.shards("participant_view"):
+        with open(store.shard_path("participant_view", shard), 'r', encoding='utf-8') as f:
+            shard_rows = json.load(f)['records']
+        for row in shard_rows:
+            if row.get('session_guid') in session_guids:
+                yield row
+
+
+def iter_chunks(rows: Iterable[Dict[str, Any]], chunk_rows: int = CHUNK_ROWS) -> Iterator[List[Dict[str, Any]]]:
+    """Group rows into lists of at most chunk_rows."""
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_rows:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _check_columns(chunk: List[Dict[str, Any]], columns: List[str]):
+    """Raise ValueError if any row has a column the export does not know."""
+    known = set(columns)
+    for row in chunk:
+        unexpected = row.keys() - known
+        if unexpected:
+            raise ValueError(f"Unexpected export columns: {', '.join(sorted(unexpected))}")
+
+
+def iter_csv_bytes(rows: Iterable[Dict[str, Any]], columns: List[str] = SESSION_COLUMNS,
+                   chunk_rows: int = CHUNK_ROWS) -> Iterator[bytes]:
+    """Stream rows as UTF-8 CSV, one encoded chunk at a time, header first."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns)
+    # The header is written even when no rows match
+    writer.writeheader()
+
+    for chunk in iter_chunks(rows, chunk_rows):
+        _check_columns(chunk, columns)
+        writer.writerows(chunk)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate(0)
+
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+def write_csv(rows: Iterable[Dict[str, Any]], path: Path, columns: List[str] = SESSION_COLUMNS,
+              chunk_rows: int = CHUNK_ROWS) -> int:
+    """Write rows to a CSV file chunk by chunk. Returns bytes written."""
+    written = 0
+    with open(path, 'wb') as f:
+        for data in iter_csv_bytes(rows, columns, chunk_rows):
+            f.write(data)
+            written += len(data)
+    return written
+
+
+def _parquet_value(column: str, value: Any):
+    """Coerce one cell to the column's fixed Parquet type."""
+    if value is None or value == '':
+        return None
+    if column in NUMERIC_COLUMNS:
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return None
+    return str(value)
+
+
+def write_parquet(rows: Iterable[Dict[str, Any]], path: Path, columns: List[str] = SESSION_COLUMNS,
+                  chunk_rows: int = CHUNK_ROWS) -> int:
+    """Write rows to a Parquet file, one row group per chunk. Returns rows written."""
+    if not PARQUET_AVAILABLE:
+        raise ImportError("pyarrow is not installed (pip install pyarrow)")
+    pa = load("pyarrow")
+    pq = load("pyarrow.parquet")
+
+    schema = pa.schema([
+        (c, pa.float64() if c in NUMERIC_COLUMNS else pa.string()) for c in columns
+    ])
+    total = 0
+    with pq.ParquetWriter(str(path), schema, compression='snappy') as writer:
+        for chunk in iter_chunks(rows, chunk_rows):
+            _check_columns(chunk, columns)
+            table = pa.Table.from_pydict(
+                {c: [_parquet_value(c, row.get(c)) for row in chunk] for c in columns},
+                schema=schema,
+            )
+            writer.write_table(table)
+            total += len(chunk)
+        if not total:
+            # Nothing matched: still produce a file with the full schema
+            writer.write_table(schema.empty_table())
+    return total
+
+
+class ExportDirectory:
+    """
+    Private temporary directory for one session's export files.
+
+    Removed by cleanup() (e.g. on logout), or automatically when the object
+    is garbage-collected with the session that held it.
+    """
+
+    def __init__(self):
+        self.path = Path(tempfile.mkdtemp(prefix="scoreboard_export_"))
+        self._finalizer = weakref.finalize(self, shutil.rmtree, str(self.path), True)
+
+    def cleanup(self):
+        """Delete the directory and every export in it."""
+        self._finalizer()
+
+
+def export_to_file(rows: Iterable[Dict[str, Any]], fmt: str = "csv",
+                   directory: Optional[str] = None, columns: List[str] = SESSION_COLUMNS) -> Path:
+    """
+    Stream rows into a temporary CSV or Parquet file and return its path.
+
+    Args:
+        rows: Rows to export
+        fmt: "csv" or "parquet"
+        directory: Directory for the file (system temp dir if None)
+        columns: Export columns (SESSION_COLUMNS or PARTICIPANT_COLUMNS);
+            a row with any other column raises ValueError
+
+    The caller owns the file and should delete it when done.
+    """
+    suffix = {"csv": ".csv", "parquet": ".parquet"}[fmt]
+    with tempfile.NamedTemporaryFile(prefix="scoreboard_export_", suffix=suffix,
+                                     dir=directory, delete=False) as tmp:
+        path = Path(tmp.name)
+
+    try:
+        if fmt == "parquet":
+            write_parquet(rows, path, columns)
+        else:
+            write_csv(rows, path, columns)
+    except Exception:
+        path.unlink(missing_ok=True)
+        raise
+    return path
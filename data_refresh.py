@@ -0,0 +1,199 @@
+"""
+Stale-while-revalidate loading for Scoreboard Dashboard.
+
+Serves the last good snapshot immediately and refreshes from BigQuery in
+a background thread. When the refresh finishes, the new data is published
+to the snapshot store and swapped in atomically, so page latency is
+bounded by local I/O rather than the warehouse. Versions published by the
+precompute worker are picked up on the next request, so the warehouse is
+only queried when no fresh snapshot exists.
+"""
+
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from snapshot_store import SnapshotStore, deduplicate_records
+
+# (data, source, timestamp) - the same shape every dashboard loader returns
+LoadResult = Tuple[Optional[List[Dict[str, Any]]], Optional[str], Optional[datetime]]
+
+
+def is_upstream(source: Optional[str]) -> bool:
+    """True for data from a published snapshot or BigQuery, False for the local fallback."""
+    return bool(source) and source.startswith(("snapshot:", "bigquery:"))
+
+
+class StaleWhileRevalidate:
+    """Serve the current snapshot while refreshing it in the background."""
+
+    def __init__(self, fetch: Callable[[], LoadResult],
+                 fallback: Optional[Callable[[], LoadResult]] = None,
+                 store: Optional[SnapshotStore] = None,
+                 max_age: timedelta = timedelta(hours=24),
+                 retry_after: timedelta = timedelta(minutes=5)):
+        """
+        Initialize the loader.
+
+        Args:
+            fetch: Slow upstream load, run only on the background thread
+            fallback: Local load used when no snapshot has been published yet
+            store: Snapshot store to read from and publish refreshes to
+            max_age: Served data older than this triggers a background refresh
+            retry_after: Minimum gap between automatic refresh attempts
+        """
+        self.fetch = fetch
+        self.fallback = fallback
+        self.store = store or SnapshotStore()
+        self.max_age = max_age
+        self.retry_after = retry_after
+
+        self._lock = threading.Lock()
+        self._swap_lock = threading.Lock()  # one session loads a newly published version
+        self._current: LoadResult = (None, None, None)
+        self._thread: Optional[threading.Thread] = None
+        self._pending_since: Optional[datetime] = None
+        self._last_attempt: Optional[datetime] = None
+        self._last_error: Optional[str] = None
+
+    def get(self) -> LoadResult:
+        """
+        Return the served data without waiting on upstream I/O.
+
+        A version published since the last call (by precompute_data.py or a
+        refresh) is swapped in first; BigQuery is only refreshed in the
+        background when even the latest published snapshot is stale.
+        """
+        with self._lock:
+            current = self._current
+
+        if current[0] is None:
+            current = self._load_local()
+        else:
+            current = self._load_newer_snapshot(current)
+
+        now = datetime.now()
+        timestamp = current[2]
+        # The local fallback file is a stand-in, however recent its mtime
+        stale = (current[0] is None or timestamp is None or not is_upstream(current[1])
+                 or now - timestamp > self.max_age)
+        with self._lock:
+            cooled_down = self._last_attempt is None or now - self._last_attempt > self.retry_after
+        if stale and cooled_down:
+            self.refresh()
+
+        return current
+
+    def refresh(self) -> bool:
+        """Start a background refresh. Returns False if one is already pending."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return False
+            self._pending_since = datetime.now()
+            self._last_attempt = self._pending_since
+            self._thread = threading.Thread(
+                target=self._revalidate, name="scoreboard-revalidate", daemon=True
+            )
+            self._thread.start()
+        return True
+
+    def status(self) -> Dict[str, Any]:
+        """Served version and refresh state for the sidebar."""
+        with self._lock:
+            _, source, timestamp = self._current
+            pending = (self._thread is not None and self._thread.is_alive()
+                       and self._pending_since is not None)
+            return {
+                "served": source,
+                "served_at": timestamp,
+                "pending": pending,
+                "pending_since": self._pending_since if pending else None,
+                "last_error": self._last_error,
+            }
+
+    def _load_local(self) -> LoadResult:
+        """Load the latest published snapshot, else the local fallback."""
+        loaded: LoadResult = (None, None, None)
+        try:
+            version = self.store.latest_version()
+            if version:
+                data, manifest = self.store.load(version)
+                loaded = (data, f"snapshot:{version}",
+                          datetime.fromisoformat(manifest['published_at']))
+        except Exception as e:
+            with self._lock:
+                self._last_error = f"Snapshot error: {str(e)}"
+
+        if loaded[0] is None and self.fallback is not None:
+            loaded = self.fallback()
+
+        if loaded[0] is not None:
+            with self._lock:
+                # Never replace data a background refresh already swapped in
+                if self._current[0] is None:
+                    self._current = loaded
+                loaded = self._current
+        return loaded
+
+    def _load_newer_snapshot(self, current: LoadResult) -> LoadResult:
+        """Swap in the published version if it is newer than the served data (pointer read only otherwise)."""
+        version = self.store.latest_version()
+        if version is None or current[1] == f"snapshot:{version}":
+            return current
+
+        with self._swap_lock:
+            with self._lock:
+                current = self._current
+            if current[1] == f"snapshot:{version}":
+                # Another session swapped it in while we waited
+                return current
+            try:
+                served = current[1] or ""
+                if served.startswith("snapshot:"):
+                    # Version names are publish timestamps
+                    newer = version > served[len("snapshot:"):]
+                elif not is_upstream(served):
+                    # Any published snapshot beats the local fallback
+                    newer = True
+                else:
+                    published_at = datetime.fromisoformat(self.store.read_manifest(version)['published_at'])
+                    newer = current[2] is None or published_at > current[2]
+                if not newer:
+                    return current
+                data, manifest = self.store.load(version)
+            except Exception as e:
+                with self._lock:
+                    self._last_error = f"Snapshot error: {str(e)}"
+                return current
+
+            loaded = (data, f"snapshot:{version}", datetime.fromisoformat(manifest['published_at']))
+            with self._lock:
+                self._current = loaded
+            return loaded
+
+    def _revalidate(self):
+        """Background thread: fetch, publish, then swap in the new version."""
+        try:
+            data, source, timestamp = self.fetch()
+            if not data:
+                with self._lock:
+                    self._last_error = source
+                return
+
+            records = deduplicate_records(data)
+            try:
+                version = self.store.publish(records, source, extra={"raw_records": len(data)})
+                served = (records, f"snapshot:{version}", timestamp or datetime.now())
+            except OSError:
+                # Read-only filesystem: still serve the fresh data from memory
+                served = (records, source, timestamp or datetime.now())
+
+            with self._lock:
+                self._current = served
+                self._last_error = None
+        except Exception as e:
+            with self._lock:
+                self._last_error = f"Refresh error: {str(e)}"
+        finally:
+            with self._lock:
+                self._pending_since = None
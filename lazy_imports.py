@@ -0,0 +1,131 @@
+"""
+Deferred imports for heavy optional dependencies.
+
+The login screen and local-file mode need none of google-cloud-bigquery,
+pandas/openpyxl, DuckDB or pyarrow. Availability is checked without
+importing (find_spec), modules are imported on first use, and the cost of
+each deferred import is recorded so admins can see it in the sidebar.
+
+Run as a script for a cold-import report of a module:
+    python lazy_imports.py streamlit_app
+    python lazy_imports.py streamlit_app --forbid google.cloud,google.oauth2,pandas,duckdb,pyarrow
+"""
+
+import argparse
+import importlib
+import importlib.util
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+# Stacks that must not be imported before they are needed. Module prefixes, not
+# top-level packages: Streamlit itself imports google.protobuf.
+HEAVY_PACKAGES = ["google.cloud", "google.oauth2", "pandas", "openpyxl", "duckdb", "pyarrow", "numpy"]
+
+_lock = threading.Lock()
+_timings: Dict[str, float] = {}
+
+
+def module_available(name: str) -> bool:
+    """True if a module can be imported, without importing it."""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        # A parent package is missing
+        return False
+
+
+def load(name: str):
+    """Import a module on first use and record how long the import took."""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+
+    started = time.perf_counter()
+    module = importlib.import_module(name)
+    elapsed = time.perf_counter() - started
+    with _lock:
+        _timings.setdefault(name, elapsed)
+    return module
+
+
+def deferred_imports() -> Dict[str, float]:
+    """Seconds spent importing each module loaded through load(), in load order."""
+    with _lock:
+        return dict(_timings)
+
+
+def import_time_report(module: str, python: Optional[str] = None) -> List[Tuple[str, int, int, int]]:
+    """
+    Cold-import a module in a fresh interpreter with -X importtime.
+
+    Returns:
+        (package, self_us, cumulative_us, depth) for every module imported.
+    """
+    result = subprocess.run(
+        [python or sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr.strip()[-2000:]}")
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def summarize_report(rows: List[Tuple[str, int, int, int]]) -> Dict[str, int]:
+    """Self time in microseconds per top-level package, largest first."""
+    totals = defaultdict(int)
+    for name, self_us, _, _ in rows:
+        totals[name.split(".")[0]] += self_us
+    return dict(sorted(totals.items(), key=lambda item: item[1], reverse=True))
+
+
+def imported_prefixes(rows: List[Tuple[str, int, int, int]], prefixes: List[str]) -> List[str]:
+    """The prefixes (e.g. google.cloud) matching any imported module, in the given order."""
+    names = {name for name, _, _, _ in rows}
+    return [
+        prefix for prefix in prefixes
+        if prefix in names or any(name.startswith(prefix + ".") for name in names)
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report the cold import time of a module.")
+    parser.add_argument("module", nargs="?", default="streamlit_app", help="Module to import (default: streamlit_app)")
+    parser.add_argument("--top", type=int, default=15, help="Packages to list")
+    parser.add_argument("--forbid", default="",
+                        help=f"Comma-separated module prefixes that must not be imported (e.g. {','.join(HEAVY_PACKAGES)})")
+    args = parser.parse_args(argv)
+
+    rows = import_time_report(args.module)
+    packages = summarize_report(rows)
+    total_us = sum(cumulative for _, _, cumulative, depth in rows if depth == 0)
+
+    print(f"⏱️ import {args.module}: {total_us / 1e6:.3f}s across {len(rows):,} modules")
+    print()
+    for package, self_us in list(packages.items())[:args.top]:
+        print(f"  {self_us / 1e3:9.1f} ms  {package}")
+
+    loaded_heavy = imported_prefixes(rows, HEAVY_PACKAGES)
+    print()
+    print(f"📦 Heavy packages loaded: {', '.join(loaded_heavy) if loaded_heavy else 'none'}")
+
+    forbidden = imported_prefixes(rows, [p.strip() for p in args.forbid.split(",") if p.strip()])
+    if forbidden:
+        print(f"❌ Imported at startup: {', '.join(forbidden)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,500 @@
+"""
+The Front Dashboard - Multi-Session Load Test
+Drives streamlit_app.py headlessly with N simulated sessions to find how
+many users one replica can hold.
+
+Each session is a separate Streamlit AppTest (its own session_state) in
+this process, so they share the process-wide caches exactly like browser
+sessions on one replica. Sessions log in through check_access, then cycle
+through reruns, data-source toggles and Refresh against a synthetic dataset
+served from a snapshot, a local file and replayed BigQuery recordings.
+
+Reports per-session memory, rerun latency percentiles per action, cache hit
+rates and dashboard payload bytes per rerun.
+
+Usage:
+    python load_test.py                                  # 20 sessions, 40,000 rows
+    python load_test.py --sessions 50 --rows 100000 --rounds 10
+    python load_test.py --sync off                       # embedded-data page for comparison
+    python load_test.py --no-snapshot --bq-latency 2.0   # BigQuery path via replay
+    python load_test.py --json results.json
+"""
+
+import argparse
+import gzip
+import json
+import math
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from pathlib import Path
+
+from bigquery_backends import QueryBackend
+
+APP_DIR = Path(__file__).resolve().parent
+APP_SCRIPT = APP_DIR / "streamlit_app.py"
+DASHBOARD_FILES = ["index.html", "styles.css", "app.js", "category_analysis.js", "dashboard_bridge.js"]
+
+# Each session starts at a different offset so actions interleave across sessions
+ACTION_CYCLE = ["rerun", "toggle_source", "rerun", "toggle_source", "rerun", "refresh"]
+
+FACILITIES = ["SOMA", "SLC", "OGDEN", "SLP"]
+CATEGORIES = {
+    "Yoga": ["Soft and Slow Classes", "Vinyasa", "Hot Yoga"],
+    "Fitness": ["Strength", "Cardio", "Mobility"],
+    "Climbing": ["Intro to Climbing", "Technique", "Youth Team"],
+    "Arts": ["Wheel Throwing", "Handbuilding", "Glazing"],
+}
+
+
+def synthetic_records(rows, seed=42, weeks=156):
+    """Generate instructor_view-shaped records spread over the last `weeks` weeks."""
+    rng = random.Random(seed)
+    instructors = [f"Instructor {i:03d}" for i in range(max(rows // 150, 10))]
+    classes = [f"Class {i:03d}" for i in range(max(rows // 100, 15))]
+    customers = [f"customer-{i:06d}" for i in range(max(rows // 4, 50))]
+    first_day = date.today() - timedelta(weeks=weeks)
+
+    records = []
+    for i in range(rows):
+        category = rng.choice(list(CATEGORIES))
+        class_day = (first_day + timedelta(days=rng.randrange(weeks * 7))).isoformat()
+        bookings = rng.randint(0, 30)
+        records.append({
+            "facility": rng.choice(FACILITIES),
+            "class_name": rng.choice(classes),
+            "class_date": class_day,
+            "class_end_date": class_day,
+            "total_bookings": bookings,
+            "total_attendees": max(0, bookings - rng.randint(0, 5)),
+            "parent_category": rng.choice(CATEGORIES[category]),
+            "grandparent_category": f"In Person {category} Offerings",
+            "greatgrandparent_category": category,
+            "greatgreatgrandparent_category": "Master Calendar",
+            "instructor_name": rng.choice(instructors),
+            "instructor_id": float(rng.randrange(len(instructors))),
+            "guid": rng.choice(customers),
+            "session_guid": f"{seed:04d}{i:036x}",
+        })
+    return records
+
+
+class StaticBackend(QueryBackend):
+    """Query backend that answers every query with the synthetic records (recorded once)."""
+
+    def __init__(self, records):
+        self.records = records
+
+    def query(self, query, params=None):
+        return iter(self.records)
+
+    def get_table(self, full_name):
+        return {"num_rows": len(self.records), "num_bytes": 0, "modified": None, "schema": []}
+
+
+def prepare_workdir(workdir, records, publish_snapshot=True):
+    """Lay out dashboard files, data.json.gz, a snapshot and BigQuery recordings."""
+    from bigquery_backends import RecordingBackend
+    from bigquery_client import BigQueryClient
+    from snapshot_store import SnapshotStore
+
+    for name in DASHBOARD_FILES:
+        if (APP_DIR / name).exists():
+            shutil.copy(APP_DIR / name, workdir / name)
+
+    with gzip.open(workdir / "data.json.gz", 'wt', encoding='utf-8') as f:
+        json.dump(records, f, separators=(',', ':'))
+
+    if publish_snapshot:
+        SnapshotStore(workdir / "snapshots").publish(records, "loadtest:synthetic")
+
+    # Record the exact instructor_view query the app issues, for offline replay
+    client = BigQueryClient(backend=RecordingBackend(StaticBackend(records), str(workdir / "recordings")))
+    client.fetch_instructor_view()
+
+
+class Counters:
+    """Thread-safe event counters filled by the probes."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.values = {}
+
+    def add(self, name, amount=1):
+        with self._lock:
+            self.values[name] = self.values.get(name, 0) + amount
+
+    def get(self, name):
+        with self._lock:
+            return self.values.get(name, 0)
+
+
+def install_probes(counters):
+    """Count the work done only on cache misses (loads, BigQuery queries, delta encodes)."""
+    import dashboard_sync
+    from bigquery_backends import ReplayBackend
+    from snapshot_store import SnapshotStore
+
+    def counting(name, fn, background_name=None):
+        def wrapper(*args, **kwargs):
+            if background_name and threading.current_thread().name == "scoreboard-revalidate":
+                counters.add(background_name)
+            else:
+                counters.add(name)
+            return fn(*args, **kwargs)
+        return wrapper
+
+    SnapshotStore.load = counting("snapshot_loads", SnapshotStore.load, "background_snapshot_loads")
+    ReplayBackend.query = counting("bigquery_queries", ReplayBackend.query, "background_bigquery_queries")
+
+    gzip_open = gzip.open
+
+    def counting_gzip_open(filename, *args, **kwargs):
+        if str(filename).endswith("data.json.gz"):
+            counters.add("file_loads")
+        return gzip_open(filename, *args, **kwargs)
+    gzip.open = counting_gzip_open
+
+    dashboard_sync.DatasetVersions.register = counting("version_lookups", dashboard_sync.DatasetVersions.register)
+    dashboard_sync.digest_rows = counting("version_hashes", dashboard_sync.digest_rows)
+    dashboard_sync.DatasetVersions.delta = counting("delta_requests", dashboard_sync.DatasetVersions.delta)
+    dashboard_sync.encode_delta = counting("delta_encodes", dashboard_sync.encode_delta)
+
+
+class SimulatedSession:
+    """One browser session driving the app through AppTest."""
+
+    def __init__(self, index, access_code, timeout, simulate_ack=True):
+        from streamlit.testing.v1 import AppTest
+
+        self.index = index
+        self.access_code = access_code
+        self.simulate_ack = simulate_ack
+        self.at = AppTest.from_file(str(APP_SCRIPT), default_timeout=timeout)
+        self.authenticated = False
+        self.timings = []      # (action, seconds)
+        self.payloads = []     # dashboard bytes sent to the browser per authenticated run
+        self.errors = []
+        self.ack_supported = None
+
+    def perform(self, action):
+        """Run one action and record its latency."""
+        started = time.perf_counter()
+        try:
+            getattr(self, f"_{action}")()
+        except Exception as e:
+            self.errors.append(f"{action}: {type(e).__name__}: {e}")
+            return
+        elapsed = time.perf_counter() - started
+
+        if self.at.exception:
+            self.errors.append(f"{action}: {self.at.exception[0].message}")
+        self.timings.append((action, elapsed))
+        if self.authenticated:
+            self.payloads.append(self._dashboard_payload_bytes())
+            if self.simulate_ack:
+                self._acknowledge()
+
+    def _open(self):
+        self.at.run()
+
+    def _login(self):
+        self.at.text_input(key="access_input").input(self.access_code)
+        next(b for b in self.at.button if b.label.startswith("🔓")).click()
+        self.at.run()
+        self.authenticated = bool(self.at.session_state["authenticated"])
+        if not self.authenticated:
+            raise RuntimeError("login rejected")
+
+    def _rerun(self):
+        self.at.run()
+
+    def _toggle_source(self):
+        toggle = next((t for t in self.at.sidebar.toggle if t.label.startswith("Use BigQuery")), None)
+        if toggle is None:
+            # BigQuery unavailable: nothing to toggle, behave like a rerun
+            self.at.run()
+            return
+        toggle.set_value(not toggle.value)
+        self.at.run()
+
+    def _refresh(self):
+        next(b for b in self.at.sidebar.button if b.label.startswith("🔄")).click()
+        self.at.run()
+
+    def _components(self):
+        return [node for node in self.at.get("component_instance")]
+
+    def _dashboard_payload_bytes(self):
+        """Bytes of dashboard data/page sent to the browser by the last run."""
+        total = 0
+        for node in self._components():
+            total += sum(len(arg.bytes) for arg in node.proto.special_args if arg.WhichOneof("value") == "bytes")
+        for node in self.at.get("iframe"):
+            total += len(node.proto.srcdoc.encode('utf-8'))
+        return total
+
+    def _acknowledge(self):
+        """Report the pushed version back, as dashboard_bridge.js would."""
+        from dashboard_sync import COMPONENT_NAME, DASHBOARD_COMPONENT_KEY
+
+        for node in self._components():
+            name = node.proto.component_name
+            if COMPONENT_NAME not in name:
+                continue
+            args = json.loads(node.proto.json_args or "{}")
+            try:
+                self.at.session_state[DASHBOARD_COMPONENT_KEY] = {
+                    "shell": name.rsplit("_", 1)[-1],
+                    "version": args.get("version"),
+                    "gzip": True,
+                }
+                self.ack_supported = True
+            except Exception as e:
+                self.ack_supported = False
+                self.errors.append(f"ack: {type(e).__name__}: {e}")
+                self.simulate_ack = False
+
+
+def percentiles(values, points=(50, 90, 95, 99)):
+    """Nearest-rank percentiles of a list of numbers."""
+    if not values:
+        return {f"p{p}": None for p in points}
+    ordered = sorted(values)
+    result = {}
+    for p in points:
+        rank = max(1, math.ceil(p / 100 * len(ordered)))
+        result[f"p{p}"] = ordered[rank - 1]
+    result["max"] = ordered[-1]
+    return result
+
+
+def run_load_test(args):
+    """Create the sessions, drive them and collect the metrics."""
+    counters = Counters()
+    install_probes(counters)
+
+    def run_all(sessions, action_for):
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            list(pool.map(lambda s: s.perform(action_for(s)), sessions))
+
+    if args.tracemalloc:
+        tracemalloc.start()
+
+    started = time.perf_counter()
+    sessions = []
+    memory = []
+    for index in range(args.sessions):
+        session = SimulatedSession(index, args.access_code, args.timeout, simulate_ack=args.sync == "on")
+        session.perform("open")
+        session.perform("login")
+        sessions.append(session)
+        if args.tracemalloc:
+            memory.append(tracemalloc.get_traced_memory()[0])
+        print(f"👤 Session {index + 1}/{args.sessions} logged in"
+              + (f" ({memory[-1] / 2**20:,.1f} MiB traced)" if memory else ""))
+
+    requests_before = sum(1 for s in sessions for _ in s.payloads)
+    for round_index in range(args.rounds):
+        run_all(sessions, lambda s: ACTION_CYCLE[(s.index + round_index) % len(ACTION_CYCLE)])
+        print(f"🔁 Round {round_index + 1}/{args.rounds} done")
+    wall_seconds = time.perf_counter() - started
+
+    peak = None
+    if args.tracemalloc:
+        memory.append(tracemalloc.get_traced_memory()[0])
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    by_action = {}
+    for session in sessions:
+        for action, seconds in session.timings:
+            by_action.setdefault(action, []).append(seconds)
+
+    data_requests = sum(len(s.payloads) for s in sessions)
+    data_misses = counters.get("snapshot_loads") + counters.get("file_loads") + counters.get("bigquery_queries")
+    payloads = [b for s in sessions for b in s.payloads]
+    steady_payloads = [b for s in sessions for b in s.payloads[1:]]
+
+    def hit_rate(requests, misses):
+        return None if not requests else max(0.0, 1 - misses / requests)
+
+    return {
+        "config": {
+            "sessions": args.sessions,
+            "rows": args.rows,
+            "rounds": args.rounds,
+            "concurrency": args.concurrency,
+            "sync": args.sync,
+            "snapshot": args.snapshot,
+            "bq_latency": args.bq_latency,
+        },
+        "wall_seconds": wall_seconds,
+        "memory": None if not memory else {
+            "first_session_bytes": memory[0],
+            "per_additional_session_bytes": (
+                (memory[args.sessions - 1] - memory[0]) / (args.sessions - 1) if args.sessions > 1 else None
+            ),
+            "after_rounds_bytes": memory[-1],
+            "peak_bytes": peak,
+        },
+        "max_rss_kib": _max_rss_kib(),
+        "latency_seconds": {
+            action: dict(percentiles(values), count=len(values)) for action, values in by_action.items()
+        },
+        "cache": {
+            "data_requests": data_requests,
+            "data_misses": data_misses,
+            "data_hit_rate": hit_rate(data_requests, data_misses),
+            "version_hit_rate": hit_rate(counters.get("version_lookups"), counters.get("version_hashes")),
+            "delta_hit_rate": hit_rate(counters.get("delta_requests"), counters.get("delta_encodes")),
+            "counters": dict(counters.values),
+            "requests_during_login": requests_before,
+        },
+        "payload_bytes": {
+            "total": sum(payloads),
+            "per_run": percentiles(payloads, points=(50, 95)),
+            "per_run_after_first_load": percentiles(steady_payloads, points=(50, 95)),
+        },
+        "browser_ack_simulated": any(s.ack_supported for s in sessions),
+        "errors": [f"session {s.index}: {e}" for s in sessions for e in s.errors][:50],
+    }
+
+
+def _max_rss_kib():
+    try:
+        import resource
+    except ImportError:
+        # Not available on Windows
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def print_report(results):
+    """Human-readable summary of run_load_test() results."""
+    config = results["config"]
+    print()
+    print("=" * 60)
+    print(f"📈 {config['sessions']} sessions × {config['rounds']} rounds, {config['rows']:,} rows, "
+          f"sync {config['sync']}, concurrency {config['concurrency']}")
+    print("=" * 60)
+    print(f"⏱️ Wall time: {results['wall_seconds']:.1f}s")
+
+    memory = results["memory"]
+    if memory:
+        print(f"🧠 First session (fills caches): {memory['first_session_bytes'] / 2**20:,.1f} MiB")
+        if memory['per_additional_session_bytes'] is not None:
+            print(f"🧠 Each additional session: {memory['per_additional_session_bytes'] / 2**20:,.2f} MiB")
+        print(f"🧠 Traced after rounds: {memory['after_rounds_bytes'] / 2**20:,.1f} MiB "
+              f"(peak {memory['peak_bytes'] / 2**20:,.1f} MiB)")
+    if results["max_rss_kib"]:
+        print(f"🧠 Max RSS: {results['max_rss_kib'] / 1024:,.0f} MiB")
+
+    print()
+    print(f"{'action':<15}{'count':>7}{'p50':>9}{'p90':>9}{'p95':>9}{'p99':>9}{'max':>9}")
+    for action, stats in results["latency_seconds"].items():
+        cells = "".join(f"{stats[k] * 1000:>7.0f}ms" for k in ("p50", "p90", "p95", "p99", "max"))
+        print(f"{action:<15}{stats['count']:>7}{cells}")
+
+    cache = results["cache"]
+
+    def pct(value):
+        return "n/a" if value is None else f"{value:.1%}"
+
+    print()
+    print(f"🗄️ Data cache: {pct(cache['data_hit_rate'])} hits "
+          f"({cache['data_misses']:,} loads for {cache['data_requests']:,} runs)")
+    print(f"🗄️ Version registry: {pct(cache['version_hit_rate'])} hits, "
+          f"delta cache: {pct(cache['delta_hit_rate'])} hits")
+    background = {k: v for k, v in cache["counters"].items() if k.startswith("background_")}
+    if background:
+        print(f"🔄 Background refresh work: {background}")
+
+    payload = results["payload_bytes"]
+    steady = payload["per_run_after_first_load"]
+    print(f"📦 Dashboard payload: {payload['total'] / 2**20:,.1f} MiB total, "
+          f"median {(steady['p50'] or 0) / 1024:,.1f} KiB per run after first load")
+    if config["sync"] == "on" and not results["browser_ack_simulated"]:
+        print("⚠️ Browser acknowledgements could not be simulated; every run resent the full dataset")
+
+    if results["errors"]:
+        print()
+        print(f"❌ {len(results['errors'])} errors (first shown):")
+        for error in results["errors"][:10]:
+            print(f"   {error}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Multi-session load test for streamlit_app.py.")
+    parser.add_argument("--sessions", type=int, default=20, help="Simulated browser sessions")
+    parser.add_argument("--rows", type=int, default=40000, help="Synthetic dataset size")
+    parser.add_argument("--rounds", type=int, default=6,
+                        help="Action rounds per session after login (rerun / toggle source / refresh)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Sessions running an action at once")
+    parser.add_argument("--sync", choices=["on", "off"], default="on",
+                        help="Incremental dashboard sync (off = embed the full dataset every run)")
+    parser.add_argument("--no-snapshot", dest="snapshot", action="store_false",
+                        help="Do not publish a snapshot; the BigQuery toggle goes through replay")
+    parser.add_argument("--bq-latency", type=float, default=0.0, help="Replayed BigQuery latency (seconds)")
+    parser.add_argument("--access-code", default="FRONT2024", help="Access code used to log in")
+    parser.add_argument("--timeout", type=float, default=120, help="Seconds allowed per script run")
+    parser.add_argument("--no-tracemalloc", dest="tracemalloc", action="store_false",
+                        help="Skip memory tracing (lower overhead, latency only)")
+    parser.add_argument("--seed", type=int, default=42, help="Synthetic data seed")
+    parser.add_argument("--workdir", help="Working directory (default: a temporary directory)")
+    parser.add_argument("--keep", action="store_true", help="Keep the working directory")
+    parser.add_argument("--json", metavar="PATH", help="Also write the results as JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    workdir = Path(args.workdir or tempfile.mkdtemp(prefix="scoreboard_loadtest_")).resolve()
+    workdir.mkdir(parents=True, exist_ok=True)
+
+    # The app reads these at import / run time; set them before anything is imported
+    os.environ["SCOREBOARD_SNAPSHOT_DIR"] = str(workdir / "snapshots")
+    os.environ["SCOREBOARD_BQ_REPLAY_DIR"] = str(workdir / "recordings")
+    os.environ["SCOREBOARD_BQ_REPLAY_LATENCY"] = str(args.bq_latency)
+    os.environ["SCOREBOARD_COMPONENT_DIR"] = str(workdir / "component")
+    os.environ["SCOREBOARD_DASHBOARD_SYNC"] = "1" if args.sync == "on" else "0"
+    os.environ.pop("SCOREBOARD_BQ_RECORD_DIR", None)
+    sys.path.insert(0, str(APP_DIR))
+
+    print("=" * 60)
+    print("The Front Dashboard - Load Test")
+    print("=" * 60)
+    print(f"📂 Workdir: {workdir}")
+
+    records = synthetic_records(args.rows, seed=args.seed)
+    prepare_workdir(workdir, records, publish_snapshot=args.snapshot)
+    del records
+    print(f"🧪 Synthetic dataset: {args.rows:,} rows")
+    print()
+
+    original_cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        results = run_load_test(args)
+    finally:
+        os.chdir(original_cwd)
+        if not args.keep and not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    print_report(results)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Results written to {args.json}")
+    return 1 if results["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,338 @@
+"""
+Rolling-window performance statistics for instructors, classes and facilities.
+
+An engine keeps attendance moments (count, sum, sum of squares) per
+instructor/class/facility per week, plus running totals over the last 4,
+12 and 52 weeks. RollingStatsCache holds one engine per recent dataset
+version, so sessions served different data never disturb each other; a
+new version starts from a copy of the newest engine and applies only the
+row diff (keyed like dashboard_sync). Top-K/bottom-K leaderboards are
+served from cache until the data or the current week changes.
+
+Sums are kept as integers, so removing a session restores the totals exactly.
+"""
+
+import heapq
+import math
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+WINDOWS = (4, 12, 52)
+DIMENSIONS = {
+    "instructor": "instructor_name",
+    "class": "class_name",
+    "facility": "facility",
+}
+MIN_CLASSES = 3
+
+# Display names of facility codes, as getFacilityName() in app.js
+FACILITY_NAMES = {
+    "OGDEN": "Ogden",
+    "SOMA": "SOMA",
+    "SLC": "Salt Lake City",
+    "SLP": "Pottery",
+    "": "Online/Virtual",
+}
+
+# (week ordinal, {dimension: name}, attendees) for one session
+Contribution = Tuple[int, Dict[str, str], int]
+
+
+def week_of(value: Any) -> Optional[int]:
+    """Ordinal of the Monday starting the week of a class_date, or None if unparseable."""
+    try:
+        day = date.fromisoformat(str(value)[:10])
+    except (TypeError, ValueError):
+        return None
+    return day.toordinal() - day.weekday()
+
+
+def facility_name(facility: Any) -> str:
+    """Display name of a facility code."""
+    code = str(facility or '')
+    return FACILITY_NAMES.get(code, f"Facility {code}")
+
+
+def contribution(row: Dict[str, Any]) -> Optional[Contribution]:
+    """
+    What one session adds to the statistics.
+
+    Classes are keyed "class_name (facility name)" like rankClasses() in
+    app.js, so the same class at two facilities is ranked separately.
+    """
+    week = week_of(row.get('class_date'))
+    if week is None:
+        return None
+    names = {}
+    for dimension, field in DIMENSIONS.items():
+        name = str(row.get(field) or '')
+        if name.strip():
+            names[dimension] = name
+    if "class" in names:
+        names["class"] = f"{names['class']} ({facility_name(row.get('facility'))})"
+    try:
+        attendees = int(row.get('total_attendees') or 0)
+    except (TypeError, ValueError):
+        attendees = 0
+    return week, names, attendees
+
+
+def _add(moments: Dict[str, List[int]], name: str, attendees: int, sign: int):
+    """Add (sign=1) or remove (sign=-1) one session from a name's [count, sum, sumsq]."""
+    entry = moments.get(name)
+    if entry is None:
+        entry = moments[name] = [0, 0, 0]
+    entry[0] += sign
+    entry[1] += sign * attendees
+    entry[2] += sign * attendees * attendees
+    if entry[0] <= 0:
+        del moments[name]
+
+
+def summarize(name: str, moments: List[int]) -> Dict[str, Any]:
+    """Leaderboard entry from [count, sum, sumsq]."""
+    count, total, total_sq = moments
+    mean = total / count
+    std = None
+    if count > 1:
+        # Sample variance from integer moments (exact numerator)
+        variance = (count * total_sq - total * total) / (count * (count - 1))
+        std = round(math.sqrt(max(variance, 0.0)), 1)
+    return {
+        "name": name,
+        "classes": count,
+        "attendees": total,
+        "avg_attendance": round(mean, 1),
+        "std": std,
+    }
+
+
+class RollingStats:
+    """
+    Rolling-window statistics for one dataset version, updated incrementally.
+
+    The windows end at the current week, or at the latest week with data if
+    that is earlier (historical snapshots still fill every window). Sessions
+    dated after the current week are held and enter the windows when their
+    week arrives.
+    """
+
+    def __init__(self, windows: Tuple[int, ...] = WINDOWS):
+        """
+        Initialize empty statistics.
+
+        Args:
+            windows: Window lengths in weeks
+        """
+        self.windows = tuple(windows)
+        self.version: Optional[str] = None
+        self.anchor: Optional[int] = None
+        self._lock = threading.Lock()
+        self._rows: Dict[str, Tuple[bytes, Optional[Contribution]]] = {}
+        self._week_rows: Dict[int, int] = {}
+        # dimension -> name -> week -> [count, sum, sumsq]
+        self._weekly: Dict[str, Dict[str, Dict[int, List[int]]]] = {d: {} for d in DIMENSIONS}
+        # window -> dimension -> name -> [count, sum, sumsq]
+        self._totals: Dict[int, Dict[str, Dict[str, List[int]]]] = {}
+        self._leaderboards: Dict[Tuple, List[Dict[str, Any]]] = {}
+
+    def sync(self, version: str, keys: List[str], digests: Dict[str, bytes],
+             records: List[Dict[str, Any]], today: Optional[date] = None) -> Dict[str, int]:
+        """
+        Bring the statistics to a dataset version.
+
+        Args:
+            version: Dataset version id (DatasetVersions.register)
+            keys: Row keys in record order (DatasetVersions.digests)
+            digests: Row digest per key
+            records: The records of the version
+            today: Current date (defaults to today)
+
+        Returns:
+            Sessions added and removed by this call.
+        """
+        this_week = week_of((today or datetime.now().date()).isoformat())
+        with self._lock:
+            added = removed = 0
+            if version != self.version:
+                for key in [k for k, (digest, _) in self._rows.items() if digests.get(k) != digest]:
+                    self._apply(self._rows.pop(key)[1], -1)
+                    removed += 1
+                for key, row in zip(keys, records):
+                    if key in self._rows:
+                        continue
+                    change = contribution(row)
+                    self._rows[key] = (digests[key], change)
+                    self._apply(change, 1)
+                    added += 1
+                self.version = version
+
+            latest = max((week for week, rows in self._week_rows.items() if rows > 0), default=None)
+            anchor = None if latest is None else min(latest, this_week)
+            moved = anchor != self.anchor
+            if moved:
+                self.anchor = anchor
+                self._rebuild_totals()
+            if added or removed or moved:
+                self._leaderboards = {}
+            return {"added": added, "removed": removed}
+
+    def copy(self) -> "RollingStats":
+        """Independent engine with the same state, to be synced to another version."""
+        clone = RollingStats(self.windows)
+        with self._lock:
+            clone.version = self.version
+            clone.anchor = self.anchor
+            clone._rows = dict(self._rows)
+            clone._week_rows = dict(self._week_rows)
+            clone._weekly = {
+                dimension: {name: {week: list(m) for week, m in weeks.items()} for name, weeks in names.items()}
+                for dimension, names in self._weekly.items()
+            }
+            clone._totals = {
+                window: {
+                    dimension: {name: list(m) for name, m in names.items()}
+                    for dimension, names in dimensions.items()
+                }
+                for window, dimensions in self._totals.items()
+            }
+            clone._leaderboards = dict(self._leaderboards)
+        return clone
+
+    def _in_window(self, week: int, window: int) -> bool:
+        return self.anchor is not None and self.anchor - 7 * (window - 1) <= week <= self.anchor
+
+    def _apply(self, change: Optional[Contribution], sign: int):
+        """Add or remove one session from the weekly buckets and window totals."""
+        if change is None:
+            return
+        week, names, attendees = change
+        self._week_rows[week] = self._week_rows.get(week, 0) + sign
+        if self._week_rows[week] <= 0:
+            del self._week_rows[week]
+
+        for dimension, name in names.items():
+            weeks = self._weekly[dimension].setdefault(name, {})
+            _add(weeks, week, attendees, sign)
+            if not weeks:
+                del self._weekly[dimension][name]
+        for window, totals in self._totals.items():
+            if self._in_window(week, window):
+                for dimension, name in names.items():
+                    _add(totals[dimension], name, attendees, sign)
+
+    def _rebuild_totals(self):
+        """Recompute window totals from the weekly buckets (the windows moved)."""
+        self._totals = {window: {d: {} for d in DIMENSIONS} for window in self.windows}
+        for dimension, names in self._weekly.items():
+            for name, weeks in names.items():
+                for week, (count, total, total_sq) in weeks.items():
+                    for window in self.windows:
+                        if not self._in_window(week, window):
+                            continue
+                        entry = self._totals[window][dimension].setdefault(name, [0, 0, 0])
+                        entry[0] += count
+                        entry[1] += total
+                        entry[2] += total_sq
+
+    def leaderboard(self, dimension: str, window: int, k: int = 10, bottom: bool = False,
+                    min_classes: int = MIN_CLASSES) -> List[Dict[str, Any]]:
+        """
+        Top (or bottom) K by average attendance per class over a window.
+
+        Args:
+            dimension: "instructor", "class" or "facility"
+            window: Window length in weeks (one of self.windows)
+            k: Entries to return
+            bottom: Lowest averages first instead of highest
+            min_classes: Minimum classes in the window to be ranked
+
+        Returns:
+            Entries with name, classes, attendees, avg_attendance, std.
+        """
+        if dimension not in DIMENSIONS:
+            raise ValueError(f"Unknown dimension: {dimension}")
+        if window not in self.windows:
+            raise ValueError(f"Unknown window: {window} weeks (have {', '.join(map(str, self.windows))})")
+
+        cache_key = (dimension, window, k, bottom, min_classes)
+        with self._lock:
+            cached = self._leaderboards.get(cache_key)
+            if cached is not None:
+                return cached
+
+            totals = self._totals.get(window, {}).get(dimension, {})
+            # 'Unknown' is a placeholder instructor (rankLowPerformingInstructors in app.js)
+            eligible = (
+                (name, moments) for name, moments in totals.items()
+                if moments[0] >= min_classes and not (dimension == "instructor" and name == 'Unknown')
+            )
+            # Ties: more classes first, then by name, so every view ranks alike
+            direction = 1 if bottom else -1
+            ranked = heapq.nsmallest(
+                k, eligible,
+                key=lambda item: (direction * item[1][1] / item[1][0], -item[1][0], item[0])
+            )
+            result = [summarize(name, moments) for name, moments in ranked]
+            self._leaderboards[cache_key] = result
+            return result
+
+    def window_range(self, window: int) -> Optional[Tuple[date, date]]:
+        """First and last day covered by a window, or None before any data."""
+        if self.anchor is None:
+            return None
+        start = date.fromordinal(self.anchor - 7 * (window - 1))
+        return start, date.fromordinal(self.anchor) + timedelta(days=6)
+
+
+class RollingStatsCache:
+    """
+    Process-wide RollingStats per recent dataset version.
+
+    Each engine only ever holds its own version, so sessions serving
+    different data (file vs BigQuery, stale vs refreshed) each read their
+    own leaderboards without re-diffing shared state on every rerun.
+    """
+
+    def __init__(self, keep: int = 3):
+        """
+        Initialize the cache.
+
+        Args:
+            keep: Dataset versions to keep engines for
+        """
+        self.keep = keep
+        self._lock = threading.Lock()
+        self._engines: "OrderedDict[str, RollingStats]" = OrderedDict()
+
+    def get(self, version: str, keys: List[str], digests: Dict[str, bytes],
+            records: List[Dict[str, Any]], today: Optional[date] = None) -> RollingStats:
+        """
+        Engine synced to a dataset version (arguments as for RollingStats.sync).
+
+        An unseen version is derived from the most recently used engine, so
+        only the rows that differ between the two versions are applied.
+        """
+        with self._lock:
+            engine = self._engines.get(version)
+            if engine is not None:
+                self._engines.move_to_end(version)
+                base = None
+            else:
+                base = next(reversed(self._engines.values()), None)
+
+        if engine is None:
+            engine = base.copy() if base is not None else RollingStats()
+            engine.sync(version, keys, digests, records, today)
+            with self._lock:
+                # Another session may have built the same version meanwhile
+                engine = self._engines.setdefault(version, engine)
+                self._engines.move_to_end(version)
+                while len(self._engines) > self.keep:
+                    self._engines.popitem(last=False)
+
+        # Moves the windows when the week changed; otherwise a no-op
+        engine.sync(version, keys, digests, records, today)
+        return engine
@@ -0,0 +1,213 @@
+"""
+The Front Dashboard - Snapshot Precompute Worker
+Refreshes dashboard data outside the Streamlit request path.
+
+Fetches from BigQuery (or the Excel export), deduplicates, aggregates and
+atomically publishes a versioned snapshot that streamlit_app.py serves.
+
+Usage:
+    python precompute_data.py                          # one BigQuery refresh
+    python precompute_data.py --source excel           # one Excel refresh
+    python precompute_data.py --interval 3600          # refresh every hour
+    python precompute_data.py --backfill 2022-01-01:2025-01-01 --workers 6
+"""
+
+import argparse
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+from snapshot_store import SnapshotStore, DEFAULT_SNAPSHOT_DIR, deduplicate_records
+
+LOCAL_CREDENTIALS_PATHS = [
+    "credentials/bigquery-service-account copy.json",
+    "credentials/bigquery-service-account.json",
+    "bigquery-service-account.json"
+]
+
+
+def get_bigquery_client(credentials_path=None, record_dir=None):
+    """Create a BigQuery client from a credentials file or default credentials."""
+    from bigquery_client import BigQueryClient, get_client_from_file, get_recording_client
+
+    if credentials_path is None:
+        for path in LOCAL_CREDENTIALS_PATHS:
+            if Path(path).exists():
+                credentials_path = path
+                break
+
+    if credentials_path:
+        client = get_client_from_file(credentials_path)
+    else:
+        # Default credentials (GCP environment)
+        client = BigQueryClient()
+
+    if record_dir:
+        # Save results for offline replay (SCOREBOARD_BQ_REPLAY_DIR)
+        client = get_recording_client(client, record_dir)
+    return client
+
+
+def fetch_from_bigquery(credentials_path=None, record_dir=None):
+    """Fetch raw records from BigQuery instructor_view."""
+    client = get_bigquery_client(credentials_path, record_dir)
+    return client.fetch_instructor_view(), "bigquery:analytics_raw.instructor_view"
+
+
+def fetch_from_excel(excel_file, sheet_name):
+    """Fetch raw records from the Excel export."""
+    from update_data import read_excel_records
+
+    if not Path(excel_file).exists():
+        raise FileNotFoundError(f"Excel file not found: {excel_file}")
+
+    return read_excel_records(excel_file, sheet_name), f"excel:{excel_file}"
+
+
+def refresh_once(args, store):
+    """Run one fetch → dedup → publish cycle. Returns the published version."""
+    started = time.perf_counter()
+
+    if args.source == "bigquery":
+        raw_records, source = fetch_from_bigquery(args.credentials, args.record)
+    else:
+        raw_records, source = fetch_from_excel(args.excel, args.sheet)
+    fetch_seconds = time.perf_counter() - started
+
+    if not raw_records:
+        raise RuntimeError(f"{source} returned no data")
+
+    records = deduplicate_records(raw_records)
+    version = store.publish(records, source, extra={
+        "raw_records": len(raw_records),
+        "fetch_seconds": round(fetch_seconds, 3),
+    })
+
+    print(f"✅ Published {version}")
+    print(f"📊 Records: {len(raw_records):,} raw → {len(records):,} unique")
+    print(f"⏱️ Fetch: {fetch_seconds:.1f}s, total: {time.perf_counter() - started:.1f}s")
+    return version
+
+
+def run_backfill(args, store):
+    """Rebuild a date range as month shards, then publish instructor_view from them."""
+    start_date, _, end_date = args.backfill.partition(":")
+    client = get_bigquery_client(args.credentials, args.record)
+
+    def report(shard, status, detail):
+        icon = {"completed": "✅", "skipped": "⏭️", "failed": "❌"}[status]
+        suffix = f" ({detail:,} rows)" if status == "completed" else f" ({detail})" if detail else ""
+        print(f"{icon} {args.table} {shard}: {status}{suffix}")
+
+    print(f"🧱 Backfill {args.table}: {start_date} → {end_date} ({args.workers} workers)")
+    summary = client.backfill(
+        args.table, start_date, end_date, store,
+        max_workers=args.workers, max_retries=args.retries,
+        force=args.force, on_shard=report,
+    )
+    print()
+    print(f"📊 Shards: {len(summary['completed'])} fetched, "
+          f"{len(summary['skipped'])} already stored, {len(summary['failed'])} failed")
+
+    if summary['failed']:
+        print("↩️ Re-run the same command to retry the failed shards")
+        return 1
+
+    if args.table == "instructor_view":
+        publish_backfill(store, start_date, end_date, summary['completed'] + summary['skipped'])
+    return 0
+
+
+def publish_backfill(store, start_date, end_date, shards):
+    """
+    Publish the served snapshot with [start_date, end_date) replaced by the backfilled shards.
+
+    Records outside the backfilled range are kept from the current LATEST,
+    so backfilling a few months never drops the rest of the history.
+    """
+    backfilled = store.load_shards("instructor_view", shards)
+    in_range = lambda record: start_date <= str(record.get('class_date') or '')[:10] < end_date
+    backfilled = [r for r in backfilled if in_range(r)]
+    backfilled_guids = {r['session_guid'] for r in backfilled if r.get('session_guid')}
+
+    current, _ = store.load_latest()
+    if current is None:
+        print("⚠️ No published snapshot to merge into; publishing the backfilled range only")
+        current = []
+    kept = [
+        r for r in current
+        if not in_range(r) and r.get('session_guid') not in backfilled_guids
+    ]
+
+    raw_records = kept + backfilled
+    records = deduplicate_records(raw_records)
+    version = store.publish(records, "bigquery:analytics_raw.instructor_view", extra={
+        "raw_records": len(raw_records),
+        "backfill": {"start_date": start_date, "end_date": end_date},
+    })
+    print(f"✅ Published {version} ({len(records):,} unique records: "
+          f"{len(current) - len(kept):,} replaced by {len(backfilled):,} backfilled)")
+    return version
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Build and publish dashboard data snapshots.")
+    parser.add_argument("--source", choices=["bigquery", "excel"], default="bigquery",
+                        help="Upstream data source (default: bigquery)")
+    parser.add_argument("--credentials", help="Path to BigQuery service account JSON")
+    parser.add_argument("--record", metavar="DIR",
+                        help="Also record BigQuery results to DIR for offline replay")
+    parser.add_argument("--excel", default="data_02_FromConfig.xlsx", help="Excel file for --source excel")
+    parser.add_argument("--sheet", default="data_02_FromConfig", help="Excel sheet for --source excel")
+    parser.add_argument("--snapshot-dir", default=DEFAULT_SNAPSHOT_DIR, help="Snapshot store directory")
+    parser.add_argument("--keep", type=int, default=5, help="Published versions to retain")
+    parser.add_argument("--interval", type=int, default=0,
+                        help="Seconds between refreshes; 0 runs once and exits")
+    parser.add_argument("--backfill", metavar="START:END",
+                        help="Backfill a date range (end exclusive) as parallel month shards")
+    parser.add_argument("--table", default="instructor_view",
+                        choices=["instructor_view", "participant_view", "check_ins_all"],
+                        help="Table to backfill (default: instructor_view)")
+    parser.add_argument("--workers", type=int, default=4, help="Shards fetched in parallel")
+    parser.add_argument("--retries", type=int, default=3, help="Attempts per shard")
+    parser.add_argument("--force", action="store_true", help="Refetch shards already stored")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    store = SnapshotStore(args.snapshot_dir, keep=args.keep)
+
+    print("=" * 60)
+    print("The Front Dashboard - Snapshot Worker")
+    print("=" * 60)
+    print(f"📂 Store: {store.root.resolve()}")
+    print(f"🔌 Source: {args.source}")
+    print()
+
+    if args.backfill:
+        return run_backfill(args, store)
+
+    while True:
+        print(f"🔄 Refresh started: {datetime.now().strftime('%Y-%m-%d %I:%M:%S %p')}")
+        try:
+            refresh_once(args, store)
+            exit_code = 0
+        except Exception as e:
+            # Keep serving the previous snapshot; the next cycle retries
+            print(f"❌ ERROR: {str(e)}")
+            exit_code = 1
+        print()
+
+        if args.interval <= 0:
+            return exit_code
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        print("👋 Worker stopped")
+        sys.exit(0)
@@ -0,0 +1,198 @@
+"""
+Embedded SQL analytics over the local snapshot for Scoreboard Dashboard.
+
+Loads the published snapshot (or the in-memory dataset) into an in-process
+DuckDB database so admins can run ad-hoc cuts - instructor x facility x
+hour, category mix per quarter - in milliseconds without a BigQuery
+round-trip.
+
+Tables:
+    sessions_raw    records exactly as stored in the snapshot
+    sessions        typed view: class_ts, class_day, bookings, attendees
+    participants    participant_view backfill shards, when present
+    class_times     start hour per session_guid from participants (empty without them)
+
+instructor_view only carries a class date, so start hours come from the
+participant_view backfill (precompute_data.py --backfill ... --table
+participant_view); sessions without participant rows have no hour.
+"""
+
+import time
+from typing import Any, Dict, List, Optional
+
+from lazy_imports import module_available, load
+from snapshot_store import SnapshotStore, DATA_FILE, SHARDS_DIR
+
+# duckdb is imported when the first engine is built
+DUCKDB_AVAILABLE = module_available("duckdb")
+
+SESSIONS_VIEW = """
+CREATE VIEW sessions AS
+SELECT
+    *,
+    TRY_CAST(class_date AS TIMESTAMP) AS class_ts,
+    CAST(TRY_CAST(class_date AS TIMESTAMP) AS DATE) AS class_day,
+    COALESCE(TRY_CAST(total_bookings AS DOUBLE), 0) AS bookings,
+    COALESCE(TRY_CAST(total_attendees AS DOUBLE), 0) AS attendees
+FROM sessions_raw
+"""
+
+CLASS_TIMES_VIEW = """
+CREATE VIEW class_times AS
+SELECT
+    session_guid,
+    min(COALESCE(hour(TRY_CAST(start_time AS TIMESTAMP)), hour(TRY_CAST(start_time AS TIME)))) AS start_hour
+FROM participants
+WHERE session_guid IS NOT NULL
+GROUP BY session_guid
+"""
+
+EMPTY_CLASS_TIMES_VIEW = """
+CREATE VIEW class_times AS
+SELECT CAST(NULL AS VARCHAR) AS session_guid, CAST(NULL AS BIGINT) AS start_hour
+WHERE false
+"""
+
+# Parameterized queries offered in the admin panel ($start_date / $end_date are ISO dates)
+SAVED_QUERIES = {
+    # hour is NULL for sessions without participant_view start times (see class_times)
+    "Instructor × facility × hour": """
+        SELECT
+            instructor_name,
+            facility,
+            class_times.start_hour AS hour,
+            count(*) AS classes,
+            sum(attendees) AS attendees,
+            round(avg(attendees), 2) AS avg_attendees
+        FROM sessions
+        LEFT JOIN class_times USING (session_guid)
+        WHERE class_day >= CAST($start_date AS DATE) AND class_day <= CAST($end_date AS DATE)
+        GROUP BY ALL
+        ORDER BY classes DESC, attendees DESC
+    """,
+    "Category mix per quarter": """
+        WITH quarterly AS (
+            SELECT
+                CAST(date_trunc('quarter', class_day) AS DATE) AS quarter,
+                parent_category,
+                count(*) AS classes,
+                sum(attendees) AS attendees
+            FROM sessions
+            WHERE class_day >= CAST($start_date AS DATE) AND class_day <= CAST($end_date AS DATE)
+            GROUP BY ALL
+        )
+        SELECT
+            *,
+            round(100 * attendees / NULLIF(sum(attendees) OVER (PARTITION BY quarter), 0), 1)
+                AS attendee_share_pct
+        FROM quarterly
+        ORDER BY quarter DESC, attendees DESC
+    """,
+    "Facility utilization by weekday": """
+        SELECT
+            facility,
+            dayname(class_day) AS weekday,
+            count(*) AS classes,
+            round(avg(attendees), 2) AS avg_attendees,
+            round(100 * sum(attendees) / NULLIF(sum(bookings), 0), 1) AS show_rate_pct
+        FROM sessions
+        WHERE class_day >= CAST($start_date AS DATE) AND class_day <= CAST($end_date AS DATE)
+        GROUP BY ALL
+        ORDER BY facility, isodow(min(class_day))
+    """,
+}
+
+
+class SnapshotAnalytics:
+    """Read-only DuckDB engine over one snapshot of the dashboard data."""
+
+    def __init__(self, data_path: Optional[str] = None, records: Optional[List[Dict[str, Any]]] = None,
+                 participants_glob: Optional[str] = None):
+        """
+        Initialize the engine. Prefer from_store() or from_records().
+
+        Args:
+            data_path: Snapshot data.json to scan
+            records: In-memory records (used when no snapshot is published)
+            participants_glob: Glob of participant_view shard files to load
+        """
+        if not DUCKDB_AVAILABLE:
+            raise ImportError("duckdb is not installed (pip install duckdb)")
+
+        duckdb = load("duckdb")
+        self._con = duckdb.connect(database=":memory:")
+        if data_path is not None:
+            self._con.execute(
+                "CREATE TABLE sessions_raw AS SELECT * FROM read_json_auto(?, format='array')",
+                [str(data_path)],
+            )
+        else:
+            pd = load("pandas")
+            frame = pd.DataFrame.from_records(records or [])
+            self._con.register("records_frame", frame)
+            self._con.execute("CREATE TABLE sessions_raw AS SELECT * FROM records_frame")
+            self._con.unregister("records_frame")
+        self._con.execute(SESSIONS_VIEW)
+
+        if participants_glob:
+            self._con.execute(
+                "CREATE TABLE participants AS "
+                "SELECT unnest(records, recursive := true) FROM read_json_auto(?)",
+                [participants_glob],
+            )
+        participant_columns = set()
+        if participants_glob:
+            participant_columns = {row[0] for row in self._con.execute("DESCRIBE participants").fetchall()}
+        if {"session_guid", "start_time"} <= participant_columns:
+            self._con.execute(CLASS_TIMES_VIEW)
+        else:
+            self._con.execute(EMPTY_CLASS_TIMES_VIEW)
+
+        # Everything is loaded; ad-hoc SQL must not read or write local files
+        self._con.execute("SET enable_external_access = false")
+
+    @classmethod
+    def from_store(cls, store: SnapshotStore, version: str) -> "SnapshotAnalytics":
+        """Build an engine over a published snapshot version."""
+        shards_dir = store.root / SHARDS_DIR / "participant_view"
+        participants_glob = str(shards_dir / "*.json") if any(shards_dir.glob("*.json")) else None
+        return cls(data_path=store.root / version / DATA_FILE, participants_glob=participants_glob)
+
+    @classmethod
+    def from_records(cls, records: List[Dict[str, Any]]) -> "SnapshotAnalytics":
+        """Build an engine over already-loaded records."""
+        return cls(records=records)
+
+    def tables(self) -> List[str]:
+        """Names of queryable tables and views."""
+        with self._con.cursor() as cur:
+            return [row[0] for row in cur.execute("SHOW TABLES").fetchall()]
+
+    def query(self, sql: str, params: Optional[Dict[str, Any]] = None, limit: int = 10000):
+        """
+        Run a read-only query and return (DataFrame, elapsed_seconds).
+
+        Args:
+            sql: A single SELECT or WITH statement; $name placeholders bind from params
+            params: Named parameter values
+            limit: Maximum rows returned
+        """
+        statement = sql.strip().rstrip(";").strip()
+        if ";" in statement:
+            raise ValueError("Only a single statement is allowed")
+        if statement.split(None, 1)[0].upper() not in ("SELECT", "WITH"):
+            raise ValueError("Only SELECT / WITH queries are allowed")
+
+        # Only bind parameters the statement actually references
+        bound = {k: v for k, v in (params or {}).items() if f"${k}" in statement}
+
+        started = time.perf_counter()
+        with self._con.cursor() as cur:
+            result = cur.execute(f"SELECT * FROM ({statement}) LIMIT {int(limit)}", bound).df()
+        return result, time.perf_counter() - started
+
+    def run_saved(self, name: str, start_date: str, end_date: str, limit: int = 10000):
+        """Run one of SAVED_QUERIES for an inclusive date range."""
+        if name not in SAVED_QUERIES:
+            raise ValueError(f"Unknown saved query: {name}")
+        return self.query(SAVED_QUERIES[name], {"start_date": start_date, "end_date": end_date}, limit)
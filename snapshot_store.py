@@ -0,0 +1,275 @@
+"""
+Snapshot Store for Scoreboard Dashboard
+Versioned, atomically published data snapshots.
+
+The precompute worker (precompute_data.py) writes snapshots here and the
+Streamlit app only ever reads the latest published version, so page loads
+never wait on BigQuery or Excel.
+
+Layout:
+    snapshots/
+        LATEST                        # name of the current published version
+        v20251107T063000123456/
+            data.json                 # deduplicated records (uncompressed JSON)
+            manifest.json             # version, source, counts, date range, aggregates
+        shards/
+            instructor_view/
+                2024-03.json          # one month of a backfill (see BigQueryClient.backfill)
+                2024-03.range         # "start_date:end_date" of that shard, read on resume
+"""
+
+import json
+import os
+import shutil
+import threading
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Dict, List, Any, Tuple
+
+DEFAULT_SNAPSHOT_DIR = os.environ.get("SCOREBOARD_SNAPSHOT_DIR", "snapshots")
+
+LATEST_FILE = "LATEST"
+DATA_FILE = "data.json"
+MANIFEST_FILE = "manifest.json"
+SHARDS_DIR = "shards"
+SHARD_RANGE_SUFFIX = ".range"
+
+# Times a reader re-reads LATEST when a concurrent publish pruned the version it saw
+READ_ATTEMPTS = 3
+
+
+def deduplicate_records(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Deduplicate records by session_guid (records without a guid are kept)."""
+    seen = set()
+    deduplicated = []
+
+    for record in records:
+        guid = record.get('session_guid')
+        if guid and guid not in seen:
+            seen.add(guid)
+            deduplicated.append(record)
+        elif not guid:
+            deduplicated.append(record)
+
+    return deduplicated
+
+
+def summarize_records(records: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Pre-aggregate the headline numbers stored alongside each snapshot."""
+    dates = [str(r['class_date'])[:10] for r in records if r.get('class_date')]
+    facilities = Counter(str(r.get('facility') or '') for r in records)
+
+    def _total(field):
+        total = 0
+        for r in records:
+            try:
+                total += float(r.get(field) or 0)
+            except (TypeError, ValueError):
+                continue
+        return total
+
+    return {
+        "records": len(records),
+        "date_min": min(dates) if dates else None,
+        "date_max": max(dates) if dates else None,
+        "total_bookings": _total('total_bookings'),
+        "total_attendees": _total('total_attendees'),
+        "facilities": dict(facilities),
+        "instructors": len({r.get('instructor_name') for r in records if r.get('instructor_name')}),
+    }
+
+
+class SnapshotStore:
+    """Reader/writer for versioned snapshot directories."""
+
+    def __init__(self, root: Optional[str] = None, keep: int = 5):
+        """
+        Initialize snapshot store.
+
+        Args:
+            root: Directory holding snapshot versions (default: snapshots/)
+            keep: Number of published versions to retain when pruning
+        """
+        self.root = Path(root or DEFAULT_SNAPSHOT_DIR)
+        self.keep = keep
+
+    def latest_version(self) -> Optional[str]:
+        """Return the currently published version, or None if nothing is published."""
+        latest = self.root / LATEST_FILE
+        for _ in range(READ_ATTEMPTS):
+            try:
+                version = latest.read_text(encoding='utf-8').strip()
+            except OSError:
+                return None
+
+            if version and (self.root / version / DATA_FILE).exists():
+                return version
+            # A publish may have pruned the version after we read the pointer
+            if latest.read_text(encoding='utf-8').strip() == version:
+                return None
+        return None
+
+    def versions(self) -> List[str]:
+        """List published versions, oldest first."""
+        if not self.root.exists():
+            return []
+        return sorted(
+            p.name for p in self.root.iterdir()
+            if p.is_dir() and p.name.startswith('v') and (p / MANIFEST_FILE).exists()
+        )
+
+    def read_manifest(self, version: str) -> Dict[str, Any]:
+        """Read the manifest for a published version."""
+        with open(self.root / version / MANIFEST_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def load(self, version: str) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """Read and parse the records of a published version."""
+        data_path = self.root / version / DATA_FILE
+        with open(data_path, 'rb') as f:
+            content = f.read()
+        records = json.loads(content) if content else []
+        return records, self.read_manifest(version)
+
+    def load_latest(self) -> Tuple[Optional[List[Dict[str, Any]]], Optional[Dict[str, Any]]]:
+        """Load the latest published version, or (None, None) if there is none."""
+        for attempt in range(READ_ATTEMPTS):
+            version = self.latest_version()
+            if version is None:
+                return None, None
+            try:
+                return self.load(version)
+            except FileNotFoundError:
+                # Pruned between reading LATEST and opening it; read the pointer again
+                if attempt == READ_ATTEMPTS - 1:
+                    raise
+        return None, None
+
+    def publish(self, records: List[Dict[str, Any]], source: str,
+                extra: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Write a new version and atomically point LATEST at it.
+
+        The version directory is fully written under a temporary name and
+        renamed into place before LATEST is swapped, so readers only ever
+        see complete snapshots.
+
+        Returns:
+            The published version name.
+        """
+        self.root.mkdir(parents=True, exist_ok=True)
+        published_at = datetime.now()
+        version = "v" + published_at.strftime("%Y%m%dT%H%M%S%f")
+
+        staging = self.root / f".staging-{version}"
+        staging.mkdir()
+        try:
+            with open(staging / DATA_FILE, 'w', encoding='utf-8') as f:
+                json.dump(records, f, separators=(',', ':'), default=str)
+
+            manifest = {
+                "version": version,
+                "source": source,
+                "published_at": published_at.isoformat(),
+                "summary": summarize_records(records),
+            }
+            if extra:
+                manifest.update(extra)
+            with open(staging / MANIFEST_FILE, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, indent=2, default=str)
+
+            os.replace(staging, self.root / version)
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        self._write_atomic(self.root / LATEST_FILE, version)
+        self.prune()
+        return version
+
+    def prune(self) -> List[str]:
+        """Remove old versions beyond `keep`, never touching the published one."""
+        latest = self.latest_version()
+        removed = []
+        old_versions = self.versions()[:-self.keep] if self.keep > 0 else []
+        for version in old_versions:
+            if version == latest:
+                continue
+            shutil.rmtree(self.root / version, ignore_errors=True)
+            removed.append(version)
+        return removed
+
+    def shard_path(self, table_key: str, shard: str) -> Path:
+        """Path of one backfill shard file."""
+        return self.root / SHARDS_DIR / table_key / f"{shard}.json"
+
+    def has_shard(self, table_key: str, shard: str, start_date: str, end_date: str) -> bool:
+        """True if the shard was already written for exactly this date range."""
+        path = self.shard_path(table_key, shard)
+        if not path.exists():
+            return False
+        expected = f"{start_date}:{end_date}"
+        range_path = path.with_suffix(SHARD_RANGE_SUFFIX)
+        try:
+            return range_path.read_text(encoding='utf-8').strip() == expected
+        except OSError:
+            pass
+
+        # Shard written before range files existed: parse it once and record its range
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return False
+        stored_range = f"{stored.get('start_date')}:{stored.get('end_date')}"
+        try:
+            self._write_atomic(range_path, stored_range)
+        except OSError:
+            pass
+        return stored_range == expected
+
+    def write_shard(self, table_key: str, shard: str, start_date: str, end_date: str,
+                    records: List[Dict[str, Any]]) -> Path:
+        """Atomically write one backfill shard, then its range file."""
+        path = self.shard_path(table_key, shard)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        range_path = path.with_suffix(SHARD_RANGE_SUFFIX)
+        # A stale range must never vouch for data being rewritten
+        range_path.unlink(missing_ok=True)
+        payload = {
+            "table": table_key,
+            "shard": shard,
+            "start_date": start_date,
+            "end_date": end_date,
+            "written_at": datetime.now().isoformat(),
+            "records": records,
+        }
+        self._write_atomic(path, json.dumps(payload, separators=(',', ':'), default=str))
+        self._write_atomic(range_path, f"{start_date}:{end_date}")
+        return path
+
+    def shards(self, table_key: str) -> List[str]:
+        """List stored shard names for a table, oldest first."""
+        table_dir = self.root / SHARDS_DIR / table_key
+        if not table_dir.exists():
+            return []
+        return sorted(p.stem for p in table_dir.glob("*.json"))
+
+    def load_shards(self, table_key: str, shards: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Concatenate the records of the given shards (default: every stored shard) for a table."""
+        records = []
+        for shard in sorted(shards) if shards is not None else self.shards(table_key):
+            with open(self.shard_path(table_key, shard), 'r', encoding='utf-8') as f:
+                records.extend(json.load(f)['records'])
+        return records
+
+    @staticmethod
+    def _write_atomic(path: Path, text: str):
+        """Write a small text file via rename so readers never see partial content."""
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
@@ -16,13 +16,33 @@ import gzip
 from pathlib import Path
 from datetime import datetime, timedelta
 import os
+import tempfile
 
-# BigQuery integration
-try:
-    from bigquery_client import BigQueryClient, get_client_from_streamlit_secrets, get_client_from_file
-    BIGQUERY_AVAILABLE = True
-except ImportError:
-    BIGQUERY_AVAILABLE = False
+from snapshot_store import SnapshotStore, deduplicate_records
+from single_flight import SingleFlight
+from data_refresh import StaleWhileRevalidate
+from snapshot_analytics import SnapshotAnalytics, SAVED_QUERIES, DUCKDB_AVAILABLE
+from data_export import (filter_records, iter_participant_rows, export_to_file, ExportDirectory,
+                         SESSION_COLUMNS, PARTICIPANT_COLUMNS, PARQUET_AVAILABLE)
+from dashboard_sync import DatasetVersions, build_component, COMPONENT_NAME, DASHBOARD_COMPONENT_KEY
+from performance_stats import RollingStatsCache, WINDOWS, MIN_CLASSES
+from lazy_imports import module_available, deferred_imports
+
+# Incremental dashboard sync (see dashboard_sync.py); set to 0 to embed the full dataset instead
+DASHBOARD_SYNC = os.environ.get("SCOREBOARD_DASHBOARD_SYNC", "1") != "0"
+DASHBOARD_COMPONENT_DIR = os.environ.get(
+    "SCOREBOARD_COMPONENT_DIR", os.path.join(tempfile.gettempdir(), "scoreboard_dashboard")
+)
+DASHBOARD_HEIGHT = 3000
+
+# Offline record/replay of BigQuery results (see bigquery_backends.py)
+BIGQUERY_REPLAY_DIR = os.environ.get("SCOREBOARD_BQ_REPLAY_DIR")
+BIGQUERY_RECORD_DIR = os.environ.get("SCOREBOARD_BQ_RECORD_DIR")
+
+# BigQuery integration (google-cloud-bigquery is imported on the first live query)
+BIGQUERY_AVAILABLE = bool(BIGQUERY_REPLAY_DIR) or (
+    module_available("google.cloud.bigquery") and module_available("google.oauth2")
+)
 
 # Page configuration
 st.set_page_config(
@@ -88,28 +108,56 @@ def check_access():
         st.info("💡 Hint: Check with your administrator for access")
         st.stop()
 
-@st.cache_data(ttl=86400)  # Cache for 24 hours
-def load_data_from_bigquery():
-    """Load data from BigQuery with 24-hour cache."""
+@st.cache_resource
+def get_load_coalescer():
+    """Process-wide single-flight group shared by every session."""
+    return SingleFlight()
+
+
+def get_bigquery_client():
+    """Create a BigQuery client from replay recordings, secrets or a local file."""
+    from bigquery_client import (
+        get_client_from_streamlit_secrets, get_client_from_file,
+        get_client_from_replay, get_recording_client
+    )
+
+    if BIGQUERY_REPLAY_DIR:
+        # Offline replay with optional simulated latency/paging/failures
+        return get_client_from_replay(
+            BIGQUERY_REPLAY_DIR,
+            latency=float(os.environ.get("SCOREBOARD_BQ_REPLAY_LATENCY", 0)),
+            page_size=int(os.environ.get("SCOREBOARD_BQ_REPLAY_PAGE_SIZE", 0)) or None,
+            page_latency=float(os.environ.get("SCOREBOARD_BQ_REPLAY_PAGE_LATENCY", 0)),
+            failure_rate=float(os.environ.get("SCOREBOARD_BQ_REPLAY_FAILURE_RATE", 0)),
+        )
+
+    client = None
+    # Try Streamlit secrets first (for Streamlit Cloud)
+    if hasattr(st, 'secrets') and 'gcp_service_account' in st.secrets:
+        client = get_client_from_streamlit_secrets(st.secrets)
+    else:
+        # Try local credentials file
+        local_creds_paths = [
+            "credentials/bigquery-service-account copy.json",
+            "credentials/bigquery-service-account.json",
+            "bigquery-service-account.json"
+        ]
+        for creds_path in local_creds_paths:
+            if Path(creds_path).exists():
+                client = get_client_from_file(creds_path)
+                break
+
+    if client is not None and BIGQUERY_RECORD_DIR:
+        client = get_recording_client(client, BIGQUERY_RECORD_DIR)
+    return client
+
+
+def fetch_bigquery_data():
+    """Fetch instructor_view from BigQuery (uncached)."""
     try:
-        # Try Streamlit secrets first (for Streamlit Cloud)
-        if hasattr(st, 'secrets') and 'gcp_service_account' in st.secrets:
-            client = get_client_from_streamlit_secrets(st.secrets)
-        else:
-            # Try local credentials file
-            local_creds_paths = [
-                "credentials/bigquery-service-account copy.json",
-                "credentials/bigquery-service-account.json",
-                "bigquery-service-account.json"
-            ]
-            client = None
-            for creds_path in local_creds_paths:
-                if Path(creds_path).exists():
-                    client = get_client_from_file(creds_path)
-                    break
-
-            if client is None:
-                return None, "No BigQuery credentials found", None
+        client = get_bigquery_client()
+        if client is None:
+            return None, "No BigQuery credentials found", None
 
         # Fetch data from instructor_view
         data = client.fetch_instructor_view()
@@ -123,6 +171,23 @@ def load_data_from_bigquery():
         return None, f"BigQuery error: {str(e)}", None
 
 
+@st.cache_data(ttl=86400)  # Cache for 24 hours
+def load_data_from_bigquery():
+    """Load data from BigQuery with 24-hour cache."""
+    return fetch_bigquery_data()
+
+
+def load_data_from_bigquery_coalesced():
+    """
+    Cached BigQuery load shared by concurrent sessions.
+
+    Sessions arriving while a load is in flight (TTL expiry, Refresh while
+    others are active) wait on it here instead of queueing on the cache,
+    which is what the coalescing metrics count.
+    """
+    return get_load_coalescer().do("bigquery:instructor_view", load_data_from_bigquery)
+
+
 @st.cache_data(ttl=60)  # Cache for 1 minute (file-based fallback)
 def load_data_from_file():
     """Load data from local files (fallback)."""
@@ -156,13 +221,45 @@ def load_data_from_file():
     return None, "No data files found", None
 
 
-def load_dashboard_data(use_bigquery=True, force_refresh=False):
+@st.cache_resource(max_entries=2)  # Keyed by version, so a new publish is a cache miss
+def load_data_from_snapshot(version):
+    """
+    Load a published snapshot (built offline by precompute_data.py).
+
+    Cached as a resource: every session shares one parsed copy of the
+    records instead of unpickling its own on each hit. Callers must not
+    mutate the returned records.
     """
-    Load data from BigQuery or file fallback.
+    try:
+        data, manifest = SnapshotStore().load(version)
+        published_at = datetime.fromisoformat(manifest['published_at'])
+        return data, f"snapshot:{version}", published_at
+    except Exception as e:
+        return None, f"Snapshot error: {str(e)}", None
+
+
+@st.cache_resource
+def get_revalidating_loader():
+    """Process-wide stale-while-revalidate loader for BigQuery data."""
+    return StaleWhileRevalidate(
+        # Own key: a background refresh must not reuse a cached foreground load
+        fetch=lambda: get_load_coalescer().do("bigquery:instructor_view:revalidate", fetch_bigquery_data),
+        fallback=load_data_from_file,
+        store=SnapshotStore(),
+    )
+
+
+def load_dashboard_data(use_bigquery=True, force_refresh=False, serve_stale=False):
+    """
+    Load data from a published snapshot, BigQuery, or file fallback.
+
+    Snapshots are published by precompute_data.py; when one exists the
+    BigQuery path is served from it and never blocks on the warehouse.
 
     Args:
         use_bigquery: Whether to try BigQuery first
         force_refresh: Force cache clear and reload
+        serve_stale: Serve the last good snapshot and refresh BigQuery in the background
 
     Returns:
         Tuple of (data, source, timestamp)
@@ -171,10 +268,29 @@ def load_dashboard_data(use_bigquery=True, force_refresh=False):
         # Clear caches
         load_data_from_bigquery.clear()
         load_data_from_file.clear()
+        load_data_from_snapshot.clear()
+
+    # Stale-while-revalidate: return immediately, refresh in a background thread
+    if use_bigquery and serve_stale and BIGQUERY_AVAILABLE:
+        loader = get_revalidating_loader()
+        if force_refresh:
+            loader.refresh()
+        data, source, timestamp = loader.get()
+        if data:
+            return data, source, timestamp
+
+    # Prefer the latest published snapshot (only a small pointer file is read here)
+    if use_bigquery:
+        version = SnapshotStore().latest_version()
+        if version:
+            data, source, timestamp = load_data_from_snapshot(version)
+            if data:
+                return data, source, timestamp
+            st.session_state['snapshot_error'] = source
 
     # Try BigQuery first if available and requested
     if use_bigquery and BIGQUERY_AVAILABLE:
-        data, source, timestamp = load_data_from_bigquery()
+        data, source, timestamp = load_data_from_bigquery_coalesced()
         if data:
             return data, source, timestamp
         # BigQuery failed, log the error
@@ -196,192 +312,244 @@ def load_file_content(filename):
 
 def deduplicate_data(data):
     """Deduplicate data by session_guid - critical fix for SOMA inflation"""
-    seen = set()
-    deduplicated = []
-    
-    for record in data:
-        guid = record.get('session_guid')
-        if guid and guid not in seen:
-            seen.add(guid)
-            deduplicated.append(record)
-        elif not guid:
-            deduplicated.append(record)
-    
-    return deduplicated
+    return deduplicate_records(data)
 
-def main():
-    """Main application"""
-    check_access()
+@st.cache_resource
+def get_dataset_versions():
+    """Process-wide log of recent dataset versions, shared by every session's deltas."""
+    return DatasetVersions()
 
-    # Initialize session state
-    if 'use_bigquery' not in st.session_state:
-        st.session_state.use_bigquery = True
-    if 'force_refresh' not in st.session_state:
-        st.session_state.force_refresh = False
+@st.cache_resource
+def get_rolling_stats():
+    """Process-wide rolling-window statistics per dataset version, derived by row diffs."""
+    return RollingStatsCache()
 
-    # Sidebar - FIRST
-    st.sidebar.title("📊 Scoreboard")
-    st.sidebar.markdown("### Version 3.1")
-    st.sidebar.markdown("---")
+@st.cache_resource
+def get_dashboard_component(shell_id, component_path):
+    """Declare the dashboard component for one build of the page."""
+    return st.components.v1.declare_component(f"{COMPONENT_NAME}_{shell_id}", path=component_path)
 
-    # Data source toggle
-    st.sidebar.markdown("### Data Source")
+def render_dashboard_component(document, data, fingerprint):
+    """
+    Mount the dashboard once and push only changed rows on later reruns.
 
-    if BIGQUERY_AVAILABLE:
-        use_bigquery = st.sidebar.toggle(
-            "Use BigQuery (Live)",
-            value=st.session_state.use_bigquery,
-            help="Toggle between live BigQuery data and local file"
-        )
-        st.session_state.use_bigquery = use_bigquery
-    else:
-        st.sidebar.warning("BigQuery not available")
-        use_bigquery = False
+    The browser acknowledges the data version it holds (component value);
+    each rerun sends the delta from that version, or nothing when current.
 
-    # Refresh button
-    col1, col2 = st.sidebar.columns(2)
-    with col1:
-        if st.button("🔄 Refresh", use_container_width=True, help="Clear cache and reload data"):
-            st.session_state.force_refresh = True
-            st.rerun()
+    Returns:
+        Delta info (reset, upserts, deletes, bytes) when rows were sent, else None.
+    """
+    shell_id, component_path = build_component(DASHBOARD_COMPONENT_DIR, document)
+    dashboard = get_dashboard_component(shell_id, str(component_path))
 
-    # Load data
-    force_refresh = st.session_state.get('force_refresh', False)
-    if force_refresh:
-        st.session_state.force_refresh = False
+    versions = get_dataset_versions()
+    version = versions.register(data, fingerprint)
 
-    raw_data, data_source, data_timestamp = load_dashboard_data(
-        use_bigquery=use_bigquery,
-        force_refresh=force_refresh
+    # Reported by dashboard_bridge.js after each applied delta
+    ack = st.session_state.get(DASHBOARD_COMPONENT_KEY) or {}
+    base = ack.get('version') if ack.get('shell') == shell_id else None
+
+    delta, info, encoding = None, None, None
+    if base != version:
+        compress = ack.get('gzip', True)
+        delta, info = versions.delta(base, version, data, compress=compress)
+        info = dict(info, bytes=len(delta))
+        encoding = "gzip" if compress else "json"
+
+    dashboard(
+        delta=delta,
+        encoding=encoding,
+        version=version,
+        base=base,
+        reset=bool(info and info['reset']),
+        is_admin=st.session_state.get('is_admin', False),
+        height=DASHBOARD_HEIGHT,
+        key=DASHBOARD_COMPONENT_KEY,
+        default=None,
     )
+    return info
 
-    # Deduplicate data
-    if raw_data:
-        data = deduplicate_data(raw_data)
-    else:
-        data = []
+@st.cache_resource(max_entries=2)
+def get_snapshot_analytics(data_source, _records):
+    """DuckDB engine over the served data, built once per data version."""
+    if data_source and data_source.startswith("snapshot:"):
+        return SnapshotAnalytics.from_store(SnapshotStore(), data_source.replace("snapshot:", ""))
+    return SnapshotAnalytics.from_records(_records)
 
-    # Data info in sidebar
-    st.sidebar.markdown("---")
-    st.sidebar.markdown("### Data Status")
 
-    if data:
-        # Show source indicator
-        if data_source and data_source.startswith("bigquery:"):
-            st.sidebar.success("🔗 Connected to BigQuery")
-            source_display = data_source.replace("bigquery:", "")
-        elif data_source and data_source.startswith("file:"):
-            st.sidebar.info("📁 Using Local File")
-            source_display = data_source.replace("file:", "")
-        else:
-            source_display = data_source or "Unknown"
+def render_admin_query_panel(data, data_source, data_timestamp):
+    """Admin-only ad-hoc SQL over the local snapshot (no BigQuery cost)."""
+    with st.expander("🦆 Ad-hoc Analytics (Admin)", expanded=False):
+        if not DUCKDB_AVAILABLE:
+            st.warning("DuckDB not installed - run `pip install duckdb` to enable ad-hoc analytics")
+            return
 
-        # Show metrics
-        col1, col2 = st.sidebar.columns(2)
+        cache_key = data_source
+        if not data_source.startswith("snapshot:"):
+            # Timestamp distinguishes reloads of the same file/BigQuery source
+            cache_key = f"{data_source}@{data_timestamp.isoformat() if data_timestamp else ''}"
+
+        try:
+            engine = get_snapshot_analytics(cache_key, data)
+        except Exception as e:
+            st.error(f"❌ Could not load snapshot into DuckDB: {str(e)}")
+            return
+
+        col1, col2, col3 = st.columns([2, 1, 1])
         with col1:
-            st.metric("Raw Records", f"{len(raw_data):,}")
+            query_name = st.selectbox("Query", list(SAVED_QUERIES) + ["Custom SQL"], key="adhoc_query_name")
         with col2:
-            st.metric("Unique", f"{len(data):,}")
+            start_date = st.date_input("From", value=datetime.now().date() - timedelta(days=365), key="adhoc_start")
+        with col3:
+            end_date = st.date_input("To", value=datetime.now().date(), key="adhoc_end")
 
-        # Show source info
-        st.sidebar.caption(f"📊 {source_display}")
+        default_sql = SAVED_QUERIES.get(query_name, "SELECT * FROM sessions LIMIT 100")
+        sql = st.text_area(
+            "SQL",
+            value=default_sql.strip(),
+            height=220,
+            key=f"adhoc_sql_{query_name}",
+            help=f"Read-only. Tables: {', '.join(engine.tables())}. "
+                 "Use $start_date / $end_date for the dates above."
+        )
 
-        # Show timestamp
-        if data_timestamp:
-            st.sidebar.caption(f"📅 Updated: {data_timestamp.strftime('%Y-%m-%d %I:%M %p')}")
+        if st.button("▶️ Run Query", key="adhoc_run"):
+            try:
+                result, elapsed = engine.query(sql, {
+                    "start_date": start_date.isoformat(),
+                    "end_date": end_date.isoformat(),
+                })
+                st.caption(f"⚡ {len(result):,} rows in {elapsed * 1000:.0f} ms")
+                st.dataframe(result, use_container_width=True)
+            except Exception as e:
+                st.error(f"❌ Query failed: {str(e)}")
 
-        # Show BigQuery error if any
-        if 'bigquery_error' in st.session_state and not data_source.startswith("bigquery:"):
-            with st.sidebar.expander("⚠️ BigQuery Status", expanded=False):
-                st.warning(st.session_state['bigquery_error'])
-    else:
-        st.sidebar.error("❌ No Data Found")
-        if 'bigquery_error' in st.session_state:
-            st.error(f"BigQuery: {st.session_state['bigquery_error']}")
-        st.error("No data available. Check BigQuery connection or run UPDATE_DATA.bat for local file.")
-        st.stop()
 
-    # Control buttons
-    st.sidebar.markdown("---")
-    
-    if st.sidebar.button("🚪 Logout", use_container_width=True):
-        st.session_state.authenticated = False
-        st.rerun()
-    
-    # Info section
-    st.sidebar.markdown("---")
-    st.sidebar.markdown("### ℹ️ Quick Guide")
-    with st.sidebar.expander("📖 How to Use", expanded=False):
-        st.markdown("""
-        **Getting Started:**
-        1. Select date range (optional)
-        2. Toggle "Compare Year-over-Year" for annual comparisons
-        3. Choose filters (instructor, facility, category)
-        4. Click "Apply Filters"
-        
-        **New in 3.0:**
-        - ✨ Year-over-year comparison toggle
-        - 🔧 Fixed SOMA data duplicates
-        - 📊 Improved filter responsiveness
-        - 📅 Real data file timestamps
-        
-        **Tips:**
-        - Leave dates blank to see all data
-        - Select dates to enable comparisons
-        - Use facility toggles for multi-location view
-        - Export data via buttons below KPIs
-        
-        **Need Help?**
-        Contact Chief of Staff for assistance.
-        """)
-    
-    # Hide Streamlit branding
-    st.markdown("""
-    <style>
-    /* Hide Streamlit elements */
-    #MainMenu {visibility: hidden;}
-    footer {visibility: hidden;}
-    header[data-testid="stHeader"] {background-color: transparent;}
-    
-    /* Main container */
-    .main .block-container {
-        padding-top: 1rem;
-        padding-bottom: 1rem;
-        max-width: none;
-    }
-    
-    /* Sidebar */
-    section[data-testid="stSidebar"] > div {
-        padding-top: 2rem;
-    }
-    
-    /* Dashboard iframe */
-    iframe {
-        border: none;
-        display: block;
-    }
-    </style>
-    """, unsafe_allow_html=True)
-    
-    # Load dashboard files
-    html_content = load_file_content("index.html")
-    css_content = load_file_content("styles.css")
-    js_content = load_file_content("app.js")
-    category_js = load_file_content("category_analysis.js")
-    
-    if not html_content:
-        st.error("❌ Dashboard files not found")
-        st.info("Expected: index.html, styles.css, app.js")
-        return
-    
-    # Extract body content
-    if '<body>' in html_content and '</body>' in html_content:
-        body_content = html_content.split('<body>')[1].split('</body>')[0]
-    else:
-        body_content = html_content
-    
-    # Build complete dashboard
-    complete_dashboard = f"""
+def discard_exports():
+    """Delete this session's export files (logout)."""
+    export_dir = st.session_state.pop('export_dir', None)
+    if export_dir is not None:
+        export_dir.cleanup()
+
+
+def render_export_panel(data):
+    """Admin-only server-side filtered export, streamed to a file in constant memory."""
+    with st.expander("📤 Server Export (CSV / Parquet)", expanded=False):
+        st.caption("Exports from the server-side snapshot - faster than the in-dashboard buttons for large exports.")
+
+        use_dates = st.checkbox("Limit to date range", key="export_use_dates")
+        date_from = date_to = None
+        if use_dates:
+            col1, col2 = st.columns(2)
+            with col1:
+                date_from = st.date_input("From", value=datetime.now().date() - timedelta(days=90), key="export_from")
+            with col2:
+                date_to = st.date_input("To", value=datetime.now().date(), key="export_to")
+
+        instructors = sorted({r['instructor_name'] for r in data if r.get('instructor_name')})
+        facilities = sorted({r['facility'] for r in data if r.get('facility')})
+        categories = sorted({r['greatgrandparent_category'] for r in data if r.get('greatgrandparent_category')})
+
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            instructor = st.selectbox("Instructor", ["All"] + instructors, key="export_instructor")
+        with col2:
+            selected_facilities = st.multiselect("Facilities", facilities, key="export_facilities")
+        with col3:
+            selected_categories = st.multiselect("Categories", categories, key="export_categories")
+
+        formats = ["CSV", "Parquet"] if PARQUET_AVAILABLE else ["CSV"]
+        export_format = st.radio("Format", formats, horizontal=True, key="export_format").lower()
+
+        include_participants = st.checkbox(
+            "Participant-level rows (from participant_view backfill)",
+            key="export_participants"
+        )
+
+        if st.button("⚙️ Prepare Export", key="export_prepare"):
+            filters = dict(
+                date_from=date_from.isoformat() if date_from else None,
+                date_to=date_to.isoformat() if date_to else None,
+                instructor=None if instructor == "All" else instructor,
+                facilities=selected_facilities,
+                categories=selected_categories,
+            )
+            rows = filter_records(data, **filters)
+            columns = SESSION_COLUMNS
+            if include_participants:
+                rows = iter_participant_rows(rows)
+                columns = PARTICIPANT_COLUMNS
+
+            # Per-session directory, removed on logout or when the session ends
+            if 'export_dir' not in st.session_state:
+                st.session_state.export_dir = ExportDirectory()
+            try:
+                export_path = export_to_file(rows, export_format, directory=str(st.session_state.export_dir.path),
+                                             columns=columns)
+            except Exception as e:
+                st.error(f"❌ Export failed: {str(e)}")
+            else:
+                # Read once for this run only; the file is gone before the next rerun
+                size_mb = export_path.stat().st_size / (1024 * 1024)
+                with open(export_path, 'rb') as f:
+                    st.download_button(
+                        f"⬇️ Download ({size_mb:.1f} MB)",
+                        data=f,
+                        file_name=f"front_dashboard_data_{datetime.now().strftime('%Y-%m-%d')}{export_path.suffix}",
+                        mime="text/csv" if export_path.suffix == ".csv" else "application/octet-stream",
+                        key="export_download"
+                    )
+                export_path.unlink(missing_ok=True)
+                st.caption("The download is offered once - prepare the export again after changing anything.")
+
+
+def render_leaderboard_panel(data, fingerprint):
+    """Top/bottom instructors, classes and facilities over rolling 4/12/52-week windows."""
+    with st.expander("🏆 Rolling Leaderboards", expanded=False):
+        versions = get_dataset_versions()
+        version = versions.register(data, fingerprint)
+        # Engine for exactly this session's data version; its leaderboards never mix versions
+        stats = get_rolling_stats().get(version, *versions.digests(version, data), data)
+
+        col1, col2, col3 = st.columns([2, 2, 1])
+        with col1:
+            dimension = st.radio("Rank", ["Instructor", "Class", "Facility"],
+                                 horizontal=True, key="leaderboard_dimension").lower()
+        with col2:
+            window = st.select_slider("Window", options=list(WINDOWS), value=WINDOWS[1],
+                                      format_func=lambda weeks: f"{weeks} weeks", key="leaderboard_window")
+        with col3:
+            k = st.number_input("Show", min_value=3, max_value=50, value=10, step=1, key="leaderboard_k")
+
+        window_range = stats.window_range(window)
+        if window_range is None:
+            st.info("📭 No dated classes to rank")
+            return
+        st.caption(
+            f"📅 {window_range[0].strftime('%b %d, %Y')} – {window_range[1].strftime('%b %d, %Y')} · "
+            f"average attendees per class, minimum {MIN_CLASSES} classes"
+        )
+
+        col1, col2 = st.columns(2)
+        with col1:
+            st.markdown("**⬆️ Top**")
+            top = stats.leaderboard(dimension, window, int(k))
+            if top:
+                st.dataframe(top, use_container_width=True, hide_index=True)
+            else:
+                st.caption("No one with enough classes in this window")
+        with col2:
+            st.markdown("**⬇️ Bottom**")
+            bottom = stats.leaderboard(dimension, window, int(k), bottom=True)
+            if bottom:
+                st.dataframe(bottom, use_container_width=True, hide_index=True)
+            else:
+                st.caption("No one with enough classes in this window")
+
+
+def build_dashboard_document(body_content, css_content, category_js, js_content, data_script, frame_css=""):
+    """Assemble the dashboard page from index.html, styles.css and the scripts"""
+    return f"""
     <!DOCTYPE html>
     <html lang="en">
     <head>
@@ -573,17 +741,14 @@ def main():
         .toggle-group input[type="checkbox"]:checked + span {{
             font-weight: 600;
         }}
+        {frame_css}
         </style>
     </head>
     <body>
         {body_content}
         
         <script>
-        // Inject deduplicated data
-        window.dashboardData = {json.dumps(data)};
-        
-        // Inject admin access status
-        window.isAdmin = {str(st.session_state.get('is_admin', False)).lower()};
+        {data_script}
         
         // Category analysis
         {category_js}
@@ -594,7 +759,7 @@ def main():
         // Auto-initialize
         if (typeof loadData === 'function') {{
             document.addEventListener('DOMContentLoaded', function() {{
-                console.log('📊 Scoreboard 3.0 loaded with', window.dashboardData.length, 'unique records');
+                console.log('📊 Scoreboard 3.0 loaded');
                 loadData();
             }});
         }}
@@ -602,9 +767,273 @@ def main():
     </body>
     </html>
     """
+
+def main():
+    """Main application"""
+    check_access()
+
+    # Initialize session state
+    if 'use_bigquery' not in st.session_state:
+        st.session_state.use_bigquery = True
+    if 'force_refresh' not in st.session_state:
+        st.session_state.force_refresh = False
+    if 'serve_stale' not in st.session_state:
+        st.session_state.serve_stale = True
+
+    # Sidebar - FIRST
+    st.sidebar.title("📊 Scoreboard")
+    st.sidebar.markdown("### Version 3.1")
+    st.sidebar.markdown("---")
+
+    # Data source toggle
+    st.sidebar.markdown("### Data Source")
+
+    if BIGQUERY_AVAILABLE:
+        use_bigquery = st.sidebar.toggle(
+            "Use BigQuery (Live)",
+            value=st.session_state.use_bigquery,
+            help="Toggle between live BigQuery data and local file"
+        )
+        st.session_state.use_bigquery = use_bigquery
+
+        if use_bigquery:
+            serve_stale = st.sidebar.toggle(
+                "Instant Load (refresh in background)",
+                value=st.session_state.serve_stale,
+                help="Show the last good snapshot immediately while BigQuery refreshes in the background"
+            )
+            st.session_state.serve_stale = serve_stale
+    else:
+        st.sidebar.warning("BigQuery not available")
+        use_bigquery = False
+
+    # Refresh button
+    col1, col2 = st.sidebar.columns(2)
+    with col1:
+        if st.button("🔄 Refresh", use_container_width=True, help="Clear cache and reload data"):
+            st.session_state.force_refresh = True
+            st.rerun()
+
+    # Load data
+    force_refresh = st.session_state.get('force_refresh', False)
+    if force_refresh:
+        st.session_state.force_refresh = False
+
+    raw_data, data_source, data_timestamp = load_dashboard_data(
+        use_bigquery=use_bigquery,
+        force_refresh=force_refresh,
+        serve_stale=st.session_state.serve_stale
+    )
+
+    # Deduplicate data
+    if raw_data:
+        data = deduplicate_data(raw_data)
+    else:
+        data = []
+
+    # Data info in sidebar
+    st.sidebar.markdown("---")
+    st.sidebar.markdown("### Data Status")
+
+    if data:
+        # Show source indicator
+        if data_source and data_source.startswith("bigquery:"):
+            st.sidebar.success("🔗 Connected to BigQuery")
+            source_display = data_source.replace("bigquery:", "")
+        elif data_source and data_source.startswith("snapshot:"):
+            st.sidebar.success("📦 Using Published Snapshot")
+            source_display = data_source.replace("snapshot:", "")
+        elif data_source and data_source.startswith("file:"):
+            st.sidebar.info("📁 Using Local File")
+            source_display = data_source.replace("file:", "")
+        else:
+            source_display = data_source or "Unknown"
+
+        # Show metrics
+        col1, col2 = st.sidebar.columns(2)
+        with col1:
+            st.metric("Raw Records", f"{len(raw_data):,}")
+        with col2:
+            st.metric("Unique", f"{len(data):,}")
+
+        # Show source info
+        st.sidebar.caption(f"📊 {source_display}")
+
+        # Show timestamp
+        if data_timestamp:
+            st.sidebar.caption(f"📅 Updated: {data_timestamp.strftime('%Y-%m-%d %I:%M %p')}")
+
+        # Show background refresh state (stale-while-revalidate)
+        if use_bigquery and st.session_state.serve_stale and BIGQUERY_AVAILABLE:
+            refresh_status = get_revalidating_loader().status()
+            st.sidebar.caption(f"🗂️ Serving: {refresh_status['served'] or data_source}")
+            if refresh_status['pending']:
+                st.sidebar.caption(
+                    f"⏳ Refreshing from BigQuery since "
+                    f"{refresh_status['pending_since'].strftime('%I:%M %p')} "
+                    f"(shown on your next interaction)"
+                )
+            if refresh_status['last_error']:
+                st.sidebar.caption(f"⚠️ Last refresh failed: {refresh_status['last_error']}")
+
+        # Show load coalescing metrics (admin only)
+        if st.session_state.get('is_admin', False):
+            load_stats = get_load_coalescer().stats()
+            st.sidebar.caption(
+                f"🔀 Loads: {load_stats['calls']:,} requested, "
+                f"{load_stats['coalesced']:,} coalesced"
+            )
+            import_costs = deferred_imports()
+            if import_costs:
+                st.sidebar.caption(
+                    "⏱️ Deferred imports: "
+                    + ", ".join(f"{name} {seconds:.2f}s" for name, seconds in import_costs.items())
+                )
+
+        # Show BigQuery error if any
+        if 'bigquery_error' in st.session_state and not data_source.startswith(("bigquery:", "snapshot:")):
+            with st.sidebar.expander("⚠️ BigQuery Status", expanded=False):
+                st.warning(st.session_state['bigquery_error'])
+    else:
+        st.sidebar.error("❌ No Data Found")
+        if 'bigquery_error' in st.session_state:
+            st.error(f"BigQuery: {st.session_state['bigquery_error']}")
+        st.error("No data available. Check BigQuery connection or run UPDATE_DATA.bat for local file.")
+        st.stop()
+
+    # Control buttons
+    st.sidebar.markdown("---")
     
+    if st.sidebar.button("🚪 Logout", use_container_width=True):
+        discard_exports()
+        st.session_state.authenticated = False
+        st.rerun()
+    
+    # Info section
+    st.sidebar.markdown("---")
+    st.sidebar.markdown("### ℹ️ Quick Guide")
+    with st.sidebar.expander("📖 How to Use", expanded=False):
+        st.markdown("""
+        **Getting Started:**
+        1. Select date range (optional)
+        2. Toggle "Compare Year-over-Year" for annual comparisons
+        3. Choose filters (instructor, facility, category)
+        4. Click "Apply Filters"
+        
+        **New in 3.0:**
+        - ✨ Year-over-year comparison toggle
+        - 🔧 Fixed SOMA data duplicates
+        - 📊 Improved filter responsiveness
+        - 📅 Real data file timestamps
+        
+        **Tips:**
+        - Leave dates blank to see all data
+        - Select dates to enable comparisons
+        - Use facility toggles for multi-location view
+        - Export data via buttons below KPIs
+        
+        **Need Help?**
+        Contact Chief of Staff for assistance.
+        """)
+    
+    # Hide Streamlit branding
+    st.markdown("""
+    <style>
+    /* Hide Streamlit elements */
+    #MainMenu {visibility: hidden;}
+    footer {visibility: hidden;}
+    header[data-testid="stHeader"] {background-color: transparent;}
+    
+    /* Main container */
+    .main .block-container {
+        padding-top: 1rem;
+        padding-bottom: 1rem;
+        max-width: none;
+    }
+    
+    /* Sidebar */
+    section[data-testid="stSidebar"] > div {
+        padding-top: 2rem;
+    }
+    
+    /* Dashboard iframe */
+    iframe {
+        border: none;
+        display: block;
+    }
+    </style>
+    """, unsafe_allow_html=True)
+    
+    # Admin ad-hoc analytics over the local snapshot
+    if st.session_state.get('is_admin', False):
+        render_admin_query_panel(data, data_source, data_timestamp)
+
+    # Identifies this load for the version registry (skips rehashing unchanged data)
+    data_fingerprint = (data_source, str(data_timestamp), len(raw_data))
+
+    # Rolling-window leaderboards, maintained incrementally across data versions
+    render_leaderboard_panel(data, data_fingerprint)
+
+    # Server-side export of the filtered snapshot (admin only, like the dashboard export buttons)
+    if st.session_state.get('is_admin', False):
+        render_export_panel(data)
+
+    # Load dashboard files
+    html_content = load_file_content("index.html")
+    css_content = load_file_content("styles.css")
+    js_content = load_file_content("app.js")
+    category_js = load_file_content("category_analysis.js")
+    bridge_js = load_file_content("dashboard_bridge.js") if DASHBOARD_SYNC else ""
+    
+    if not html_content:
+        st.error("❌ Dashboard files not found")
+        st.info("Expected: index.html, styles.css, app.js")
+        return
+    
+    # Extract body content
+    if '<body>' in html_content and '</body>' in html_content:
+        body_content = html_content.split('<body>')[1].split('</body>')[0]
+    else:
+        body_content = html_content
+    
+    # Embedded-data page, used when the component is disabled or cannot be built
+    def embedded_document():
+        data_script = f"""
+        // Inject deduplicated data
+        window.dashboardData = {json.dumps(data)};
+        
+        // Inject admin access status
+        window.isAdmin = {str(st.session_state.get('is_admin', False)).lower()};
+        """
+        return build_dashboard_document(body_content, css_content, category_js, js_content, data_script)
+
     # Display dashboard
-    st.components.v1.html(complete_dashboard, height=3000, scrolling=True)
+    if bridge_js:
+        # Rows are pushed by the component; the page itself is the same for every session
+        data_script = f"""
+        window.scoreboardShellId = "__SCOREBOARD_SHELL_ID__";
+        {bridge_js}
+        """
+        # Component frames do not scroll, so the page scrolls inside its fixed height
+        frame_css = "html { height: 100%; overflow: hidden; } body { height: 100%; overflow-y: auto; }"
+        complete_dashboard = build_dashboard_document(
+            body_content, css_content, category_js, js_content, data_script, frame_css
+        )
+        try:
+            sync_info = render_dashboard_component(complete_dashboard, data, data_fingerprint)
+        except OSError as e:
+            st.warning(f"⚠️ Live dashboard updates unavailable ({str(e)}); embedding full data")
+            bridge_js = ""
+        else:
+            # Show the last push to this browser (admin only)
+            if sync_info and st.session_state.get('is_admin', False):
+                kind = "full load" if sync_info['reset'] else f"{sync_info['deletes']:,} removed"
+                st.sidebar.caption(
+                    f"🔁 Pushed {sync_info['upserts']:,} rows ({kind}), {sync_info['bytes'] / 1024:,.1f} KB"
+                )
+
+    if not bridge_js:
+        st.components.v1.html(embedded_document(), height=DASHBOARD_HEIGHT, scrolling=True)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,81 @@
+from datetime import date
+
+import pytest
+
+from bigquery_backends import (
+    InjectedFailure, QueryBackend, RecordingBackend, ReplayBackend, ReplayMiss,
+)
+from bigquery_client import BigQueryClient, month_shards
+
+ROWS = [
+    {"session_guid": f"g{i}", "class_date": date(2024, 3, i + 1), "total_attendees": i}
+    for i in range(5)
+]
+
+
+class FakeBackend(QueryBackend):
+    def __init__(self):
+        self.queries = 0
+
+    def query(self, query, params=None):
+        self.queries += 1
+        return iter(ROWS)
+
+    def get_table(self, full_name):
+        return {"num_rows": len(ROWS), "num_bytes": 10, "modified": "2024-03-06T00:00:00", "schema": []}
+
+
+def record(directory):
+    live = FakeBackend()
+    client = BigQueryClient(backend=RecordingBackend(live, str(directory)))
+    recorded = client.fetch_instructor_view(start_date="2024-03-01", end_date="2024-04-01")
+    client.get_table_info("instructor_view")
+    return live, recorded
+
+
+def test_replay_returns_recorded_rows(tmp_path):
+    live, recorded = record(tmp_path)
+    assert live.queries == 1
+    assert recorded[0]["class_date"] == "2024-03-01"
+
+    backend = ReplayBackend(str(tmp_path), page_size=2)
+    replayed = BigQueryClient(backend=backend).fetch_instructor_view(start_date="2024-03-01", end_date="2024-04-01")
+    assert replayed == recorded
+    assert BigQueryClient(backend=backend).get_table_info("instructor_view")["num_rows"] == len(ROWS)
+    stats = backend.stats()
+    assert stats["queries"] == 1
+    assert stats["pages"] == 3
+    assert stats["rows"] == len(ROWS)
+
+
+def test_unrecorded_query_is_a_miss(tmp_path):
+    record(tmp_path)
+    backend = ReplayBackend(str(tmp_path))
+    with pytest.raises(ReplayMiss):
+        BigQueryClient(backend=backend).fetch_instructor_view(start_date="2023-01-01", end_date="2023-02-01")
+    assert backend.stats()["misses"] == 1
+
+
+def test_failure_injection(tmp_path):
+    record(tmp_path)
+    backend = ReplayBackend(str(tmp_path), failure_rate=1.0, seed=1)
+    with pytest.raises(InjectedFailure):
+        backend.get_table("front-data-production.analytics_raw.instructor_view")
+    assert backend.stats()["failures"] == 1
+
+
+def test_incomplete_backend_fails_at_construction():
+    class QueryOnly(QueryBackend):
+        def query(self, query, params=None):
+            return iter([])
+
+    with pytest.raises(TypeError):
+        QueryOnly()
+
+
+def test_month_shards_split_on_calendar_months():
+    assert month_shards("2023-12-15", "2024-02-10") == [
+        ("2023-12", "2023-12-15", "2024-01-01"),
+        ("2024-01", "2024-01-01", "2024-02-01"),
+        ("2024-02", "2024-02-01", "2024-02-10"),
+    ]
@@ -0,0 +1,62 @@
+import gzip
+import json
+
+from dashboard_sync import DatasetVersions
+
+
+def session(guid, attendees):
+    return {"session_guid": guid, "class_date": "2024-03-01", "total_attendees": attendees}
+
+
+def apply(rows, payload, compressed=True):
+    """What the browser does with a delta: rows is {key: row}."""
+    delta = json.loads(gzip.decompress(payload) if compressed else payload)
+    if delta["reset"]:
+        rows = {}
+    else:
+        rows = dict(rows)
+    for key in delta["deletes"]:
+        del rows[key]
+    for key, row in delta["upserts"]:
+        rows[key] = row
+    return rows
+
+
+def by_key(records):
+    return {row["session_guid"]: row for row in records}
+
+
+def test_delta_round_trip_with_upserts_and_deletes():
+    versions = DatasetVersions()
+    first = [session("a", 1), session("b", 2), session("c", 3)]
+    second = [session("a", 1), session("b", 20), session("d", 4)]
+
+    v1 = versions.register(first)
+    payload, info = versions.delta(None, v1, first)
+    browser = apply({}, payload)
+    assert info == {"reset": True, "upserts": 3, "deletes": 0}
+    assert browser == by_key(first)
+
+    v2 = versions.register(second)
+    payload, info = versions.delta(v1, v2, second, compress=False)
+    assert info == {"reset": False, "upserts": 2, "deletes": 1}
+    browser = apply(browser, payload, compressed=False)
+    assert browser == by_key(second)
+
+    # Same content registers as the same version and sends nothing new
+    assert versions.register(list(second)) == v2
+    payload, info = versions.delta(v2, v2, second)
+    assert info == {"reset": False, "upserts": 0, "deletes": 0}
+
+
+def test_unknown_or_evicted_base_gets_a_reset():
+    versions = DatasetVersions(keep=2)
+    data = [[session("a", n)] for n in range(3)]
+    ids = [versions.register(records) for records in data]
+
+    payload, info = versions.delta(ids[0], ids[2], data[2])
+    assert info["reset"]
+    assert apply({"stale": {}}, payload) == by_key(data[2])
+
+    payload, info = versions.delta("d-unknown", ids[2], data[2])
+    assert info["reset"]
@@ -0,0 +1,78 @@
+import csv
+
+import pytest
+
+from data_export import (filter_records, export_to_file, iter_csv_bytes, PARQUET_AVAILABLE,
+                         SESSION_COLUMNS, PARTICIPANT_COLUMNS)
+
+
+def session(guid, class_date, instructor="Ann", facility="North", category="Cycle", attendees=5):
+    return {
+        "session_guid": guid, "class_date": class_date, "instructor_name": instructor,
+        "facility": facility, "greatgrandparent_category": category, "total_attendees": attendees,
+    }
+
+
+SESSIONS = [
+    session("s1", "2024-03-01T09:00:00"),
+    session("s2", "2024-03-05 18:00:00", instructor="Bob"),
+    session("s3", "2024-03-09", facility="South"),
+    session("s4", "2024-04-01", category="Yoga"),
+]
+
+
+def guids(rows):
+    return [row["session_guid"] for row in rows]
+
+
+def test_filters_match_dashboard():
+    assert guids(filter_records(SESSIONS)) == ["s1", "s2", "s3", "s4"]
+    # Date bounds are inclusive and compare the date part only
+    assert guids(filter_records(SESSIONS, date_from="2024-03-05", date_to="2024-03-09")) == ["s2", "s3"]
+    assert guids(filter_records(SESSIONS, instructor="Bob")) == ["s2"]
+    assert guids(filter_records(SESSIONS, facilities=["South"])) == ["s3"]
+    assert guids(filter_records(SESSIONS, categories=["Cycle"], date_to="2024-03-31")) == ["s1", "s2", "s3"]
+
+
+def read_csv(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.reader(f))
+
+
+def test_csv_export_uses_fixed_columns(tmp_path):
+    path = export_to_file(filter_records(SESSIONS, instructor="Bob"), "csv", directory=str(tmp_path))
+    header, *rows = read_csv(path)
+    assert header == SESSION_COLUMNS
+    assert len(rows) == 1
+    assert rows[0][SESSION_COLUMNS.index("session_guid")] == "s2"
+    assert rows[0][SESSION_COLUMNS.index("class_name")] == ""
+
+
+def test_empty_csv_export_still_has_header(tmp_path):
+    path = export_to_file(filter_records(SESSIONS, instructor="Nobody"), "csv",
+                          directory=str(tmp_path), columns=PARTICIPANT_COLUMNS)
+    assert read_csv(path) == [PARTICIPANT_COLUMNS]
+
+
+def test_unexpected_column_fails_and_removes_file(tmp_path):
+    # The column first appears after the first chunk
+    rows = SESSIONS + [dict(session("s5", "2024-05-01"), surprise="x")]
+    with pytest.raises(ValueError, match="surprise"):
+        b"".join(iter_csv_bytes(rows, SESSION_COLUMNS, chunk_rows=2))
+    with pytest.raises(ValueError):
+        export_to_file(rows, "csv", directory=str(tmp_path))
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.skipif(not PARQUET_AVAILABLE, reason="pyarrow not installed")
+def test_empty_parquet_export_keeps_schema(tmp_path):
+    import pyarrow.parquet as pq
+
+    path = export_to_file([], "parquet", directory=str(tmp_path))
+    table = pq.read_table(path)
+    assert table.num_rows == 0
+    assert table.schema.names == SESSION_COLUMNS
+    assert str(table.schema.field("total_attendees").type) == "double"
+
+    path = export_to_file(SESSIONS, "parquet", directory=str(tmp_path))
+    assert pq.read_table(path).column("total_attendees").to_pylist() == [5.0] * 4
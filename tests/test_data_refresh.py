@@ -0,0 +1,98 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+from data_refresh import StaleWhileRevalidate
+from snapshot_store import SnapshotStore
+
+ROWS = [{"session_guid": "g1", "class_date": "2024-03-01", "total_attendees": 3}]
+
+
+class FakeFetch:
+    """BigQuery stand-in that blocks until released."""
+
+    def __init__(self, rows=ROWS):
+        self.rows = rows
+        self.calls = 0
+        self.release = threading.Event()
+
+    def __call__(self):
+        self.calls += 1
+        self.release.wait(5)
+        return self.rows, "bigquery:analytics_raw.instructor_view", datetime.now()
+
+
+def fresh_file_fallback():
+    # data.json.gz checked out a minute ago
+    return [{"session_guid": "f1"}], "file:data.json.gz", datetime.now() - timedelta(minutes=1)
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_fallback_is_served_and_refreshed_in_background(tmp_path):
+    fetch = FakeFetch()
+    loader = StaleWhileRevalidate(fetch=fetch, fallback=fresh_file_fallback, store=SnapshotStore(tmp_path))
+
+    data, source, _ = loader.get()
+    assert source == "file:data.json.gz"
+    assert data == [{"session_guid": "f1"}]
+    wait_for(lambda: fetch.calls == 1)
+    assert loader.status()["pending"]
+
+    fetch.release.set()
+    wait_for(lambda: not loader.status()["pending"])
+    data, source, _ = loader.get()
+    assert source.startswith("snapshot:")
+    assert data == ROWS
+    assert fetch.calls == 1
+
+
+def test_fallback_refresh_honors_retry_after(tmp_path):
+    def failing_fetch():
+        failing_fetch.calls += 1
+        return None, "BigQuery error: down", None
+    failing_fetch.calls = 0
+
+    loader = StaleWhileRevalidate(fetch=failing_fetch, fallback=fresh_file_fallback,
+                                  store=SnapshotStore(tmp_path), retry_after=timedelta(minutes=5))
+    loader.get()
+    wait_for(lambda: not loader.status()["pending"] and failing_fetch.calls == 1)
+    loader.get()
+    loader.get()
+    assert failing_fetch.calls == 1
+    assert loader.status()["last_error"] == "BigQuery error: down"
+
+
+def test_fresh_snapshot_is_served_without_fetching(tmp_path):
+    store = SnapshotStore(tmp_path)
+    store.publish(ROWS, "worker")
+    fetch = FakeFetch()
+    loader = StaleWhileRevalidate(fetch=fetch, fallback=fresh_file_fallback, store=store)
+
+    _, source, _ = loader.get()
+    assert source.startswith("snapshot:")
+    assert fetch.calls == 0
+
+    # A version published by the worker is picked up on the next call
+    time.sleep(0.001)
+    newer = store.publish(ROWS + [{"session_guid": "g2"}], "worker")
+    data, source, _ = loader.get()
+    assert source == f"snapshot:{newer}"
+    assert len(data) == 2
+    assert fetch.calls == 0
+
+
+def test_snapshot_replaces_fallback_once_published(tmp_path):
+    store = SnapshotStore(tmp_path)
+    fetch = FakeFetch()
+    loader = StaleWhileRevalidate(fetch=fetch, fallback=fresh_file_fallback, store=store)
+    assert loader.get()[1] == "file:data.json.gz"
+
+    version = store.publish(ROWS, "worker")
+    assert loader.get()[1] == f"snapshot:{version}"
+    fetch.release.set()
@@ -0,0 +1,108 @@
+import random
+from datetime import date
+
+from dashboard_sync import DatasetVersions, digest_rows
+from performance_stats import DIMENSIONS, RollingStats, RollingStatsCache, contribution, week_of
+
+TODAY = date(2024, 6, 12)
+INSTRUCTORS = ["Ann", "Bob", "Cy", "Unknown"]
+CLASSES = ["Vinyasa", "Spin", "Unknown"]
+FACILITIES = ["SLC", "OGDEN", ""]
+
+
+def make_rows(rng, n, start=0):
+    return [{
+        "session_guid": f"s{start + i}",
+        "class_date": date.fromordinal(TODAY.toordinal() - rng.randrange(400)).isoformat(),
+        "instructor_name": rng.choice(INSTRUCTORS),
+        "class_name": rng.choice(CLASSES),
+        "facility": rng.choice(FACILITIES),
+        "total_attendees": rng.randrange(12),
+    } for i in range(n)]
+
+
+def engine_for(versions, cache, records):
+    version = versions.register(records)
+    return cache.get(version, *versions.digests(version, records), records, TODAY)
+
+
+def boards(engine):
+    return {
+        (dimension, window, bottom): engine.leaderboard(dimension, window, k=5, bottom=bottom)
+        for dimension in DIMENSIONS for window in engine.windows for bottom in (False, True)
+    }
+
+
+def test_incremental_engine_matches_full_rebuild():
+    rng = random.Random(7)
+    records = make_rows(rng, 300)
+    versions, cache = DatasetVersions(), RollingStatsCache()
+    engine_for(versions, cache, records)
+
+    # Change, remove and add sessions; the cache derives the new engine from the old one
+    updated = [dict(row, total_attendees=row["total_attendees"] + 3) if i % 7 == 0 else row
+               for i, row in enumerate(records) if i % 11]
+    updated += make_rows(rng, 40, start=1000)
+    incremental = engine_for(versions, cache, updated)
+
+    fresh = engine_for(DatasetVersions(), RollingStatsCache(), updated)
+    assert boards(incremental) == boards(fresh)
+
+
+def test_engines_are_isolated_per_version():
+    rng = random.Random(3)
+    first, second = make_rows(rng, 100), make_rows(rng, 100, start=500)
+    versions, cache = DatasetVersions(), RollingStatsCache()
+    a = engine_for(versions, cache, first)
+    before = boards(a)
+    engine_for(versions, cache, second)
+    assert engine_for(versions, cache, first) is a
+    assert boards(a) == before
+
+
+def test_leaderboard_matches_brute_force():
+    records = make_rows(random.Random(11), 400)
+    keys, digest_list = digest_rows(records)
+    engine = RollingStats()
+    engine.sync("v", keys, dict(zip(keys, digest_list)), records, TODAY)
+
+    for window in engine.windows:
+        first, last = (week_of(day.isoformat()) for day in engine.window_range(window))
+        for dimension in DIMENSIONS:
+            groups = {}
+            for row in records:
+                week, names, attendees = contribution(row)
+                if first <= week <= last and dimension in names:
+                    groups.setdefault(names[dimension], []).append(attendees)
+            expected = sorted(
+                (name for name, values in groups.items()
+                 if len(values) >= 3 and not (dimension == "instructor" and name == "Unknown")),
+                key=lambda name: (-sum(groups[name]) / len(groups[name]), -len(groups[name]), name),
+            )[:10]
+            assert [e["name"] for e in engine.leaderboard(dimension, window)] == expected
+
+
+def test_classes_keyed_by_facility_and_unknown_only_skipped_for_instructors():
+    records = [{
+        "session_guid": f"s{i}", "class_date": "2024-06-10", "instructor_name": "Unknown",
+        "class_name": "Unknown", "facility": facility, "total_attendees": 5,
+    } for i, facility in enumerate(["SLC"] * 3 + ["OGDEN"] * 3)]
+    versions, cache = DatasetVersions(), RollingStatsCache()
+    engine = engine_for(versions, cache, records)
+
+    assert engine.leaderboard("instructor", 4) == []
+    assert sorted(e["name"] for e in engine.leaderboard("class", 4)) == ["Unknown (Ogden)", "Unknown (Salt Lake City)"]
+
+
+def test_evicted_version_is_registered_again():
+    rng = random.Random(5)
+    versions = DatasetVersions(keep=2)
+    records = make_rows(rng, 20)
+    version = versions.register(records)
+    for start in (100, 200):
+        versions.register(make_rows(rng, 20, start=start))
+
+    keys, digests = versions.digests(version, records)
+    assert keys == [row["session_guid"] for row in records]
+    _, info = versions.delta(None, version, records)
+    assert info["upserts"] == 20
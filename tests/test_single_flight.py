@@ -0,0 +1,71 @@
+import threading
+import time
+
+import pytest
+
+from single_flight import SingleFlight
+
+
+def run_concurrently(n, target):
+    results, errors = [None] * n, [None] * n
+    start = threading.Barrier(n)
+
+    def worker(i):
+        start.wait()
+        try:
+            results[i] = target()
+        except Exception as e:
+            errors[i] = e
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results, errors
+
+
+def test_concurrent_callers_share_one_load():
+    group = SingleFlight()
+    executions = []
+
+    def load():
+        executions.append(1)
+        time.sleep(0.3)
+        return ["rows"]
+
+    results, errors = run_concurrently(8, lambda: group.do("bigquery", load))
+
+    assert executions == [1]
+    assert errors == [None] * 8
+    assert all(r is results[0] for r in results)
+    stats = group.stats()
+    assert stats["calls"] == 8
+    assert stats["executions"] == 1
+    assert stats["coalesced"] == 7
+    assert stats["in_flight"] == 0
+
+
+def test_error_reaches_every_waiter_and_next_call_retries():
+    group = SingleFlight()
+
+    def fail():
+        time.sleep(0.2)
+        raise RuntimeError("warehouse down")
+
+    _, errors = run_concurrently(4, lambda: group.do("bigquery", fail))
+    assert all(isinstance(e, RuntimeError) for e in errors)
+    assert group.stats()["errors"] == 1
+
+    # The failed call is not cached
+    assert group.do("bigquery", lambda: "ok") == "ok"
+
+
+def test_different_keys_do_not_coalesce():
+    group = SingleFlight()
+    assert group.do("a", lambda: 1) == 1
+    assert group.do("b", lambda: 2) == 2
+    assert group.stats()["executions"] == 2
+
+    with pytest.raises(ValueError):
+        group.do("a", lambda: int("x"))
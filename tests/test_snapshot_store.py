@@ -0,0 +1,68 @@
+import threading
+
+from snapshot_store import SnapshotStore, LATEST_FILE
+
+
+def records(n, tag="a"):
+    return [{"session_guid": f"{tag}{i}", "class_date": "2024-03-01", "total_attendees": i} for i in range(n)]
+
+
+def test_publish_points_latest_at_complete_version(tmp_path):
+    store = SnapshotStore(tmp_path)
+    assert store.latest_version() is None
+
+    version = store.publish(records(3), "test")
+    assert store.latest_version() == version
+    data, manifest = store.load_latest()
+    assert data == records(3)
+    assert manifest["summary"]["records"] == 3
+    # No staging directories or temporary pointer files left behind
+    assert not [p for p in tmp_path.iterdir() if p.name.startswith(".")]
+
+
+def test_latest_never_points_at_a_missing_version(tmp_path):
+    store = SnapshotStore(tmp_path)
+    (tmp_path / LATEST_FILE).write_text("v20990101T000000000000", encoding="utf-8")
+    assert store.latest_version() is None
+
+
+def test_readers_only_see_complete_snapshots_during_publishes(tmp_path):
+    store = SnapshotStore(tmp_path, keep=2)
+    store.publish(records(50, "v0"), "test")
+    errors = []
+    done = threading.Event()
+
+    def read():
+        while not done.is_set():
+            try:
+                data, _ = store.load_latest()
+                assert data is not None and len(data) == 50
+            except Exception as e:
+                errors.append(e)
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    for i in range(20):
+        store.publish(records(50, f"v{i + 1}"), "test")
+    done.set()
+    reader.join()
+    assert errors == [], [repr(e) for e in errors[:3]]
+
+
+def test_prune_keeps_newest_and_latest(tmp_path):
+    store = SnapshotStore(tmp_path, keep=2)
+    published = [store.publish(records(1, str(i)), "test") for i in range(4)]
+    assert store.versions() == published[-2:]
+    assert store.latest_version() == published[-1]
+
+
+def test_shard_range_is_checked_without_parsing(tmp_path):
+    store = SnapshotStore(tmp_path)
+    path = store.write_shard("instructor_view", "2024-03", "2024-03-01", "2024-04-01", records(2))
+    assert store.has_shard("instructor_view", "2024-03", "2024-03-01", "2024-04-01")
+    assert not store.has_shard("instructor_view", "2024-03", "2024-03-01", "2024-03-15")
+
+    # The range file, not the shard body, answers the check
+    path.write_text("not json", encoding="utf-8")
+    assert store.has_shard("instructor_view", "2024-03", "2024-03-01", "2024-04-01")
+    assert store.shards("instructor_view") == ["2024-03"]
@@ -3,13 +3,32 @@ The Front Dashboard - Excel to JSON Converter
 Automatically converts data_02_FromConfig.xlsx to data.json.gz
 """
 
-import pandas as pd
 import json
 import gzip
 from pathlib import Path
 from datetime import datetime
 import sys
 
+def read_excel_records(excel_file, sheet_name):
+    """Read the Excel export and return JSON-ready records."""
+    # Deferred: pandas/openpyxl are only needed when converting the Excel export
+    from lazy_imports import load
+    pd = load("pandas")
+
+    df = pd.read_excel(excel_file, sheet_name=sheet_name)
+
+    # Convert date columns to strings for JSON
+    date_columns = ['class_date', 'class_end_date']
+    for col in date_columns:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], errors='coerce').dt.strftime('%Y-%m-%d')
+
+    # Fill NaN values
+    df = df.fillna('')
+
+    # Convert to list of dictionaries
+    return df.to_dict('records')
+
 def main():
     excel_file = "data_02_FromConfig.xlsx"
     sheet_name = "data_02_FromConfig"
@@ -33,24 +52,13 @@ def main():
         print(f"📂 Reading: {excel_file}")
         print(f"📄 Sheet: {sheet_name}")
         
-        df = pd.read_excel(excel_file, sheet_name=sheet_name)
+        data = read_excel_records(excel_file, sheet_name)
+        columns = list(data[0].keys()) if data else []
         
-        print(f"✅ Loaded {len(df):,} rows")
-        print(f"📊 Columns: {', '.join(list(df.columns)[:6])}...")
+        print(f"✅ Loaded {len(data):,} rows")
+        print(f"📊 Columns: {', '.join(columns[:6])}...")
         print()
         
-        # Convert date columns to strings for JSON
-        date_columns = ['class_date', 'class_end_date']
-        for col in date_columns:
-            if col in df.columns:
-                df[col] = pd.to_datetime(df[col], errors='coerce').dt.strftime('%Y-%m-%d')
-        
-        # Fill NaN values
-        df = df.fillna('')
-        
-        # Convert to list of dictionaries
-        data = df.to_dict('records')
-        
         # Write compressed JSON
         print(f"💾 Writing: {output_file}")
         with gzip.open(output_file, 'wt', encoding='utf-8') as f: